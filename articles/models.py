@@ -19,5 +19,10 @@ class Article(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='article_updated_idx'),
+        ]
+
     def __str__(self):
         return self.title
@@ -1,3 +1,33 @@
+import json
+
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from users.models import CustomUser
+
+from .models import Article, Topic
+from .serializers import ArticleSerializer
+
+
+class ArticleListTests(TestCase):
+    """The article list is built from .values() rows and must match ArticleSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create(email='writer@example.com', name='Writer', avatar='avatars/writer.png')
+        topic = Topic.objects.create(name='Growth', slug='growth')
+        Article.objects.create(title='With topic', content='Body', author=author, topic=topic, is_published=True)
+        Article.objects.create(title='Without topic', content='Body', author=author)
+
+    def test_list_matches_serializer(self):
+        response = APIClient().get('/api/articles/articles/')
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['results']
+        self.assertEqual(len(rows), 2)
 
-# Create your tests here.
+        articles = Article.objects.in_bulk([row['id'] for row in rows])
+        serializer = ArticleSerializer(
+            [articles[row['id']] for row in rows], many=True, context={'request': response.wsgi_request}
+        )
+        self.assertEqual(rows, json.loads(JSONRenderer().render(serializer.data)))
@@ -1,5 +1,7 @@
 from django.shortcuts import render
 from rest_framework import viewsets
+from config.conditional import ConditionalGetMixin
+from config.projections import ProjectedListMixin
 from .models import Topic, Article
 from .serializers import TopicSerializer, ArticleSerializer
 
@@ -9,6 +11,7 @@ class TopicViewSet(viewsets.ModelViewSet):
     queryset = Topic.objects.all()
     serializer_class = TopicSerializer
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(ConditionalGetMixin, ProjectedListMixin, viewsets.ModelViewSet):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
+    ordering = ['-created_at']
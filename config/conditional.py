@@ -0,0 +1,71 @@
+import hashlib
+from calendar import timegm
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for list and retrieve.
+
+    A list's ETag comes from one aggregate over the filtered queryset (latest
+    value of every ``last_modified_fields`` entry and row count) plus the
+    query string. Lists carry no Last-Modified: a deleted row lowers neither
+    timestamp, so If-Modified-Since would keep answering 304 after a delete.
+    A detail's validators come from the same fields on the object, which may
+    follow relations (``analytics__updated_at``). A matching If-None-Match or
+    If-Modified-Since short-circuits to 304 before anything is serialized.
+    """
+    last_modified_fields = ('updated_at',)
+
+    def list(self, request, *args, **kwargs):
+        stamp = self.filter_queryset(self.get_queryset()).aggregate(
+            *(Max(field) for field in self.last_modified_fields), count=Count('pk')
+        )
+        validators = (
+            [stamp[f'{field}__max'] for field in self.last_modified_fields],
+            stamp['count'],
+            sorted(request.query_params.lists()),
+        )
+        render = super().list
+        return self.conditional(request, validators, None, lambda: render(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        stamps = [field_value(instance, field) for field in self.last_modified_fields]
+        validators = (instance.pk, stamps)
+        last_modified = max((stamp for stamp in stamps if stamp is not None), default=None)
+        return self.conditional(
+            request, validators, last_modified, lambda: Response(self.get_serializer(instance).data)
+        )
+
+    def conditional(self, request, validators, last_modified, render):
+        """Return 304 when the client's copy is current, otherwise render() with validators attached"""
+        key = repr((self.basename, request.accepted_renderer.format, validators))
+        etag = quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+        timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+        response.headers['ETag'] = etag
+        if timestamp is not None:
+            response.headers['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+def field_value(instance, path):
+    """Follow a ``__`` lookup path through an instance's relations (None where one is missing)"""
+    value = instance
+    for name in path.split('__'):
+        try:
+            value = getattr(value, name)
+        except ObjectDoesNotExist:
+            return None
+        if value is None:
+            return None
+    return value
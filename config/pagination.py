@@ -0,0 +1,194 @@
+import json
+from datetime import date, datetime
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the full ordering plus the primary key.
+
+    DRF's CursorPagination positions on the first ordering field only and
+    falls back to OFFSET for ties. Here the cursor holds the last row's value
+    for every ordering field and the primary key is appended as a tiebreaker,
+    so each page is a single range scan from the previous one and page N
+    costs the same as page 1. Pass ``?count=true`` to include the total.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = '-pk'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.count()
+
+        queryset = queryset.order_by(*self.order_by(queryset.model, reverse))
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(queryset.model, position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+        first = self.get_position(self.page[0]) if self.page else position
+        last = self.get_position(self.page[-1]) if self.page else position
+
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.next_position = last
+        self.previous_position = first
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        # Without an explicit order, follow the view's default and then the model's
+        default = getattr(view, 'ordering', None) or queryset.model._meta.ordering
+        if default and all(isinstance(field, str) for field in default):
+            self.ordering = default
+        pk = queryset.model._meta.pk.attname
+        ordering = tuple(
+            field.replace('pk', pk) if field.lstrip('-') == 'pk' else field
+            for field in super().get_ordering(request, queryset, view)
+        )
+        if ordering[-1].lstrip('-') != pk:
+            ordering += (f'-{pk}' if ordering[-1].startswith('-') else pk,)
+        return ordering
+
+    def order_by(self, model, reverse):
+        """Ordering expressions with NULLs after every value when walking forward"""
+        expressions = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            nulls = {}
+            if is_nullable(model, name):
+                nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            if field.startswith('-') != reverse:
+                expressions.append(F(name).desc(**nulls))
+            else:
+                expressions.append(F(name).asc(**nulls))
+        return expressions
+
+    def keyset_filter(self, model, position, reverse):
+        """Rows strictly after ``position`` in the ordering, or strictly before it when ``reverse``"""
+        terms = []
+        equal = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            nullable = is_nullable(model, name)
+            if value is None:
+                # NULLs sort last, so only non-NULL rows lie before a NULL position
+                beyond = Q(**{f'{name}__isnull': False}) if reverse else None
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+                beyond = Q(**{f'{name}__{lookup}': value})
+                if nullable and not reverse:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if beyond is not None:
+                terms.append(reduce(and_, equal + [beyond]))
+            equal.append(same)
+        if not terms:
+            return Q(pk__in=[])
+        keyset = reduce(or_, terms)
+
+        # A bound on the leading column alone lets the database range-scan its index
+        field, value = self.ordering[0], position[0]
+        name = field.lstrip('-')
+        if value is not None and not is_nullable(model, name):
+            lookup = 'lte' if field.startswith('-') != reverse else 'gte'
+            keyset &= Q(**{f'{name}__{lookup}': value})
+        return keyset
+
+    def get_position(self, instance):
+        return [
+            cursor_value(instance[name] if isinstance(instance, dict) else getattr(instance, name))
+            for name in (field.lstrip('-') for field in self.ordering)
+        ]
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            position = json.loads(cursor.position) if cursor.position is not None else None
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if position is not None and (not isinstance(position, list) or len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        position = json.dumps(cursor.position, separators=(',', ':')) if cursor.position is not None else None
+        return super().encode_cursor(Cursor(offset=0, reverse=cursor.reverse, position=position))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': self.count_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Include the total number of results.',
+            'schema': {'type': 'boolean'},
+        }]
+
+
+def is_nullable(model, name):
+    try:
+        return model._meta.get_field(name).null
+    except FieldDoesNotExist:
+        return False
+
+
+def cursor_value(value):
+    """JSON-safe form of an ordering value that still filters back to the same row"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, 'pk'):
+        return value.pk
+    return str(value)
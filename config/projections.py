@@ -0,0 +1,162 @@
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from rest_framework import serializers
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .renderers import FastJSONRenderer
+
+# DRF fields whose representation of a database value of the right type is the value itself
+IDENTITY_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.FloatField, serializers.IntegerField,
+    serializers.JSONField, serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField,
+)
+
+
+class RowProjection:
+    """
+    A serializer's read representation built straight from ``.values()`` rows.
+
+    Every readable field is compiled once into a lookup and a mapper: model
+    columns and dotted sources become ``values()`` lookups, nested serializers
+    project through their foreign key, and anything else (properties, method
+    fields) has to be declared in ``computed`` as ``name: (lookups, function)``.
+    Columns whose representation is the database value itself get no mapper.
+    """
+
+    def __init__(self, serializer_class, computed=None, context=None, prefix=''):
+        self.lookups = []
+        self.mappers = []
+        serializer = serializer_class(context=context or {})
+        model = serializer.Meta.model
+        computed = computed or {}
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in computed:
+                lookups, function = computed[name]
+                lookups = [prefix + lookup for lookup in lookups]
+                self.add_lookups(*lookups)
+                self.mappers.append((name, None, computed_mapper(lookups, function)))
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                self.mappers.append((name, None, self.nested_mapper(model, field, context, prefix)))
+                continue
+            source_field = model_field(model, field.source)
+            if source_field is None or source_field.many_to_many or source_field.one_to_many:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} has no column to project; declare it in computed"
+                )
+            lookup = prefix + field.source.replace('.', '__')
+            self.add_lookups(lookup)
+            self.mappers.append((name, lookup, column_mapper(lookup, field, source_field)))
+
+    def add_lookups(self, *lookups):
+        for lookup in lookups:
+            if lookup not in self.lookups:
+                self.lookups.append(lookup)
+
+    def nested_mapper(self, model, field, context, prefix):
+        if isinstance(field, serializers.ListSerializer) or '.' in field.source:
+            raise ImproperlyConfigured(f"Cannot project nested field {field.field_name}")
+        key = prefix + field.source
+        nested = RowProjection(type(field), context=context, prefix=f'{key}__')
+        self.add_lookups(key, *nested.lookups)
+
+        def mapper(row):
+            return None if row[key] is None else nested.project(row)
+        return mapper
+
+    def project(self, row):
+        return {name: row[lookup] if mapper is None else mapper(row) for name, lookup, mapper in self.mappers}
+
+    def render(self, rows):
+        project = self.project
+        return [project(row) for row in rows]
+
+
+def model_field(model, source):
+    """The model field behind a (possibly dotted) serializer source, or None"""
+    field = None
+    for part in source.split('.'):
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model
+    return field
+
+
+def computed_mapper(lookups, function):
+    if len(lookups) == 1:
+        lookup = lookups[0]
+        return lambda row: function(row[lookup])
+    get = itemgetter(*lookups)
+    return lambda row: function(*get(row))
+
+
+def column_mapper(lookup, field, source_field):
+    """Compile one serializer field into a row -> representation function, or None for identity"""
+    if isinstance(field, serializers.DateTimeField) and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601:
+        timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+        def datetime_mapper(row):
+            value = row[lookup]
+            if not value:
+                return None
+            value = value.astimezone(timezone).isoformat() if timezone is not None else value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return datetime_mapper
+
+    if isinstance(field, serializers.FileField) and isinstance(source_field, models.FileField):
+        storage = source_field.storage
+        use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+        request = field.context.get('request')
+
+        def file_mapper(row):
+            name = row[lookup]
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return file_mapper
+
+    if isinstance(field, IDENTITY_FIELDS) or (
+        isinstance(field, serializers.ChoiceField) and all(isinstance(key, str) for key in field.choices)
+    ):
+        return None
+
+    to_representation = field.to_representation
+
+    def field_mapper(row):
+        value = row[lookup]
+        return None if value is None else to_representation(value)
+    return field_mapper
+
+
+class ProjectedListMixin:
+    """
+    Serve the list action from ``.values()`` rows mapped by a RowProjection
+    instead of model instances and serializers. Detail and write actions
+    keep using the serializer.
+    """
+    list_computed_fields = {}
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def list(self, request, *args, **kwargs):
+        projection = RowProjection(
+            self.get_serializer_class(), self.list_computed_fields, context=self.get_serializer_context()
+        )
+        queryset = self.filter_queryset(self.get_queryset()).values(*projection.lookups)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.render(page))
+        return Response(projection.render(queryset))
@@ -146,6 +146,8 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 # JWT Settings
@@ -200,6 +202,25 @@ DEFAULT_FROM_EMAIL = "your-email@gmail.com"  # Replace with your email
 # Site URL for tracking links
 SITE_URL = "http://localhost:3000"  # Change this to your domain in production
 
+# Public URL of this API, used for open/click tracking links in emails
+TRACKING_URL = "http://localhost:8000"
+
+# Cache (dashboard stats are cached here)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/2',
+    }
+}
+
+# Stats endpoints: entries are fresh for STATS_CACHE_TIMEOUT seconds, then
+# served stale for up to STATS_CACHE_STALE_TIMEOUT while one request recomputes
+STATS_CACHE_TIMEOUT = 60
+STATS_CACHE_STALE_TIMEOUT = 60 * 60
+STATS_CACHE_LOCK_TIMEOUT = 30
+# With nothing cached yet, wait this long for the recomputing request before computing inline
+STATS_CACHE_COLD_WAIT = 1
+
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
@@ -209,4 +230,63 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
 # Celery Beat Schedule
+from celery.schedules import crontab
+
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'flush-tracking-events': {
+        'task': 'newsletters.tasks.flush_tracking_events',
+        'schedule': 10.0,
+    },
+    'materialize-analytics-counters': {
+        'task': 'newsletters.tasks.materialize_analytics_counters',
+        'schedule': 60.0,
+    },
+    'update-daily-stats': {
+        'task': 'newsletters.tasks.update_daily_stats',
+        'schedule': 5 * 60,
+    },
+    'build-cohort-retention': {
+        'task': 'newsletters.tasks.build_cohort_retention',
+        'schedule': 24 * 60 * 60,
+    },
+    'score-subscriber-engagement': {
+        'task': 'newsletters.tasks.score_subscriber_engagement',
+        'schedule': 24 * 60 * 60,
+    },
+    'refresh-report-views': {
+        'task': 'reports.tasks.refresh_report_views',
+        'schedule': 60 * 60,
+    },
+    'build-weekly-newsletter-report': {
+        'task': 'reports.tasks.build_weekly_newsletter_report',
+        'schedule': crontab(hour=2, minute=0, day_of_week='mon'),
+    },
+    'build-monthly-newsletter-report': {
+        'task': 'reports.tasks.build_monthly_newsletter_report',
+        'schedule': crontab(hour=2, minute=30, day_of_month=1),
+    },
+    'maintain-event-partitions': {
+        'task': 'newsletters.tasks.maintain_event_partitions',
+        'schedule': 6 * 60 * 60,
+    },
+}
+
+# Tracking event buffer (opens/clicks are queued in Redis and flushed in bulk)
+NEWSLETTER_REDIS_URL = 'redis://localhost:6379/1'
+TRACKING_FLUSH_BATCH_SIZE = 5000
+TRACKING_FLUSH_MAX_BATCHES = 20
+
+# Newsletter event log (daily partitions on PostgreSQL)
+NEWSLETTER_EVENT_PARTITIONS_AHEAD = 7
+NEWSLETTER_EVENT_RETENTION_DAYS = 365
+
+# Daily rollups (NewsletterDailyStats / SubscriberDailyStats): days recomputed on each run
+DAILY_STATS_WINDOW_DAYS = 2
+
+# Subscriber engagement score: days for the recency weight to halve
+ENGAGEMENT_HALF_LIFE_DAYS = 30
+ENGAGEMENT_SCORE_CHUNK_SIZE = 10000
+
+# Shared secret for signing email provider webhooks (X-Webhook-Signature: sha256=<hmac>)
+NEWSLETTER_WEBHOOK_SECRET = "change-me"  # Get this from your email provider
@@ -14,10 +14,10 @@ class NewsletterTemplateAdmin(admin.ModelAdmin):
 
 @admin.register(Subscriber)
 class SubscriberAdmin(admin.ModelAdmin):
-    list_display = ['email', 'full_name', 'is_active', 'frequency', 'source', 'subscribed_at', 'total_emails_received']
+    list_display = ['email', 'full_name', 'is_active', 'frequency', 'source', 'subscribed_at', 'total_emails_received', 'engagement_score']
     list_filter = ['is_active', 'frequency', 'source', 'subscribed_at']
     search_fields = ['email', 'first_name', 'last_name']
-    readonly_fields = ['subscribed_at', 'unsubscribed_at', 'total_emails_received', 'total_emails_opened', 'total_emails_clicked']
+    readonly_fields = ['subscribed_at', 'unsubscribed_at', 'total_emails_received', 'total_emails_opened', 'total_emails_clicked', 'engagement_score']
     ordering = ['-subscribed_at']
     
     actions = ['activate_subscribers', 'deactivate_subscribers']
@@ -107,7 +107,8 @@ class NewsletterAnalyticsAdmin(admin.ModelAdmin):
     readonly_fields = ['newsletter', 'total_sent', 'total_delivered', 'total_bounced', 
                       'total_opened', 'total_clicked', 'total_unsubscribed', 'delivery_rate', 
                       'open_rate', 'click_rate', 'unsubscribe_rate', 'first_open_at', 
-                      'last_open_at', 'average_time_to_open', 'updated_at']
+                      'last_open_at', 'average_time_to_open', 'median_time_to_open',
+                      'p90_time_to_open', 'updated_at']
     ordering = ['-updated_at']
     
     def newsletter_title(self, obj):
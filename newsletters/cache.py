@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'newsletters:stats:generation'
+ENTRY_KEY = 'newsletters:stats:{}'
+LOCK_KEY = 'newsletters:stats:lock:{}'
+
+CACHE_PARAMS = ('period', 'start_date', 'end_date')
+
+# Set inside batched_invalidation(); collects the invalidations it swallows
+_pending_batch = ContextVar('newsletters_stats_invalidation_batch', default=None)
+
+
+def stats_cache_key(endpoint, scope, params):
+    """Cache key for one (endpoint, user scope, period, date range) combination"""
+    raw = '|'.join([endpoint, scope] + [f'{name}={params.get(name) or ""}' for name in CACHE_PARAMS])
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def current_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock so a lost generation key can't revive old entries
+        cache.add(GENERATION_KEY, int(time.time() * 1000), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_stats():
+    """Mark every cached stats entry as stale"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, int(time.time() * 1000), timeout=None)
+    except Exception as e:
+        logger.error(f"Failed to invalidate stats cache: {str(e)}")
+
+
+def schedule_invalidation():
+    """Invalidate once the current transaction commits, or once the enclosing batch ends"""
+    pending = _pending_batch.get()
+    if pending is not None:
+        pending.append(True)
+    else:
+        transaction.on_commit(invalidate_stats)
+
+
+@contextmanager
+def batched_invalidation():
+    """
+    Collapse the per-row invalidations of a bulk operation (every saved send
+    or subscriber fires one through the model signals) into a single one
+    """
+    if _pending_batch.get() is not None:
+        yield
+        return
+    pending = []
+    token = _pending_batch.set(pending)
+    try:
+        yield
+    finally:
+        _pending_batch.reset(token)
+        if pending:
+            transaction.on_commit(invalidate_stats)
+
+
+def get_cached_stats(endpoint, scope, params, compute):
+    """
+    Return cached stats, recomputing an expired or invalidated entry in only
+    one request at a time while concurrent requests serve the stale value
+    """
+    key = stats_cache_key(endpoint, scope, params)
+    entry_key = ENTRY_KEY.format(key)
+    lock_key = LOCK_KEY.format(key)
+    try:
+        generation = current_generation()
+        entry = cache.get(entry_key)
+    except Exception as e:
+        logger.error(f"Stats cache unavailable, computing directly: {str(e)}")
+        return compute()
+
+    if entry and entry['generation'] == generation and entry['expires_at'] > time.time():
+        return entry['value']
+
+    if cache.add(lock_key, 1, timeout=settings.STATS_CACHE_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(entry_key, {
+                'value': value,
+                'generation': generation,
+                'expires_at': time.time() + settings.STATS_CACHE_TIMEOUT,
+            }, timeout=settings.STATS_CACHE_STALE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    if entry:
+        return entry['value']
+
+    # Nothing cached yet: give the request holding the lock a moment, then
+    # compute here rather than tie up a worker for the whole lock timeout
+    deadline = time.time() + settings.STATS_CACHE_COLD_WAIT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(entry_key)
+        if entry:
+            return entry['value']
+    return compute()
@@ -0,0 +1,152 @@
+import itertools
+import logging
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REPORT_TYPE = 'cohort_retention'
+
+# Set while a first build requested by get_cohort_report is queued
+BUILD_QUEUED_KEY = 'newsletters:cohorts:build_queued'
+BUILD_QUEUED_TIMEOUT = 10 * 60
+
+
+def load_send_chunks(chunk_size=50000):
+    """
+    Stream (subscriber_id, cohort_month, opened) for every sent email, ordered
+    by subscriber and send time, as (<=chunk_size, 3) int64 arrays. The cohort
+    month is year * 12 + month - 1 of the subscriber's signup.
+    """
+    from .models import NewsletterSend
+
+    rows = (
+        NewsletterSend.objects.filter(sent_at__isnull=False)
+        .annotate(
+            cohort=ExtractYear('subscriber__subscribed_at') * 12 + ExtractMonth('subscriber__subscribed_at') - 1,
+            opened=Case(
+                When(Q(status__in=['opened', 'clicked']) | Q(opened_at__isnull=False), then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        )
+        .order_by('subscriber_id', 'sent_at', 'id')
+        .values_list('subscriber_id', 'cohort', 'opened')
+        .iterator(chunk_size=chunk_size)
+    )
+
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        yield np.array(chunk, dtype=np.int64)
+
+
+def newsletter_ordinals(subscriber_ids):
+    """0 for each subscriber's first newsletter, 1 for the second, ... (input sorted by subscriber)"""
+    n = len(subscriber_ids)
+    starts = np.flatnonzero(np.r_[True, subscriber_ids[1:] != subscriber_ids[:-1]])
+    lengths = np.diff(np.r_[starts, n])
+    return np.arange(n) - np.repeat(starts, lengths)
+
+
+def count_retention(chunks, max_periods=12):
+    """
+    Fold streamed send chunks into per-cohort received / opened counts by
+    period, so memory stays at one chunk plus the cohorts x periods totals.
+    A subscriber's sends may straddle two chunks; their ordinals carry over.
+    Returns {cohort_month: [received, opened]} as (2, max_periods) arrays.
+    """
+    totals = {}
+    last_subscriber, carried = None, 0
+    for columns in chunks:
+        subscriber_ids, cohort_months, opened = columns[:, 0], columns[:, 1], columns[:, 2].astype(bool)
+        ordinals = newsletter_ordinals(subscriber_ids)
+        if subscriber_ids[0] == last_subscriber:
+            ordinals[subscriber_ids == last_subscriber] += carried
+        last_subscriber, carried = subscriber_ids[-1], ordinals[-1] + 1
+
+        in_window = ordinals < max_periods
+        cohort_values, cohort_index = np.unique(cohort_months[in_window], return_inverse=True)
+        ordinals = ordinals[in_window]
+        opened = opened[in_window]
+
+        received = np.zeros((len(cohort_values), max_periods), dtype=np.int64)
+        np.add.at(received, (cohort_index, ordinals), 1)
+        opened_counts = np.zeros_like(received)
+        np.add.at(opened_counts, (cohort_index[opened], ordinals[opened]), 1)
+
+        for month, chunk_received, chunk_opened in zip(cohort_values.tolist(), received, opened_counts):
+            counts = totals.setdefault(month, np.zeros((2, max_periods), dtype=np.int64))
+            counts[0] += chunk_received
+            counts[1] += chunk_opened
+    return totals
+
+
+def compute_retention(chunks, max_periods=12):
+    """
+    Cohort x period matrices: period N is each subscriber's (N+1)th newsletter.
+    retention[c][N] is the share of cohort c that opened its (N+1)th newsletter,
+    or None when nobody in the cohort has received that many yet.
+    """
+    totals = count_retention(chunks, max_periods)
+    if not totals:
+        return {'cohorts': [], 'cohort_sizes': [], 'received': [], 'opened': [], 'retention': []}
+
+    cohort_values = sorted(totals)
+    received = np.array([totals[month][0] for month in cohort_values])
+    opened_counts = np.array([totals[month][1] for month in cohort_values])
+
+    # Everybody in a cohort received a first newsletter
+    cohort_sizes = received[:, 0]
+    retention = np.round(opened_counts / cohort_sizes[:, None] * 100, 2)
+
+    return {
+        'cohorts': [f'{month // 12:04d}-{month % 12 + 1:02d}' for month in cohort_values],
+        'cohort_sizes': cohort_sizes.tolist(),
+        'received': received.tolist(),
+        'opened': opened_counts.tolist(),
+        'retention': [
+            [rate if count else None for rate, count in zip(rates, counts)]
+            for rates, counts in zip(retention.tolist(), received.tolist())
+        ],
+    }
+
+
+def build_cohort_report(max_periods=12):
+    """Recompute the retention matrix and store it as the cohort AnalyticsReport"""
+    from reports.models import AnalyticsReport
+
+    data = compute_retention(load_send_chunks(), max_periods=max_periods)
+    data['max_periods'] = max_periods
+    data['generated_at'] = timezone.now().isoformat()
+
+    report = AnalyticsReport.objects.filter(report_type=REPORT_TYPE).order_by('-updated_at').first()
+    if report is None:
+        report = AnalyticsReport(report_type=REPORT_TYPE)
+    report.title = 'Subscriber cohort retention'
+    report.description = (
+        'Share of each monthly signup cohort that opened its Nth newsletter '
+        f'(first {max_periods} newsletters after signup)'
+    )
+    report.data = data
+    report.save()
+    return report
+
+
+def get_cohort_report():
+    """
+    Latest stored cohort report. When there is none yet, queue its build on
+    Celery (at most once per BUILD_QUEUED_TIMEOUT) and return None.
+    """
+    from reports.models import AnalyticsReport
+
+    report = AnalyticsReport.objects.filter(report_type=REPORT_TYPE).order_by('-updated_at').first()
+    if report is None and cache.add(BUILD_QUEUED_KEY, 1, timeout=BUILD_QUEUED_TIMEOUT):
+        from .tasks import build_cohort_retention
+        build_cohort_retention.delay()
+    return report
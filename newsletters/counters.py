@@ -0,0 +1,187 @@
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+import redis
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Least
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from .cache import invalidate_stats
+
+logger = logging.getLogger(__name__)
+
+COUNTER_KEY = 'newsletters:counters:{}'
+DIRTY_KEY = 'newsletters:counters:dirty'
+
+COUNTER_FIELDS = (
+    'total_sent', 'total_delivered', 'total_bounced',
+    'total_opened', 'total_clicked', 'total_unsubscribed',
+)
+
+
+def rate_expression(numerator, numerator_delta, denominator, denominator_delta=0):
+    """SQL expression for (num + delta) / (den + delta) * 100, 0 when the denominator is 0"""
+    base = F(denominator) + denominator_delta
+    return Case(
+        When(GreaterThan(base, 0), then=Cast(F(numerator) + numerator_delta, FloatField()) * 100.0 / base),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def send_state(send):
+    """Metric flags for a send's current in-memory state"""
+    from .models import NewsletterAnalytics
+
+    return NewsletterAnalytics.send_metric_flags(
+        send.status, send.delivered_at, send.opened_at, send.clicked_at
+    )
+
+
+class CounterBatch:
+    """
+    Per-newsletter analytics deltas collected while a batch of send or
+    tracking events is applied, then published to Redis counter hashes.
+    The hashes are folded into NewsletterAnalytics by materialize_counters.
+    """
+
+    def __init__(self):
+        self.deltas = defaultdict(Counter)
+        self.open_times = {}
+
+    def add(self, newsletter_id, **deltas):
+        self.deltas[newsletter_id].update(deltas)
+
+    def add_transition(self, newsletter_id, before, after):
+        """Record the counter changes of a send moving between two metric states"""
+        self.add(newsletter_id, **{
+            field: int(after[field]) - int(before[field]) for field in after
+        })
+
+    def add_open_time(self, newsletter_id, opened_at):
+        first, last = self.open_times.get(newsletter_id, (opened_at, opened_at))
+        self.open_times[newsletter_id] = (min(first, opened_at), max(last, opened_at))
+
+    def publish(self):
+        """Push the deltas to Redis once the surrounding transaction commits"""
+        transaction.on_commit(self.publish_now)
+
+    def publish_now(self):
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for newsletter_id, deltas in self.deltas.items():
+                key = COUNTER_KEY.format(newsletter_id)
+                for field, delta in deltas.items():
+                    if delta:
+                        pipe.hincrby(key, field, delta)
+                if newsletter_id in self.open_times:
+                    first, last = self.open_times[newsletter_id]
+                    pipe.hsetnx(key, 'first_open_at', first.timestamp())
+                    pipe.hset(key, 'last_open_at', last.timestamp())
+                pipe.sadd(DIRTY_KEY, newsletter_id)
+            pipe.execute()
+            if self.deltas:
+                invalidate_stats()
+        except redis.RedisError as e:
+            # The nightly recompute_analytics run reconciles anything lost here
+            logger.error(f"Failed to publish analytics counters: {str(e)}")
+
+
+def get_redis():
+    """Counters share the tracking buffer's Redis connection"""
+    from .tracking import get_redis
+    return get_redis()
+
+
+def drain_counters(limit):
+    """Pop up to `limit` dirty newsletters and atomically take their counter hashes"""
+    client = get_redis()
+    newsletter_ids = [int(newsletter_id) for newsletter_id in client.spop(DIRTY_KEY, limit) or []]
+    if not newsletter_ids:
+        return {}
+
+    pipe = client.pipeline(transaction=True)
+    for newsletter_id in newsletter_ids:
+        pipe.hgetall(COUNTER_KEY.format(newsletter_id))
+        pipe.delete(COUNTER_KEY.format(newsletter_id))
+    results = pipe.execute()
+
+    drained = {}
+    for newsletter_id, values in zip(newsletter_ids, results[::2]):
+        if values:
+            drained[newsletter_id] = {key.decode(): float(value) for key, value in values.items()}
+    return drained
+
+
+def restore_counters(drained):
+    """Put drained counters back after a failed materialization"""
+    batch = CounterBatch()
+    for newsletter_id, values in drained.items():
+        batch.add(newsletter_id, **{field: int(values.get(field, 0)) for field in COUNTER_FIELDS})
+        if 'last_open_at' in values:
+            batch.open_times[newsletter_id] = tuple(
+                datetime.fromtimestamp(values.get(key, values['last_open_at']), tz=dt_timezone.utc)
+                for key in ('first_open_at', 'last_open_at')
+            )
+    batch.publish_now()
+
+
+def materialize_counters(limit=1000):
+    """
+    Fold pending counter deltas into NewsletterAnalytics with one bulk_update,
+    so keeping analytics current costs O(events) rather than O(sends)
+    """
+    from .models import NewsletterAnalytics
+
+    drained = drain_counters(limit)
+    if not drained:
+        return 0
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            NewsletterAnalytics.objects.bulk_create(
+                [NewsletterAnalytics(newsletter_id=newsletter_id) for newsletter_id in drained],
+                ignore_conflicts=True,
+            )
+            rows = list(
+                NewsletterAnalytics.objects.select_for_update()
+                .filter(newsletter_id__in=list(drained))
+                .order_by('id')
+                .only('id', 'newsletter_id')
+            )
+            for row in rows:
+                values = drained[row.newsletter_id]
+                delta = {field: int(values.get(field, 0)) for field in COUNTER_FIELDS}
+                for field in COUNTER_FIELDS:
+                    setattr(row, field, F(field) + delta[field])
+                sent = delta['total_sent']
+                row.delivery_rate = rate_expression('total_delivered', delta['total_delivered'], 'total_sent', sent)
+                row.open_rate = rate_expression('total_opened', delta['total_opened'], 'total_sent', sent)
+                row.click_rate = rate_expression('total_clicked', delta['total_clicked'], 'total_sent', sent)
+                row.unsubscribe_rate = rate_expression(
+                    'total_unsubscribed', delta['total_unsubscribed'], 'total_sent', sent
+                )
+                if 'last_open_at' in values:
+                    first = Value(datetime.fromtimestamp(
+                        values.get('first_open_at', values['last_open_at']), tz=dt_timezone.utc
+                    ))
+                    last = Value(datetime.fromtimestamp(values['last_open_at'], tz=dt_timezone.utc))
+                    row.first_open_at = Least(Coalesce(F('first_open_at'), first), first)
+                    row.last_open_at = Greatest(Coalesce(F('last_open_at'), last), last)
+                else:
+                    row.first_open_at = F('first_open_at')
+                    row.last_open_at = F('last_open_at')
+                row.updated_at = now
+
+            NewsletterAnalytics.objects.bulk_update(rows, [
+                *COUNTER_FIELDS, 'delivery_rate', 'open_rate', 'click_rate', 'unsubscribe_rate',
+                'first_open_at', 'last_open_at', 'updated_at',
+            ])
+    except Exception:
+        restore_counters(drained)
+        raise
+    return len(rows)
@@ -0,0 +1,93 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+EVENT_TABLE = 'newsletters_newsletterevent'
+PARTITION_PREFIX = f'{EVENT_TABLE}_p'
+
+
+def is_partitioned():
+    """Event partitioning is only available on PostgreSQL"""
+    return connection.vendor == 'postgresql'
+
+
+def partition_name(day):
+    return f'{PARTITION_PREFIX}{day:%Y%m%d}'
+
+
+def create_event_partition(cursor, day):
+    """Create the partition holding events for one UTC day, if missing"""
+    next_day = day + timedelta(days=1)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF {EVENT_TABLE} "
+        f"FOR VALUES FROM ('{day.isoformat()} 00:00:00+00') TO ('{next_day.isoformat()} 00:00:00+00')"
+    )
+
+
+def list_event_partitions(cursor):
+    """Return {day: table_name} for all daily partitions"""
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+        JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+        WHERE parent.relname = %s
+        """,
+        [EVENT_TABLE],
+    )
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        if not name.startswith(PARTITION_PREFIX):
+            continue
+        try:
+            partitions[datetime.strptime(name[len(PARTITION_PREFIX):], '%Y%m%d').date()] = name
+        except ValueError:
+            continue
+    return partitions
+
+
+def ensure_event_partitions(days_ahead=7, today=None):
+    """Create partitions for today and the next ``days_ahead`` days"""
+    if not is_partitioned():
+        return []
+    today = today or timezone.now().date()
+    days = [today + timedelta(days=offset) for offset in range(days_ahead + 1)]
+    with connection.cursor() as cursor:
+        existing = list_event_partitions(cursor)
+        created = [day for day in days if day not in existing]
+        for day in created:
+            create_event_partition(cursor, day)
+    return created
+
+
+def drop_expired_event_partitions(retention_days, today=None):
+    """
+    Drop daily partitions older than the retention window. Dropping a
+    partition is a metadata operation, unlike a DELETE over the same rows.
+    """
+    if not is_partitioned():
+        return []
+    cutoff = (today or timezone.now().date()) - timedelta(days=retention_days)
+    with connection.cursor() as cursor:
+        expired = sorted(
+            (day, name) for day, name in list_event_partitions(cursor).items() if day < cutoff
+        )
+        for day, name in expired:
+            cursor.execute(f'DROP TABLE IF EXISTS {name}')
+            logger.info(f"Dropped newsletter event partition {name}")
+    return [day for day, _ in expired]
+
+
+def log_events(events, batch_size=1000):
+    """Append NewsletterEvent instances to the log with bulk inserts"""
+    from .models import NewsletterEvent
+
+    if not events:
+        return 0
+    NewsletterEvent.objects.bulk_create(events, batch_size=batch_size)
+    return len(events)
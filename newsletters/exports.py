@@ -0,0 +1,139 @@
+import csv
+import json
+import zlib
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+SEND_FIELDS = [
+    'id', 'newsletter_id', 'subscriber_id', 'subscriber__email', 'status', 'message_id',
+    'sent_at', 'delivered_at', 'opened_at', 'clicked_at', 'open_count', 'click_count', 'created_at',
+]
+EVENT_FIELDS = ['id', 'event_type', 'occurred_at', 'newsletter_id', 'subscriber_id', 'send_id', 'metadata']
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Lines are joined into chunks of about this many bytes before being sent
+FLUSH_BYTES = 64 * 1024
+
+
+def parse_export_bound(value):
+    """Parse an ISO date or datetime into an aware datetime (None if empty)"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_newsletter_id(value):
+    """Parse the newsletter filter into a positive int (None if empty)"""
+    if not value:
+        return None
+    newsletter_id = int(value)
+    if newsletter_id < 1:
+        raise ValueError(value)
+    return newsletter_id
+
+
+class Echo:
+    """File-like object whose write() returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def export_sends(queryset, newsletter_id=None, start=None, end=None):
+    """Send rows for an export, filtered by newsletter and creation time"""
+    if newsletter_id:
+        queryset = queryset.filter(newsletter_id=newsletter_id)
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__lt=end)
+    return queryset.order_by('id').values_list(*SEND_FIELDS), SEND_FIELDS
+
+
+def export_events(queryset, newsletter_id=None, start=None, end=None):
+    """Event log rows for an export, filtered by newsletter and event time"""
+    if newsletter_id:
+        queryset = queryset.filter(newsletter_id=newsletter_id)
+    if start:
+        queryset = queryset.filter(occurred_at__gte=start)
+    if end:
+        queryset = queryset.filter(occurred_at__lt=end)
+    return queryset.order_by('occurred_at', 'id').values_list(*EVENT_FIELDS), EVENT_FIELDS
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow([field.replace('__', '_') for field in fields])
+    for row in rows:
+        yield writer.writerow(
+            [json.dumps(value) if isinstance(value, dict) else value for value in row]
+        )
+
+
+def jsonl_lines(rows, fields):
+    keys = [field.replace('__', '_') for field in fields]
+    for row in rows:
+        yield json.dumps(dict(zip(keys, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_export(queryset, fields, export_format='csv', compress=False, chunk_size=2000):
+    """
+    Yield the encoded export in ~64 KB chunks. Rows come from a server-side
+    cursor (QuerySet.iterator), so memory use does not depend on the row count.
+    """
+    lines = csv_lines if export_format == 'csv' else jsonl_lines
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+
+    def encode(chunk, final=False):
+        if compressor is None:
+            return chunk
+        # Sync-flush each chunk so compressed bytes reach the client as they are produced
+        return compressor.compress(chunk) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+    buffer = []
+    size = 0
+    first = True
+    for line in lines(queryset.iterator(chunk_size=chunk_size), fields):
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        # The first line goes out on its own so the response starts immediately
+        if first or size >= FLUSH_BYTES:
+            yield encode(b''.join(buffer))
+            buffer, size, first = [], 0, False
+
+    chunk = encode(b''.join(buffer), final=True)
+    if chunk:
+        yield chunk
+
+
+async def aiter_export(chunks):
+    """
+    Async iterator over stream_export() chunks for ASGI servers. Django
+    collects a sync iterator into memory before an ASGI response starts, so
+    each chunk is produced through sync_to_async instead; thread_sensitive
+    keeps the server-side cursor on one thread and connection.
+    """
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    try:
+        while (chunk := await next_chunk(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
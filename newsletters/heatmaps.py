@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+
+HEATMAP_KINDS = ('open', 'click')
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def empty_matrix():
+    return np.zeros((7, 24), dtype=np.int64)
+
+
+def add_heatmap_hits(items):
+    """
+    Count (kind, newsletter_id, occurred_at) tracking hits into the
+    per-newsletter and overall 7x24 heatmaps with one bulk_update
+    """
+    from .models import EngagementHeatmap
+
+    deltas = defaultdict(empty_matrix)
+    for kind, newsletter_id, occurred_at in items:
+        if kind not in HEATMAP_KINDS:
+            continue
+        local = timezone.localtime(occurred_at)
+        for key in ((newsletter_id, kind), (None, kind)):
+            deltas[key][local.weekday(), local.hour] += 1
+    if not deltas:
+        return 0
+
+    with transaction.atomic():
+        EngagementHeatmap.objects.bulk_create(
+            [EngagementHeatmap(newsletter_id=newsletter_id, kind=kind) for newsletter_id, kind in deltas],
+            ignore_conflicts=True,
+        )
+        newsletter_ids = {newsletter_id for newsletter_id, _ in deltas if newsletter_id is not None}
+        rows = list(
+            EngagementHeatmap.objects.select_for_update()
+            .filter(kind__in={kind for _, kind in deltas})
+            .filter(Q(newsletter__isnull=True) | Q(newsletter_id__in=newsletter_ids))
+            .order_by('id')
+        )
+        now = timezone.now()
+        changed = []
+        for row in rows:
+            delta = deltas.get((row.newsletter_id, row.kind))
+            if delta is None:
+                continue
+            row.counts = (as_matrix(row.counts) + delta).tolist()
+            row.updated_at = now
+            changed.append(row)
+        EngagementHeatmap.objects.bulk_update(changed, ['counts', 'updated_at'])
+    return len(changed)
+
+
+def as_matrix(counts):
+    return np.array(counts, dtype=np.int64).reshape(7, 24) if counts else empty_matrix()
+
+
+def engagement_heatmap(newsletter_ids=None):
+    """
+    Opens and clicks by weekday x hour, overall when ``newsletter_ids`` is
+    None, otherwise summed over those newsletters
+    """
+    from .models import EngagementHeatmap
+
+    rows = EngagementHeatmap.objects.all()
+    if newsletter_ids is None:
+        rows = rows.filter(newsletter__isnull=True)
+    else:
+        rows = rows.filter(newsletter_id__in=newsletter_ids)
+
+    matrices = {kind: empty_matrix() for kind in HEATMAP_KINDS}
+    for kind, counts in rows.values_list('kind', 'counts'):
+        matrices[kind] += as_matrix(counts)
+    return {
+        'weekdays': WEEKDAYS,
+        'hours': list(range(24)),
+        'opens': matrices['open'].tolist(),
+        'clicks': matrices['click'].tolist(),
+    }
+
+
+def rebuild_heatmaps():
+    """Recompute every heatmap from the event log with one grouped query"""
+    from .models import EngagementHeatmap, NewsletterEvent
+
+    matrices = defaultdict(empty_matrix)
+    rows = (
+        NewsletterEvent.objects.filter(event_type__in=HEATMAP_KINDS)
+        .annotate(weekday=ExtractIsoWeekDay('occurred_at'), hour=ExtractHour('occurred_at'))
+        .order_by()
+        .values_list('newsletter_id', 'event_type', 'weekday', 'hour')
+        .annotate(hits=Count('id'))
+    )
+    for newsletter_id, kind, weekday, hour, hits in rows:
+        matrices[(newsletter_id, kind)][weekday - 1, hour] += hits
+        matrices[(None, kind)][weekday - 1, hour] += hits
+
+    with transaction.atomic():
+        EngagementHeatmap.objects.all().delete()
+        EngagementHeatmap.objects.bulk_create(
+            [
+                EngagementHeatmap(newsletter_id=newsletter_id, kind=kind, counts=matrix.tolist())
+                for (newsletter_id, kind), matrix in matrices.items()
+            ],
+            batch_size=1000,
+        )
+    return len(matrices)
@@ -0,0 +1,181 @@
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse, HttpResponseRedirect
+from django.test import RequestFactory
+
+from newsletters.tracking import build_click_url, build_tracking_url, record_event, verify_click_target
+from newsletters.views import TRACKING_PIXEL, track_click, track_open
+
+
+# The tracking views as they were before they became async, kept here as the
+# baseline for --in-process runs
+def sync_track_open(request, tracking_id):
+    record_event('open', tracking_id)
+    response = HttpResponse(TRACKING_PIXEL, content_type='image/gif')
+    response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+    return response
+
+
+def sync_track_click(request, tracking_id):
+    target_url = request.GET.get('url')
+    if not verify_click_target(target_url, request.GET.get('sig')):
+        return HttpResponseRedirect(settings.SITE_URL)
+    record_event('click', tracking_id)
+    return HttpResponseRedirect(target_url)
+
+
+SYNC_VIEWS = {'open': sync_track_open, 'click': sync_track_click}
+ASYNC_VIEWS = {'open': track_open, 'click': track_click}
+
+
+async def fetch(host, port, path):
+    """Issue one GET and return (status_code, latency_seconds)"""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    return int(status_line.split()[1]), time.perf_counter() - started
+
+
+async def run_http_load(base_url, paths, concurrency):
+    """Fire all requests at a server with at most `concurrency` in flight"""
+    parts = urlsplit(base_url)
+
+    async def call(path):
+        return await fetch(parts.hostname, parts.port or 80, path)
+    return await run_async_load(call, paths, concurrency, (OSError, ValueError, IndexError))
+
+
+async def run_async_load(call, items, concurrency, errors_caught=()):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def worker(item):
+        nonlocal errors
+        async with semaphore:
+            try:
+                status, latency = await call(item)
+            except errors_caught:
+                errors += 1
+                return
+            if status >= 400:
+                errors += 1
+            else:
+                latencies.append(latency)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(item) for item in items))
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_threaded_load(call, items, concurrency):
+    """Run a sync callable from a thread pool, like a threaded WSGI worker"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, items))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for status, latency in results if status < 400]
+    return latencies, len(results) - len(latencies), elapsed
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = """
+    Benchmark the open-pixel / click-redirect endpoints (Redis must be running).
+
+    Against servers: start the project under both, e.g.
+        gunicorn config.wsgi:application -w 4 -b 127.0.0.1:8001
+        uvicorn config.asgi:application --workers 4 --port 8002
+    and run  manage.py benchmark_tracking --wsgi http://127.0.0.1:8001 --asgi http://127.0.0.1:8002
+
+    In-process: --in-process compares the async views against the sync views
+    they replaced, without an HTTP server in front. Click requests carry a
+    valid signature, so every request buffers an event.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', help='Base URL of the WSGI (gunicorn) server')
+        parser.add_argument('--asgi', help='Base URL of the ASGI (uvicorn) server')
+        parser.add_argument('--in-process', action='store_true', help='Compare the sync and async views in-process')
+        parser.add_argument('--endpoint', choices=['open', 'click'], default='open')
+        parser.add_argument('--target', default=settings.SITE_URL, help='Redirect target signed into click links')
+        parser.add_argument('--requests', type=int, default=10000)
+        parser.add_argument('--concurrency', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=32, help='Thread pool size for the in-process sync run')
+
+    def handle(self, *args, **options):
+        targets = [(label, options[label.lower()]) for label in ('WSGI', 'ASGI') if options[label.lower()]]
+        if not targets and not options['in_process']:
+            raise CommandError('pass --wsgi and/or --asgi, or --in-process')
+
+        endpoint = options['endpoint']
+        tracking_ids = [str(uuid.uuid4()) for _ in range(options['requests'])]
+        paths = [self.build_path(endpoint, tracking_id, options['target']) for tracking_id in tracking_ids]
+        self.stdout.write(
+            f"Benchmarking {endpoint} tracking: {len(paths)} requests, concurrency {options['concurrency']}"
+        )
+
+        for label, url in targets:
+            self.report(f"{label} ({url})", *asyncio.run(run_http_load(url, paths, options['concurrency'])))
+
+        if options['in_process']:
+            factory = RequestFactory()
+            requests = [(factory.get(path), tracking_id) for path, tracking_id in zip(paths, tracking_ids)]
+            sync_view, async_view = SYNC_VIEWS[endpoint], ASYNC_VIEWS[endpoint]
+
+            def call_sync(item):
+                started = time.perf_counter()
+                response = sync_view(*item)
+                return response.status_code, time.perf_counter() - started
+
+            async def call_async(item):
+                started = time.perf_counter()
+                response = await async_view(*item)
+                return response.status_code, time.perf_counter() - started
+
+            self.report(
+                f"sync views, {options['threads']} threads",
+                *run_threaded_load(call_sync, requests, options['threads']),
+            )
+            self.report(
+                'async views, one event loop',
+                *asyncio.run(run_async_load(call_async, requests, options['concurrency'])),
+            )
+
+    def build_path(self, endpoint, tracking_id, target):
+        if endpoint == 'open':
+            url = build_tracking_url('track_open', tracking_id)
+        else:
+            url = build_click_url(tracking_id, target)
+        parts = urlsplit(url)
+        return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+    def report(self, label, latencies, errors, elapsed):
+        self.stdout.write(f"\n{label}")
+        self.stdout.write(f"  requests:     {len(latencies)} ok, {errors} errors in {elapsed:.2f}s")
+        self.stdout.write(f"  throughput:   {len(latencies) / elapsed if elapsed else 0:.0f} req/s")
+        if latencies:
+            self.stdout.write(f"  latency mean: {statistics.mean(latencies) * 1000:.1f} ms")
+            for pct in (50, 95, 99):
+                self.stdout.write(f"  latency p{pct}:  {percentile(latencies, pct) * 1000:.1f} ms")
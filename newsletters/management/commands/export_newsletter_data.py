@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from newsletters.exports import EXPORT_FORMATS, export_events, export_sends, parse_export_bound, stream_export
+from newsletters.models import NewsletterEvent, NewsletterSend
+
+EXPORTS = {
+    'sends': (export_sends, NewsletterSend.objects.all),
+    'events': (export_events, NewsletterEvent.objects.all),
+}
+
+
+class Command(BaseCommand):
+    help = "Stream newsletter sends or engagement events to a CSV/JSONL file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS))
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+        parser.add_argument('--newsletter', type=int, help='Only export this newsletter id')
+        parser.add_argument('--start', help='ISO date/datetime, inclusive')
+        parser.add_argument('--end', help='ISO date/datetime, exclusive')
+        parser.add_argument('--output', '-o', default='-', help="Output path, '-' for stdout")
+
+    def handle(self, *args, **options):
+        try:
+            start = parse_export_bound(options['start'])
+            end = parse_export_bound(options['end'])
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        build_rows, queryset = EXPORTS[options['kind']]
+        rows, fields = build_rows(queryset(), options['newsletter'], start, end)
+        chunks = stream_export(rows, fields, options['export_format'], options['gzip'])
+
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            written = 0
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+        if options['output'] != '-':
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
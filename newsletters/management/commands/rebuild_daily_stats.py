@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from newsletters.rollups import backfill_daily_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily newsletter and subscriber rollups over a range of days"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Number of trailing days to rebuild (default: all history)')
+        parser.add_argument('--chunk-days', type=int, default=7, help='Days rebuilt per transaction')
+        parser.add_argument(
+            '--events-only', action='store_true',
+            help='Do not fill newsletter-days missing from the event log in from send timestamps',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start_day = today - timedelta(days=options['days'] - 1) if options['days'] else None
+
+        result = backfill_daily_rollups(
+            start_day, today, chunk_days=options['chunk_days'], include_sends=not options['events_only']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {result['newsletter_rows']} newsletter rows and {result['subscriber_rows']} subscriber rows"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from newsletters.heatmaps import rebuild_heatmaps
+
+
+class Command(BaseCommand):
+    help = "Rebuild the weekday x hour open/click heatmaps from the event log"
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_heatmaps()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} engagement heatmaps"))
@@ -0,0 +1,36 @@
+import itertools
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from newsletters.models import DailyEngagementSketch, NewsletterEngagementSketch, NewsletterEvent
+from newsletters.sketches import SKETCH_KINDS, add_engagement
+
+
+class Command(BaseCommand):
+    help = "Rebuild the unique-reach HyperLogLog sketches from the newsletter event log"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=100000, help='Events merged per transaction')
+
+    def handle(self, *args, **options):
+        DailyEngagementSketch.objects.all().delete()
+        NewsletterEngagementSketch.objects.all().delete()
+
+        events = (
+            NewsletterEvent.objects.filter(event_type__in=SKETCH_KINDS)
+            .order_by()
+            .values_list('event_type', 'newsletter_id', 'subscriber_id', 'occurred_at')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        total = 0
+        while True:
+            chunk = list(itertools.islice(events, options['chunk_size']))
+            if not chunk:
+                break
+            with transaction.atomic():
+                add_engagement(chunk)
+            total += len(chunk)
+            self.stdout.write(f"Merged {total} events")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sketches from {total} events"))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from newsletters.models import Newsletter, NewsletterAnalytics, NewsletterSend
+from newsletters.sketches import TDigest
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-newsletter time-to-open t-digests and percentile fields from sends"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--newsletter', type=int, action='append', dest='newsletter_ids',
+                            help='Only rebuild these newsletter ids (repeatable)')
+
+    def handle(self, *args, **options):
+        newsletters = Newsletter.objects.order_by('id')
+        if options['newsletter_ids']:
+            newsletters = newsletters.filter(id__in=options['newsletter_ids'])
+
+        rebuilt = 0
+        for newsletter_id in newsletters.values_list('id', flat=True).iterator():
+            digest = TDigest()
+            durations = (
+                NewsletterSend.objects.filter(
+                    newsletter_id=newsletter_id, opened_at__isnull=False, sent_at__isnull=False
+                )
+                .values_list('sent_at', 'opened_at')
+                .iterator(chunk_size=10000)
+            )
+            batch = []
+            for sent_at, opened_at in durations:
+                batch.append(max((opened_at - sent_at).total_seconds() / 3600, 0.0))
+                if len(batch) >= 10000:
+                    digest.add(batch)
+                    batch = []
+            digest.add(batch)
+
+            with transaction.atomic():
+                analytics, _ = NewsletterAnalytics.objects.select_for_update().get_or_create(
+                    newsletter_id=newsletter_id
+                )
+                analytics.time_to_open_digest = digest.to_bytes()
+                analytics.average_time_to_open = digest.mean()
+                analytics.median_time_to_open = digest.quantile(0.5)
+                analytics.p90_time_to_open = digest.quantile(0.9)
+                analytics.save(update_fields=[
+                    'time_to_open_digest', 'average_time_to_open', 'median_time_to_open', 'p90_time_to_open',
+                ])
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt time-to-open digests for {rebuilt} newsletters"))
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from newsletters.models import Newsletter, NewsletterAnalytics, NewsletterSend
+
+
+def recompute_chunk(newsletter_ids):
+    """
+    Recompute analytics for a chunk of newsletters: one grouped aggregate
+    over their sends, one insert for missing rows and one bulk_update
+    """
+    try:
+        metrics = {
+            row.pop('newsletter_id'): row
+            for row in NewsletterSend.objects.filter(newsletter_id__in=newsletter_ids)
+            .order_by()
+            .values('newsletter_id')
+            .annotate(**NewsletterAnalytics.metric_aggregates())
+        }
+
+        NewsletterAnalytics.objects.bulk_create(
+            [NewsletterAnalytics(newsletter_id=newsletter_id) for newsletter_id in newsletter_ids],
+            ignore_conflicts=True,
+        )
+        analytics = list(NewsletterAnalytics.objects.filter(newsletter_id__in=newsletter_ids))
+        for item in analytics:
+            item.apply_metrics(metrics.get(item.newsletter_id, {}))
+
+        NewsletterAnalytics.objects.bulk_update(analytics, NewsletterAnalytics.METRIC_FIELDS)
+        return len(analytics)
+    finally:
+        # Each worker thread has its own connection
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Recompute NewsletterAnalytics for every newsletter in parallel chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Newsletters per aggregate query')
+        parser.add_argument('--workers', type=int, default=4, help='Chunks processed concurrently')
+        parser.add_argument('--newsletter', type=int, action='append', dest='newsletter_ids',
+                            help='Only recompute these newsletter ids (repeatable)')
+
+    def handle(self, *args, **options):
+        newsletters = Newsletter.objects.order_by('id')
+        if options['newsletter_ids']:
+            newsletters = newsletters.filter(id__in=options['newsletter_ids'])
+        newsletter_ids = list(newsletters.values_list('id', flat=True))
+
+        chunk_size = options['chunk_size']
+        chunks = [newsletter_ids[i:i + chunk_size] for i in range(0, len(newsletter_ids), chunk_size)]
+
+        updated = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [executor.submit(recompute_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                updated += future.result()
+                self.stdout.write(f"Recomputed {updated}/{len(newsletter_ids)} newsletters")
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed analytics for {updated} newsletters"))
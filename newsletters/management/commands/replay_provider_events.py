@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from newsletters.webhooks import apply_provider_events
+
+
+class Command(BaseCommand):
+    help = "Replay a JSON file of email provider webhook events (e.g. newsletters/fixtures/webhooks/provider_events.json)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON file containing a list of provider events')
+        parser.add_argument(
+            '--async', action='store_true', dest='use_celery',
+            help='Queue the batch on Celery instead of applying it in-process',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path']) as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        events = payload.get('events') if isinstance(payload, dict) else payload
+        if not isinstance(events, list):
+            raise CommandError('Expected a list of events')
+
+        if options['use_celery']:
+            from newsletters.tasks import process_provider_events
+            task = process_provider_events.delay(events)
+            self.stdout.write(self.style.SUCCESS(f"Queued {len(events)} events as task {task.id}"))
+            return
+
+        result = apply_provider_events(events)
+        self.stdout.write(self.style.SUCCESS(
+            f"Applied {result['events']} events to {result['sends']} sends "
+            f"({result['unsubscribed']} subscribers deactivated)"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="newslettersend",
+            name="message_id",
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:55
+
+from datetime import datetime, timedelta, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The DDL is frozen here rather than imported from newsletters.events, so
+# later changes to that module cannot change what this migration does
+CREATE_PARTITIONED_TABLE_SQL = """
+CREATE TABLE newsletters_newsletterevent (
+    id bigserial NOT NULL,
+    event_type varchar(20) NOT NULL,
+    occurred_at timestamp with time zone NOT NULL,
+    newsletter_id bigint NOT NULL,
+    subscriber_id bigint NOT NULL,
+    send_id bigint NULL,
+    metadata jsonb NOT NULL,
+    PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at);
+CREATE INDEX nl_event_newsletter_time_idx ON newsletters_newsletterevent (newsletter_id, occurred_at);
+CREATE INDEX nl_event_subscriber_time_idx ON newsletters_newsletterevent (subscriber_id, occurred_at);
+CREATE TABLE newsletters_newsletterevent_default PARTITION OF newsletters_newsletterevent DEFAULT;
+"""
+
+CREATE_PARTITION_SQL = (
+    "CREATE TABLE IF NOT EXISTS newsletters_newsletterevent_p{day:%Y%m%d} PARTITION OF newsletters_newsletterevent "
+    "FOR VALUES FROM ('{day:%Y-%m-%d} 00:00:00+00') TO ('{next_day:%Y-%m-%d} 00:00:00+00')"
+)
+
+# Daily partitions created up front; the maintain_event_partitions task keeps extending them
+PARTITIONS_AHEAD = 7
+
+
+def create_event_table(apps, schema_editor):
+    """Create the event log, range-partitioned by UTC day on PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.create_model(apps.get_model("newsletters", "NewsletterEvent"))
+        return
+    schema_editor.execute(CREATE_PARTITIONED_TABLE_SQL)
+    today = datetime.now(timezone.utc).date()
+    for offset in range(PARTITIONS_AHEAD + 1):
+        day = today + timedelta(days=offset)
+        schema_editor.execute(CREATE_PARTITION_SQL.format(day=day, next_day=day + timedelta(days=1)))
+
+
+def drop_event_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.delete_model(apps.get_model("newsletters", "NewsletterEvent"))
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS newsletters_newsletterevent CASCADE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0002_newslettersend_message_id_index"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="NewsletterEvent",
+                    fields=[
+                        ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                        (
+                            "event_type",
+                            models.CharField(
+                                choices=[
+                                    ("sent", "Sent"),
+                                    ("delivered", "Delivered"),
+                                    ("open", "Open"),
+                                    ("click", "Click"),
+                                    ("bounce", "Bounce"),
+                                    ("unsubscribe", "Unsubscribe"),
+                                ],
+                                max_length=20,
+                            ),
+                        ),
+                        ("occurred_at", models.DateTimeField()),
+                        ("metadata", models.JSONField(blank=True, default=dict)),
+                        (
+                            "newsletter",
+                            models.ForeignKey(
+                                db_constraint=False,
+                                db_index=False,
+                                on_delete=django.db.models.deletion.DO_NOTHING,
+                                related_name="events",
+                                to="newsletters.newsletter",
+                            ),
+                        ),
+                        (
+                            "send",
+                            models.ForeignKey(
+                                blank=True,
+                                db_constraint=False,
+                                db_index=False,
+                                null=True,
+                                on_delete=django.db.models.deletion.DO_NOTHING,
+                                related_name="events",
+                                to="newsletters.newslettersend",
+                            ),
+                        ),
+                        (
+                            "subscriber",
+                            models.ForeignKey(
+                                db_constraint=False,
+                                db_index=False,
+                                on_delete=django.db.models.deletion.DO_NOTHING,
+                                related_name="events",
+                                to="newsletters.subscriber",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "ordering": ["-occurred_at"],
+                        "indexes": [
+                            models.Index(
+                                fields=["newsletter", "occurred_at"],
+                                name="nl_event_newsletter_time_idx",
+                            ),
+                            models.Index(
+                                fields=["subscriber", "occurred_at"],
+                                name="nl_event_subscriber_time_idx",
+                            ),
+                        ],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_event_table, drop_event_table),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0003_newsletterevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriberDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("new_subscribers", models.IntegerField(default=0)),
+                ("unsubscribes", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["-date"],
+            },
+        ),
+        migrations.CreateModel(
+            name="NewsletterDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("sends", models.IntegerField(default=0)),
+                ("deliveries", models.IntegerField(default=0)),
+                ("opens", models.IntegerField(default=0)),
+                ("unique_opens", models.IntegerField(default=0)),
+                ("clicks", models.IntegerField(default=0)),
+                ("unique_clicks", models.IntegerField(default=0)),
+                ("bounces", models.IntegerField(default=0)),
+                ("unsubscribes", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "newsletter",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="newsletters.newsletter",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "indexes": [
+                    models.Index(fields=["date"], name="nl_daily_stats_date_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("newsletter", "date"),
+                        name="nl_daily_stats_newsletter_date_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0004_daily_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subscriber",
+            index=models.Index(
+                fields=["subscribed_at"], name="nl_subscriber_subscribed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subscriber",
+            index=models.Index(
+                fields=["unsubscribed_at"], name="nl_subscriber_unsubscribed_idx"
+            ),
+        ),
+    ]
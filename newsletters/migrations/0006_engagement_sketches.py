@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0005_subscriber_date_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyEngagementSketch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("open", "Open"), ("click", "Click")], max_length=10
+                    ),
+                ),
+                ("registers", models.BinaryField(default=bytes)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["-date"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "kind"), name="nl_daily_sketch_date_kind_uniq"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="NewsletterEngagementSketch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("open", "Open"), ("click", "Click")], max_length=10
+                    ),
+                ),
+                ("registers", models.BinaryField(default=bytes)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "newsletter",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="engagement_sketches",
+                        to="newsletters.newsletter",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("newsletter", "kind"),
+                        name="nl_newsletter_sketch_kind_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0006_engagement_sketches"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subscriber",
+            name="engagement_score",
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddIndex(
+            model_name="subscriber",
+            index=models.Index(
+                fields=["is_active", "engagement_score"],
+                name="nl_subscriber_engagement_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0007_subscriber_engagement_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsletteranalytics",
+            name="median_time_to_open",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="newsletteranalytics",
+            name="p90_time_to_open",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="newsletteranalytics",
+            name="time_to_open_digest",
+            field=models.BinaryField(default=bytes),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0008_time_to_open_percentiles"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EngagementHeatmap",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("open", "Open"), ("click", "Click")], max_length=10
+                    ),
+                ),
+                ("counts", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "newsletter",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="heatmaps",
+                        to="newsletters.newsletter",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("newsletter__isnull", False)),
+                        fields=("newsletter", "kind"),
+                        name="nl_heatmap_newsletter_kind_uniq",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("newsletter__isnull", True)),
+                        fields=("kind",),
+                        name="nl_heatmap_overall_kind_uniq",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0009_engagement_heatmaps"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="newslettersend",
+            index=models.Index(fields=["created_at", "id"], name="nl_send_created_idx"),
+        ),
+    ]
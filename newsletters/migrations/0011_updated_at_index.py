@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletters", "0010_send_created_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="newsletter",
+            index=models.Index(fields=["updated_at"], name="nl_newsletter_updated_idx"),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Avg, Count, ExpressionWrapper, F, Max, Min, Q
 from django.contrib.auth.models import User
 from users.models import CustomUser
 
@@ -42,15 +43,27 @@ class Subscriber(models.Model):
     total_emails_clicked = models.IntegerField(default=0)
     last_email_sent = models.DateTimeField(null=True, blank=True)
     last_email_opened = models.DateTimeField(null=True, blank=True)
+    engagement_score = models.FloatField(default=0.0)  # 0-100, recomputed nightly
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['subscribed_at'], name='nl_subscriber_subscribed_idx'),
+            models.Index(fields=['unsubscribed_at'], name='nl_subscriber_unsubscribed_idx'),
+            models.Index(fields=['is_active', 'engagement_score'], name='nl_subscriber_engagement_idx'),
+        ]
 
     def __str__(self):
         return self.email
 
     @property
     def full_name(self):
-        if self.first_name and self.last_name:
-            return f"{self.first_name} {self.last_name}"
-        return self.email
+        return self.format_full_name(self.first_name, self.last_name, self.email)
+
+    @staticmethod
+    def format_full_name(first_name, last_name, email):
+        if first_name and last_name:
+            return f"{first_name} {last_name}"
+        return email
 
 class Newsletter(models.Model):
     """Newsletter content and metadata"""
@@ -96,6 +109,9 @@ class Newsletter(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='nl_newsletter_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -130,7 +146,7 @@ class NewsletterSend(models.Model):
     clicked_at = models.DateTimeField(null=True, blank=True)
     
     # Email provider data
-    message_id = models.CharField(max_length=255, blank=True)
+    message_id = models.CharField(max_length=255, blank=True, db_index=True)
     provider_response = models.TextField(blank=True)
     
     # Analytics
@@ -143,6 +159,9 @@ class NewsletterSend(models.Model):
     class Meta:
         unique_together = ['newsletter', 'subscriber']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='nl_send_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.newsletter.title} -> {self.subscriber.email}"
@@ -171,28 +190,230 @@ class NewsletterAnalytics(models.Model):
     first_open_at = models.DateTimeField(null=True, blank=True)
     last_open_at = models.DateTimeField(null=True, blank=True)
     average_time_to_open = models.FloatField(null=True, blank=True)  # in hours
+    median_time_to_open = models.FloatField(null=True, blank=True)  # in hours
+    p90_time_to_open = models.FloatField(null=True, blank=True)  # in hours
+    time_to_open_digest = models.BinaryField(default=bytes, editable=False)  # t-digest, see newsletters.sketches
     
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Fields written by apply_metrics; the percentiles and digest are maintained separately
+    METRIC_FIELDS = [
+        'total_sent', 'total_delivered', 'total_bounced', 'total_opened', 'total_clicked',
+        'total_unsubscribed', 'delivery_rate', 'open_rate', 'click_rate', 'unsubscribe_rate',
+        'first_open_at', 'last_open_at', 'average_time_to_open',
+    ]
+
     def __str__(self):
         return f"Analytics for {self.newsletter.title}"
 
-    def update_metrics(self):
-        """Update all metrics based on NewsletterSend records"""
-        sends = self.newsletter.sends.all()
-        
-        self.total_sent = sends.count()
-        self.total_delivered = sends.filter(status__in=['delivered', 'opened', 'clicked']).count()
-        self.total_bounced = sends.filter(status='bounced').count()
-        self.total_opened = sends.filter(status__in=['opened', 'clicked']).count()
-        self.total_clicked = sends.filter(status='clicked').count()
-        self.total_unsubscribed = sends.filter(status='unsubscribed').count()
-        
+    @staticmethod
+    def metric_aggregates():
+        """
+        Aggregates over NewsletterSend computing every metric in one pass.
+        Engagement is counted from timestamps as well as status, because the
+        status is overwritten by later transitions (e.g. opened -> unsubscribed).
+        """
+        opened = Q(status__in=['opened', 'clicked']) | Q(opened_at__isnull=False)
+        clicked = Q(status='clicked') | Q(clicked_at__isnull=False)
+        delivered = Q(status='delivered') | Q(delivered_at__isnull=False) | opened
+        return {
+            'total_sent': Count('id'),
+            'total_delivered': Count('id', filter=delivered),
+            'total_bounced': Count('id', filter=Q(status='bounced')),
+            'total_opened': Count('id', filter=opened),
+            'total_clicked': Count('id', filter=clicked),
+            'total_unsubscribed': Count('id', filter=Q(status='unsubscribed')),
+            'first_open_at': Min('opened_at'),
+            'last_open_at': Max('opened_at'),
+            'average_time_to_open': Avg(
+                ExpressionWrapper(F('opened_at') - F('sent_at'), output_field=models.DurationField()),
+                filter=Q(opened_at__isnull=False, sent_at__isnull=False),
+            ),
+        }
+
+    @staticmethod
+    def send_metric_flags(status, delivered_at=None, opened_at=None, clicked_at=None):
+        """
+        Which counters of metric_aggregates a single send contributes to.
+        Used to turn send state transitions into incremental counter deltas.
+        """
+        opened = status in ('opened', 'clicked') or opened_at is not None
+        return {
+            'total_delivered': status == 'delivered' or delivered_at is not None or opened,
+            'total_bounced': status == 'bounced',
+            'total_opened': opened,
+            'total_clicked': status == 'clicked' or clicked_at is not None,
+            'total_unsubscribed': status == 'unsubscribed',
+        }
+
+    def apply_metrics(self, metrics):
+        """Set counters, rates and time metrics from an aggregate row"""
+        for field in ('total_sent', 'total_delivered', 'total_bounced', 'total_opened',
+                      'total_clicked', 'total_unsubscribed'):
+            setattr(self, field, metrics.get(field) or 0)
+        self.first_open_at = metrics.get('first_open_at')
+        self.last_open_at = metrics.get('last_open_at')
+
+        time_to_open = metrics.get('average_time_to_open')
+        self.average_time_to_open = time_to_open.total_seconds() / 3600 if time_to_open is not None else None
+
         # Calculate rates
         if self.total_sent > 0:
             self.delivery_rate = (self.total_delivered / self.total_sent) * 100
             self.open_rate = (self.total_opened / self.total_sent) * 100
             self.click_rate = (self.total_clicked / self.total_sent) * 100
             self.unsubscribe_rate = (self.total_unsubscribed / self.total_sent) * 100
-        
-        self.save()
+        else:
+            self.delivery_rate = self.open_rate = self.click_rate = self.unsubscribe_rate = 0.0
+
+    def update_metrics(self):
+        """Update all metrics based on NewsletterSend records with a single aggregate query"""
+        self.apply_metrics(self.newsletter.sends.aggregate(**self.metric_aggregates()))
+        self.save(update_fields=[*self.METRIC_FIELDS, 'updated_at'])
+
+class NewsletterEvent(models.Model):
+    """Append-only log of send and engagement events.
+
+    On PostgreSQL the table is range-partitioned by day on ``occurred_at``
+    (see migration 0003 and ``newsletters.events``), so expired days are
+    dropped as whole partitions. Foreign keys are not enforced in the
+    database and deletes never cascade into the log.
+    """
+    EVENT_CHOICES = [
+        ('sent', 'Sent'),
+        ('delivered', 'Delivered'),
+        ('open', 'Open'),
+        ('click', 'Click'),
+        ('bounce', 'Bounce'),
+        ('unsubscribe', 'Unsubscribe'),
+    ]
+    id = models.BigAutoField(primary_key=True)
+    event_type = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    occurred_at = models.DateTimeField()
+
+    newsletter = models.ForeignKey(
+        Newsletter, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='events'
+    )
+    subscriber = models.ForeignKey(
+        Subscriber, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='events'
+    )
+    send = models.ForeignKey(
+        NewsletterSend, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        null=True, blank=True, related_name='events'
+    )
+    metadata = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-occurred_at']
+        indexes = [
+            models.Index(fields=['newsletter', 'occurred_at'], name='nl_event_newsletter_time_idx'),
+            models.Index(fields=['subscriber', 'occurred_at'], name='nl_event_subscriber_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.newsletter_id} -> {self.subscriber_id}"
+
+
+class NewsletterDailyStats(models.Model):
+    """Per-newsletter engagement counts for one day, rolled up from the event log"""
+    newsletter = models.ForeignKey(Newsletter, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    sends = models.IntegerField(default=0)
+    deliveries = models.IntegerField(default=0)
+    opens = models.IntegerField(default=0)
+    unique_opens = models.IntegerField(default=0)
+    clicks = models.IntegerField(default=0)
+    unique_clicks = models.IntegerField(default=0)
+    bounces = models.IntegerField(default=0)
+    unsubscribes = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['newsletter', 'date'], name='nl_daily_stats_newsletter_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='nl_daily_stats_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.newsletter_id} {self.date}"
+
+
+class SubscriberDailyStats(models.Model):
+    """New subscribers and unsubscribes for one day"""
+    date = models.DateField(unique=True)
+    new_subscribers = models.IntegerField(default=0)
+    unsubscribes = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date}"
+
+
+SKETCH_KIND_CHOICES = [
+    ('open', 'Open'),
+    ('click', 'Click'),
+]
+
+
+class DailyEngagementSketch(models.Model):
+    """HyperLogLog sketch of the subscribers who opened or clicked on one day"""
+    date = models.DateField()
+    kind = models.CharField(max_length=10, choices=SKETCH_KIND_CHOICES)
+    registers = models.BinaryField(default=bytes)  # zlib-compressed, see newsletters.sketches
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'kind'], name='nl_daily_sketch_date_kind_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.date}"
+
+
+class NewsletterEngagementSketch(models.Model):
+    """HyperLogLog sketch of the subscribers who opened or clicked one newsletter"""
+    newsletter = models.ForeignKey(Newsletter, on_delete=models.CASCADE, related_name='engagement_sketches')
+    kind = models.CharField(max_length=10, choices=SKETCH_KIND_CHOICES)
+    registers = models.BinaryField(default=bytes)  # zlib-compressed, see newsletters.sketches
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['newsletter', 'kind'], name='nl_newsletter_sketch_kind_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.newsletter_id}"
+
+
+class EngagementHeatmap(models.Model):
+    """Opens or clicks by weekday (Monday first) x hour of day, for one newsletter or overall"""
+    newsletter = models.ForeignKey(
+        Newsletter, on_delete=models.CASCADE, null=True, blank=True, related_name='heatmaps'
+    )  # null for the overall heatmap
+    kind = models.CharField(max_length=10, choices=SKETCH_KIND_CHOICES)
+    counts = models.JSONField(default=list)  # 7 rows of 24 hourly counts
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['newsletter', 'kind'], condition=models.Q(newsletter__isnull=False),
+                name='nl_heatmap_newsletter_kind_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['kind'], condition=models.Q(newsletter__isnull=True),
+                name='nl_heatmap_overall_kind_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.newsletter_id or 'overall'}"
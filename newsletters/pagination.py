@@ -0,0 +1,6 @@
+from config.pagination import KeysetPagination
+
+
+class SendCursorPagination(KeysetPagination):
+    """Keyset pages over newsletter sends"""
+    page_size = 100
@@ -0,0 +1,182 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .cache import invalidate_stats
+
+# Rollup field -> event type in the NewsletterEvent log
+EVENT_COUNTS = {
+    'sends': 'sent',
+    'deliveries': 'delivered',
+    'opens': 'open',
+    'clicks': 'click',
+    'bounces': 'bounce',
+    'unsubscribes': 'unsubscribe',
+}
+UNIQUE_COUNTS = {
+    'unique_opens': 'open',
+    'unique_clicks': 'click',
+}
+
+# Rollup fields derived from NewsletterSend state, for days the event log does
+# not cover: (timestamp that dates the row, which sends count, aggregates).
+# A send's opens and clicks all land on the day of its first open / click.
+SEND_ROLLUPS = [
+    (F('sent_at'), Q(), {'sends': Count('id')}),
+    (F('delivered_at'), Q(), {'deliveries': Count('id')}),
+    (F('opened_at'), Q(), {'opens': Sum('open_count'), 'unique_opens': Count('id')}),
+    (F('clicked_at'), Q(), {'clicks': Sum('click_count'), 'unique_clicks': Count('id')}),
+    (Coalesce('sent_at', 'created_at'), Q(status='bounced'), {'bounces': Count('id')}),
+    (F('subscriber__unsubscribed_at'), Q(status='unsubscribed'), {'unsubscribes': Count('id')}),
+]
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def send_day_counts(start, end):
+    """Per (day, newsletter_id) rollup counts derived from NewsletterSend timestamps"""
+    from .models import NewsletterSend
+
+    counts = {}
+    for timestamp, condition, aggregates in SEND_ROLLUPS:
+        rows = (
+            NewsletterSend.objects.filter(condition)
+            .annotate(at=timestamp)
+            .filter(at__gte=start, at__lt=end)
+            .annotate(day=TruncDate('at'))
+            .order_by()
+            .values('day', 'newsletter_id')
+            .annotate(**aggregates)
+        )
+        for row in rows:
+            counts.setdefault((row.pop('day'), row['newsletter_id']), {}).update(row)
+    return counts
+
+
+def rollup_newsletter_days(start_day, end_day, include_sends=False):
+    """
+    Rebuild NewsletterDailyStats for [start_day, end_day] with one grouped
+    query over the event log. With ``include_sends``, newsletter-days that have
+    no events (sends from before the log existed) are filled in from the
+    NewsletterSend timestamps instead.
+    """
+    from .models import NewsletterDailyStats, NewsletterEvent
+
+    start, end = day_start(start_day), day_start(end_day + timedelta(days=1))
+    rows = (
+        NewsletterEvent.objects.filter(occurred_at__gte=start, occurred_at__lt=end)
+        .annotate(day=TruncDate('occurred_at'))
+        .order_by()
+        .values('day', 'newsletter_id')
+        .annotate(
+            **{field: Count('id', filter=Q(event_type=event_type)) for field, event_type in EVENT_COUNTS.items()},
+            **{
+                field: Count('send_id', filter=Q(event_type=event_type), distinct=True)
+                for field, event_type in UNIQUE_COUNTS.items()
+            },
+        )
+    )
+    counts = {(row.pop('day'), row['newsletter_id']): row for row in rows}
+    if include_sends:
+        for key, row in send_day_counts(start, end).items():
+            counts.setdefault(key, row)
+    stats = [
+        NewsletterDailyStats(date=day, **row)
+        for (day, _), row in counts.items()
+    ]
+
+    with transaction.atomic():
+        NewsletterDailyStats.objects.filter(date__gte=start_day, date__lte=end_day).delete()
+        NewsletterDailyStats.objects.bulk_create(stats, batch_size=1000)
+    return len(stats)
+
+
+def rollup_subscriber_days(start_day, end_day):
+    """Rebuild SubscriberDailyStats for [start_day, end_day]"""
+    from .models import Subscriber, SubscriberDailyStats
+
+    start, end = day_start(start_day), day_start(end_day + timedelta(days=1))
+    new_subscribers = dict(
+        Subscriber.objects.filter(subscribed_at__gte=start, subscribed_at__lt=end)
+        .annotate(day=TruncDate('subscribed_at'))
+        .order_by()
+        .values('day')
+        .annotate(count=Count('id'))
+        .values_list('day', 'count')
+    )
+    unsubscribes = dict(
+        Subscriber.objects.filter(unsubscribed_at__gte=start, unsubscribed_at__lt=end)
+        .annotate(day=TruncDate('unsubscribed_at'))
+        .order_by()
+        .values('day')
+        .annotate(count=Count('id'))
+        .values_list('day', 'count')
+    )
+
+    days = [start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1)]
+    stats = [
+        SubscriberDailyStats(
+            date=day, new_subscribers=new_subscribers.get(day, 0), unsubscribes=unsubscribes.get(day, 0)
+        )
+        for day in days
+    ]
+
+    with transaction.atomic():
+        SubscriberDailyStats.objects.filter(date__gte=start_day, date__lte=end_day).delete()
+        SubscriberDailyStats.objects.bulk_create(stats, batch_size=1000)
+    return len(stats)
+
+
+def first_rollup_day():
+    """Earliest day with subscriber or send data, or None for an empty database"""
+    from .models import NewsletterSend, Subscriber
+
+    starts = [
+        Subscriber.objects.aggregate(first=Min('subscribed_at'))['first'],
+        NewsletterSend.objects.aggregate(first=Min('created_at'))['first'],
+    ]
+    starts = [start for start in starts if start is not None]
+    return timezone.localdate(min(starts)) if starts else None
+
+
+def backfill_daily_rollups(start_day=None, end_day=None, chunk_days=7, include_sends=True):
+    """
+    Rebuild both rollups over [start_day, end_day] (default: all history) in
+    chunks of ``chunk_days`` days, one transaction per chunk
+    """
+    end_day = end_day or timezone.localdate()
+    start_day = start_day or first_rollup_day() or end_day
+
+    totals = {'newsletter_rows': 0, 'subscriber_rows': 0}
+    chunk_start = start_day
+    while chunk_start <= end_day:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_day)
+        totals['newsletter_rows'] += rollup_newsletter_days(chunk_start, chunk_end, include_sends)
+        totals['subscriber_rows'] += rollup_subscriber_days(chunk_start, chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+    return totals
+
+
+def update_daily_rollups(days=2, today=None):
+    """
+    Recompute the rollups for the trailing ``days`` days, today included. The
+    first run after the tables are created backfills all history.
+    """
+    from .models import SubscriberDailyStats
+
+    end_day = today or timezone.localdate()
+    if not SubscriberDailyStats.objects.exists():
+        result = backfill_daily_rollups(end_day=end_day)
+    else:
+        start_day = end_day - timedelta(days=days - 1)
+        result = {
+            'newsletter_rows': rollup_newsletter_days(start_day, end_day),
+            'subscriber_rows': rollup_subscriber_days(start_day, end_day),
+        }
+    invalidate_stats()
+    return result
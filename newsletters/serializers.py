@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from .models import Newsletter, Subscriber, NewsletterTemplate, NewsletterSend, NewsletterAnalytics
 from users.serializers import UserSerializer
 
@@ -15,7 +16,7 @@ class SubscriberSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('subscribed_at', 'unsubscribed_at', 'total_emails_received', 
                            'total_emails_opened', 'total_emails_clicked', 'last_email_sent', 
-                           'last_email_opened')
+                           'last_email_opened', 'engagement_score')
 
 class NewsletterSendSerializer(serializers.ModelSerializer):
     subscriber_email = serializers.ReadOnlyField(source='subscriber.email')
@@ -30,7 +31,7 @@ class NewsletterSendSerializer(serializers.ModelSerializer):
 class NewsletterAnalyticsSerializer(serializers.ModelSerializer):
     class Meta:
         model = NewsletterAnalytics
-        fields = '__all__'
+        exclude = ('time_to_open_digest',)
         read_only_fields = ('updated_at',)
 
 class NewsletterSerializer(serializers.ModelSerializer):
@@ -48,6 +49,9 @@ class NewsletterSerializer(serializers.ModelSerializer):
                            'open_rate', 'click_rate', 'created_at', 'updated_at')
 
     def get_sends_count(self, obj):
+        # List querysets annotate the count; single instances fall back to a query
+        if hasattr(obj, 'sends_count'):
+            return obj.sends_count
         return obj.sends.count()
 
     def create(self, validated_data):
@@ -68,11 +72,14 @@ class NewsletterSerializer(serializers.ModelSerializer):
         return value
 
 class NewsletterDetailSerializer(NewsletterSerializer):
-    """Extended serializer for newsletter detail view with sends"""
-    sends = NewsletterSendSerializer(many=True, read_only=True)
+    """Extended serializer for newsletter detail view with a link to its paginated sends"""
+    sends_url = serializers.SerializerMethodField()
     
     class Meta(NewsletterSerializer.Meta):
-        fields = list(NewsletterSerializer.Meta.fields) + ['sends']
+        fields = '__all__'
+
+    def get_sends_url(self, obj):
+        return reverse('newsletter-sends', args=[obj.pk], request=self.context.get('request'))
 
 class NewsletterSendDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer for newsletter sends with subscriber info"""
@@ -84,16 +91,19 @@ class NewsletterSendDetailSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class SubscriberDetailSerializer(SubscriberSerializer):
-    """Extended serializer for subscriber detail with newsletter history"""
-    newsletter_sends = NewsletterSendSerializer(many=True, read_only=True)
+    """Extended serializer for subscriber detail with a link to its paginated newsletter history"""
     total_newsletters_received = serializers.SerializerMethodField()
+    sends_url = serializers.SerializerMethodField()
     
     class Meta(SubscriberSerializer.Meta):
-        fields = list(SubscriberSerializer.Meta.fields) + ['newsletter_sends', 'total_newsletters_received']
+        fields = '__all__'
 
     def get_total_newsletters_received(self, obj):
         return obj.newsletter_sends.count()
 
+    def get_sends_url(self, obj):
+        return reverse('subscriber-sends', args=[obj.pk], request=self.context.get('request'))
+
 class NewsletterStatsSerializer(serializers.Serializer):
     """Serializer for newsletter statistics"""
     total_newsletters = serializers.IntegerField()
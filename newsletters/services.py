@@ -1,29 +1,35 @@
 import os
+from email.utils import parseaddr
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
+from django.db.models import F
 from django.urls import reverse
 from django.utils import timezone
 import uuid
 
+from .tracking import build_tracking_url, make_unsubscribe_token, track_links
+
 def send_newsletter_email(newsletter, subscriber, newsletter_send):
     """
     Send a newsletter email to a subscriber
     """
+    from .models import Subscriber
+
     try:
         # Generate tracking URLs
         tracking_id = str(uuid.uuid4())
-        open_tracking_url = f"{settings.SITE_URL}/newsletters/track/open/{tracking_id}/"
-        click_tracking_url = f"{settings.SITE_URL}/newsletters/track/click/{tracking_id}/"
-        unsubscribe_url = f"{settings.SITE_URL}/newsletters/unsubscribe/{subscriber.id}/"
+        open_tracking_url = build_tracking_url('track_open', tracking_id)
+        unsubscribe_url = build_tracking_url(
+            'unsubscribe', make_unsubscribe_token(subscriber.id, tracking_id)
+        )
         
         # Prepare email context
         context = {
             'newsletter': newsletter,
             'subscriber': subscriber,
             'open_tracking_url': open_tracking_url,
-            'click_tracking_url': click_tracking_url,
             'unsubscribe_url': unsubscribe_url,
             'tracking_id': tracking_id,
         }
@@ -37,6 +43,8 @@ def send_newsletter_email(newsletter, subscriber, newsletter_send):
             # Use default template
             html_content = render_to_string('newsletters/email_template.html', context)
             text_content = render_to_string('newsletters/email_template.txt', context)
+        # Route links through the click tracker (signed, so it is not an open redirect)
+        html_content = track_links(html_content, tracking_id)
         
         # Create email
         subject = newsletter.subject
@@ -57,6 +65,11 @@ def send_newsletter_email(newsletter, subscriber, newsletter_send):
             'X-Newsletter-ID': str(newsletter.id),
             'X-Subscriber-ID': str(subscriber.id),
             'X-Tracking-ID': tracking_id,
+            # Providers echo the Message-ID in delivery/bounce webhooks
+            'Message-ID': f"<{tracking_id}@{message_id_domain(from_email)}>",
+            # RFC 8058 one-click unsubscribe
+            'List-Unsubscribe': f'<{unsubscribe_url}>',
+            'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
         }
         
         # Send email
@@ -68,10 +81,12 @@ def send_newsletter_email(newsletter, subscriber, newsletter_send):
         newsletter_send.message_id = tracking_id
         newsletter_send.save()
         
-        # Update subscriber stats
-        subscriber.total_emails_received += 1
-        subscriber.last_email_sent = timezone.now()
-        subscriber.save()
+        # Update subscriber stats. Only these two columns: the instance was
+        # read before the send started and the rest may have changed since
+        Subscriber.objects.filter(pk=subscriber.pk).update(
+            total_emails_received=F('total_emails_received') + 1,
+            last_email_sent=newsletter_send.sent_at,
+        )
         
         return True, None
         
@@ -83,6 +98,14 @@ def send_newsletter_email(newsletter, subscriber, newsletter_send):
         
         return False, str(e)
 
+def message_id_domain(from_email):
+    """
+    Domain part of the sender address, also for 'Name <user@domain>' style
+    DEFAULT_FROM_EMAIL values
+    """
+    address = parseaddr(from_email)[1]
+    return address.rpartition('@')[2] if '@' in address else 'localhost'
+
 def render_newsletter_with_template(newsletter, context):
     """
     Render newsletter content using the selected template
@@ -149,14 +172,23 @@ def send_bulk_newsletters(newsletter):
     """
     Send newsletter to all active subscribers
     """
-    from .models import Subscriber, NewsletterSend
+    from .models import Newsletter, Subscriber, NewsletterSend, NewsletterEvent
+    from .events import log_events
+    from .counters import CounterBatch, rate_expression, send_state
     
     active_subscribers = Subscriber.objects.filter(is_active=True)
     total_sent = 0
     total_failed = 0
     errors = []
+    events = []
+    counters = CounterBatch()
     
     for subscriber in active_subscribers:
+        # The list was read before the first email went out; skip anyone who
+        # has unsubscribed since (e.g. one-click from an earlier issue)
+        if not Subscriber.objects.filter(pk=subscriber.pk, is_active=True).exists():
+            continue
+
         # Create or get newsletter send record
         newsletter_send, created = NewsletterSend.objects.get_or_create(
             newsletter=newsletter,
@@ -164,19 +196,48 @@ def send_bulk_newsletters(newsletter):
             defaults={'status': 'pending'}
         )
         
+        if created:
+            counters.add(newsletter.id, total_sent=1)
+        
         if newsletter_send.status == 'pending':
+            before = send_state(newsletter_send)
             success, error = send_newsletter_email(newsletter, subscriber, newsletter_send)
+            counters.add_transition(newsletter.id, before, send_state(newsletter_send))
             
             if success:
                 total_sent += 1
             else:
                 total_failed += 1
                 errors.append(f"{subscriber.email}: {error}")
+
+            events.append(NewsletterEvent(
+                event_type='sent' if success else 'bounce',
+                occurred_at=newsletter_send.sent_at or timezone.now(),
+                newsletter=newsletter,
+                subscriber=subscriber,
+                send=newsletter_send,
+                metadata={'error': error} if error else {},
+            ))
+            if len(events) >= 1000:
+                log_events(events)
+                events = []
+                counters.publish()
+                counters = CounterBatch()
     
-    # Update newsletter stats
+    log_events(events)
+    counters.publish()
+
+    # Update newsletter stats. Only the send totals are written: opens and
+    # clicks the flusher added with F() during the send must not be
+    # overwritten, and the rates are recomputed against the new total_sent
     newsletter.total_sent = total_sent
     newsletter.total_recipients = active_subscribers.count()
-    newsletter.save()
+    newsletter.save(update_fields=['total_sent', 'total_recipients', 'updated_at'])
+    Newsletter.objects.filter(pk=newsletter.pk).update(
+        open_rate=rate_expression('total_opened', 0, 'total_sent'),
+        click_rate=rate_expression('total_clicked', 0, 'total_sent'),
+    )
+    newsletter.refresh_from_db(fields=['total_opened', 'total_clicked', 'open_rate', 'click_rate'])
     
     return {
         'total_sent': total_sent,
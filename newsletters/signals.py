@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import schedule_invalidation
+from .models import Newsletter, NewsletterSend, Subscriber
+
+
+@receiver([post_save, post_delete], sender=Newsletter)
+@receiver([post_save, post_delete], sender=NewsletterSend)
+@receiver([post_save, post_delete], sender=Subscriber)
+def invalidate_cached_stats(sender, **kwargs):
+    """
+    Drop cached dashboard stats once the change is committed. Bulk sends and
+    imports run inside cache.batched_invalidation, so they invalidate once.
+    """
+    schedule_invalidation()
@@ -29,15 +29,19 @@ def send_newsletter_task(newsletter_id):
         newsletter = Newsletter.objects.get(id=newsletter_id)
         
         # Import the service function
+        from .cache import batched_invalidation
         from .services import send_bulk_newsletters
         
-        # Send newsletters using the existing service
-        result = send_bulk_newsletters(newsletter)
-        
-        # Update newsletter status
-        newsletter.status = 'sent'
-        newsletter.sent_at = timezone.now()
-        newsletter.save()
+        # Every send and subscriber saved below would invalidate the stats
+        # cache on its own; invalidate once for the whole batch instead
+        with batched_invalidation():
+            # Send newsletters using the existing service
+            result = send_bulk_newsletters(newsletter)
+            
+            # Update newsletter status
+            newsletter.status = 'sent'
+            newsletter.sent_at = timezone.now()
+            newsletter.save(update_fields=['status', 'sent_at', 'updated_at'])
         
         logger.info(f"Newsletter {newsletter_id} sent successfully. Sent: {result['total_sent']}, Failed: {result['total_failed']}")
         return {
@@ -121,4 +125,121 @@ def send_test_email_task(email_address, newsletter_id):
         return {'status': 'error', 'message': 'Newsletter not found'}
     except Exception as e:
         logger.error(f"Error sending test email: {str(e)}")
-        return {'status': 'error', 'message': str(e)} 
\ No newline at end of file
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def flush_tracking_events():
+    """
+    Celery beat task to apply buffered open/click events in bulk
+    """
+    try:
+        from .tracking import flush_tracking_buffer
+        result = flush_tracking_buffer()
+
+        logger.info(f"Flushed {result['events']} tracking events into {result['sends']} sends")
+        return {'status': 'success', **result}
+
+    except Exception as e:
+        logger.error(f"Error in flush_tracking_events: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def maintain_event_partitions():
+    """
+    Create upcoming daily partitions of the event log and drop expired ones
+    """
+    try:
+        from .events import ensure_event_partitions, drop_expired_event_partitions
+        created = ensure_event_partitions(settings.NEWSLETTER_EVENT_PARTITIONS_AHEAD)
+        dropped = drop_expired_event_partitions(settings.NEWSLETTER_EVENT_RETENTION_DAYS)
+
+        logger.info(f"Event partitions: created {len(created)}, dropped {len(dropped)}")
+        return {'status': 'success', 'created': len(created), 'dropped': len(dropped)}
+
+    except Exception as e:
+        logger.error(f"Error in maintain_event_partitions: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task(bind=True, max_retries=5)
+def process_provider_events(self, events):
+    """
+    Apply a batch of delivery/bounce/complaint events posted by the email provider
+    """
+    try:
+        from .webhooks import apply_provider_events
+        result = apply_provider_events(events)
+
+        logger.info(f"Applied {result['events']} provider events to {result['sends']} sends")
+        return {'status': 'success', **result}
+
+    except Exception as e:
+        logger.error(f"Error processing provider events: {str(e)}")
+        raise self.retry(exc=e, countdown=30)
+
+@shared_task
+def materialize_analytics_counters():
+    """
+    Fold incremental analytics counters from Redis into NewsletterAnalytics
+    """
+    try:
+        from .counters import materialize_counters
+        updated = materialize_counters()
+
+        logger.info(f"Materialized analytics counters for {updated} newsletters")
+        return {'status': 'success', 'updated': updated}
+
+    except Exception as e:
+        logger.error(f"Error in materialize_analytics_counters: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def update_daily_stats(days=None):
+    """
+    Refresh the daily newsletter and subscriber rollups for the trailing window
+    """
+    try:
+        from .rollups import update_daily_rollups
+        result = update_daily_rollups(days or settings.DAILY_STATS_WINDOW_DAYS)
+
+        logger.info(f"Updated daily stats: {result['newsletter_rows']} newsletter rows, "
+                    f"{result['subscriber_rows']} subscriber rows")
+        return {'status': 'success', **result}
+
+    except Exception as e:
+        logger.error(f"Error in update_daily_stats: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def build_cohort_retention():
+    """
+    Rebuild the subscriber cohort retention report
+    """
+    try:
+        from .cohorts import build_cohort_report
+        report = build_cohort_report()
+
+        logger.info(f"Built cohort retention report for {len(report.data['cohorts'])} cohorts")
+        return {'status': 'success', 'report_id': report.id, 'cohorts': len(report.data['cohorts'])}
+
+    except Exception as e:
+        logger.error(f"Error in build_cohort_retention: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def score_subscriber_engagement():
+    """
+    Recompute the engagement score of every subscriber
+    """
+    try:
+        from .engagement import score_subscribers
+        result = score_subscribers(
+            chunk_size=settings.ENGAGEMENT_SCORE_CHUNK_SIZE,
+            half_life_days=settings.ENGAGEMENT_HALF_LIFE_DAYS,
+        )
+
+        logger.info(f"Scored {result['scored']} subscribers, {result['updated']} scores changed")
+        return {'status': 'success', **result}
+
+    except Exception as e:
+        logger.error(f"Error in score_subscriber_engagement: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
@@ -1,3 +1,1044 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import re
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urlsplit
+
+import numpy as np
+import redis
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import CustomUser
+
+from .cache import GENERATION_KEY, LOCK_KEY, batched_invalidation, get_cached_stats, stats_cache_key
+from .cohorts import build_cohort_report, compute_retention, load_send_chunks
+from .engagement import compute_scores, score_subscribers
+from .models import (
+    EngagementHeatmap, Newsletter, NewsletterAnalytics, NewsletterDailyStats, NewsletterEvent, NewsletterSend, NewsletterTemplate,
+    Subscriber, SubscriberDailyStats,
+)
+from .rollups import day_start, rollup_newsletter_days, rollup_subscriber_days, update_daily_rollups
+from .serializers import NewsletterSendSerializer, SubscriberSerializer
+from .services import message_id_domain, send_newsletter_email
+from .sketches import HyperLogLog, TDigest, add_engagement, newsletter_reach, unique_reach
+from .tasks import send_newsletter_task
+from .tracking import (
+    apply_events, collapse_events, collect_applied_hits, flush_tracking_buffer, make_event, make_unsubscribe_token,
+    mark_send_clicked, mark_send_opened, parse_events, queue_unsubscribe,
+)
+from .webhooks import apply_provider_events, normalize_event, parse_timestamp, verify_signature
+
+
+class NewsletterListQueryTests(TestCase):
+    """The newsletter list must not issue queries per row"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create(email='author@example.com', name='Author', is_staff=True)
+        cls.template = NewsletterTemplate.objects.create(
+            name='Default', subject_template='{{ subject }}', html_template='<p>{{ content }}</p>'
+        )
+        cls.subscribers = Subscriber.objects.bulk_create(
+            [Subscriber(email=f'reader{i}@example.com') for i in range(3)]
+        )
+
+    def create_newsletters(self, count):
+        for i in range(count):
+            newsletter = Newsletter.objects.create(
+                title=f'Issue {i}', subject='Subject', content='Content',
+                author=self.author, template=self.template, status='sent',
+            )
+            NewsletterAnalytics.objects.create(newsletter=newsletter)
+            NewsletterSend.objects.bulk_create([
+                NewsletterSend(newsletter=newsletter, subscriber=subscriber, status='sent')
+                for subscriber in self.subscribers
+            ])
+
+    def list_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/newsletters/newsletters/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results'], len(queries)
+
+    def test_query_count_is_constant(self):
+        self.create_newsletters(2)
+        rows, small = self.list_queries()
+        self.assertEqual(len(rows), 2)
+
+        self.create_newsletters(20)
+        rows, large = self.list_queries()
+        self.assertEqual(len(rows), 22)
+        self.assertEqual(small, large)
+
+    def test_list_rows_include_relations(self):
+        self.create_newsletters(1)
+        rows, _ = self.list_queries()
+        row = rows[0]
+        self.assertEqual(row['sends_count'], len(self.subscribers))
+        self.assertEqual(row['author']['email'], self.author.email)
+        self.assertEqual(row['template']['name'], self.template.name)
+        self.assertEqual(row['analytics']['newsletter'], row['id'])
+
+
+class ProjectedListTests(TestCase):
+    """List actions built from .values() rows must match the serializers exactly"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create(email='staff@example.com', name='Staff', is_staff=True)
+        now = timezone.now()
+        cls.subscribers = [
+            Subscriber.objects.create(
+                email='ada@example.com', first_name='Ada', last_name='Lovelace', source='website',
+                frequency='monthly', engagement_score=87.25, last_email_sent=now,
+            ),
+            Subscriber.objects.create(email='nameless@example.com', first_name='Only', is_active=False,
+                                      unsubscribed_at=now - timedelta(days=2)),
+            Subscriber.objects.create(email='zoë@example.com', first_name='Zoë', last_name='Ünïcode\u2028'),
+        ]
+        newsletter = Newsletter.objects.create(
+            title='Issue', subject='Subject', content='Content', author=cls.staff, status='sent'
+        )
+        for i, subscriber in enumerate(cls.subscribers):
+            NewsletterSend.objects.create(
+                newsletter=newsletter, subscriber=subscriber, status='opened' if i else 'sent',
+                sent_at=now - timedelta(hours=i), opened_at=now if i else None, open_count=i,
+                message_id=f'message-{i}',
+            )
+
+    def assert_list_matches(self, url, model, serializer_class):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['results']
+        self.assertEqual(len(rows), model.objects.count())
+
+        instances = model.objects.in_bulk([row['id'] for row in rows])
+        serializer = serializer_class(
+            [instances[row['id']] for row in rows], many=True, context={'request': response.wsgi_request}
+        )
+        self.assertEqual(rows, json.loads(JSONRenderer().render(serializer.data)))
+
+    def test_subscriber_list_matches_serializer(self):
+        self.assert_list_matches('/api/newsletters/subscribers/', Subscriber, SubscriberSerializer)
+
+    def test_send_list_matches_serializer(self):
+        self.assert_list_matches('/api/newsletters/sends/?ordering=sent_at', NewsletterSend, NewsletterSendSerializer)
+
+
+class ConditionalGetTests(TestCase):
+    """Polling clients get 304 until the newsletters behind the response change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create(email='poller@example.com', name='Poller', is_staff=True)
+        cls.newsletter = Newsletter.objects.create(
+            title='Issue', subject='Subject', content='Content', author=cls.staff
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_list_not_modified_until_change(self):
+        response = self.client.get('/api/newsletters/newsletters/')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        # A delete would not move any timestamp, so lists validate by ETag only
+        self.assertNotIn('Last-Modified', response.headers)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/newsletters/newsletters/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+        other = self.client.get('/api/newsletters/newsletters/?status=draft', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, 200)
+
+        self.newsletter.title = 'Renamed'
+        self.newsletter.save()
+        response = self.client.get('/api/newsletters/newsletters/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        url = f'/api/newsletters/newsletters/{self.newsletter.pk}/'
+        etag = self.client.get(url).headers['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Newsletter.objects.create(title='Another', subject='Subject', content='Content', author=self.staff)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        list_etag = self.client.get('/api/newsletters/newsletters/').headers['ETag']
+        self.assertNotEqual(list_etag, etag)
+
+    def test_detail_last_modified(self):
+        url = f'/api/newsletters/newsletters/{self.newsletter.pk}/'
+        last_modified = self.client.get(url).headers['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_analytics_change_invalidates_list_and_detail(self):
+        analytics = NewsletterAnalytics.objects.create(newsletter=self.newsletter)
+        url = f'/api/newsletters/newsletters/{self.newsletter.pk}/'
+        list_etag = self.client.get('/api/newsletters/newsletters/').headers['ETag']
+        detail_etag = self.client.get(url).headers['ETag']
+
+        NewsletterAnalytics.objects.filter(pk=analytics.pk).update(
+            total_opened=1, updated_at=timezone.now() + timedelta(seconds=5),
+        )
+        response = self.client.get('/api/newsletters/newsletters/', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['analytics']['total_opened'], 1)
+
+
+class ClickTrackingTests(TestCase):
+    """Links in sent emails are signed click-tracking URLs that end up as recorded clicks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create(email='sender@example.com', name='Sender')
+        cls.newsletter = Newsletter.objects.create(
+            title='Issue', subject='Subject', author=cls.author,
+            content='<p><a href="https://example.com/post?id=1&amp;ref=mail">Read more</a></p>',
+        )
+        cls.subscriber = Subscriber.objects.create(email='reader@example.com')
+
+    def test_signed_link_round_trip(self):
+        send = NewsletterSend.objects.create(newsletter=self.newsletter, subscriber=self.subscriber)
+        success, error = send_newsletter_email(self.newsletter, self.subscriber, send)
+        self.assertTrue(success, error)
+
+        html_content = mail.outbox[0].alternatives[0][0]
+        links = re.findall(r'href="([^"]+)"', html_content)
+        click_urls = [link for link in links if '/track/click/' in link]
+        self.assertEqual(len(click_urls), 1)
+        click_url = urlsplit(click_urls[0].replace('&amp;', '&'))
+
+        send.refresh_from_db()
+        with mock.patch('newsletters.views.arecord_event', new=mock.AsyncMock(return_value=True)) as record:
+            response = self.client.get(f'{click_url.path}?{click_url.query}')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], 'https://example.com/post?id=1&ref=mail')
+        record.assert_awaited_once_with('click', send.message_id)
+
+        apply_events(collapse_events(parse_events([make_event('click', send.message_id)])))
+        send.refresh_from_db()
+        self.assertEqual(send.status, 'clicked')
+        self.assertEqual(send.click_count, 1)
+        self.assertIsNotNone(send.clicked_at)
+
+    def test_tampered_link_is_not_followed(self):
+        with mock.patch('newsletters.views.arecord_event', new=mock.AsyncMock(return_value=True)) as record:
+            response = self.client.get('/api/newsletters/track/click/abc/?url=https://evil.example&sig=bad')
+        self.assertEqual(response.status_code, 302)
+        self.assertNotEqual(response['Location'], 'https://evil.example')
+        record.assert_not_called()
+
+
+class TrackingTests(TestCase):
+    """Buffered and direct open/click tracking move every counter exactly once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create(email='tracker@example.com', name='Tracker')
+        cls.newsletter = Newsletter.objects.create(
+            title='Issue', subject='Subject', content='Content', author=cls.author, total_sent=2,
+        )
+        cls.subscribers = Subscriber.objects.bulk_create(
+            [Subscriber(email=f'open{i}@example.com') for i in range(2)]
+        )
+
+    def setUp(self):
+        now = timezone.now()
+        self.sends = [
+            NewsletterSend.objects.create(
+                newsletter=self.newsletter, subscriber=subscriber, status='delivered',
+                sent_at=now - timedelta(hours=2), message_id=f'track-{i}',
+            )
+            for i, subscriber in enumerate(self.subscribers)
+        ]
+
+    def test_flush_collapses_hits_per_send(self):
+        raw_events = [
+            make_event('open', 'track-0'), make_event('open', 'track-0'), make_event('click', 'track-0'),
+            make_event('open', 'track-1'), make_event('open', 'unknown'), b'not json',
+        ]
+        result = apply_events(collapse_events(parse_events(raw_events)))
+        self.assertEqual(result, {'sends': 2, 'subscribers': 2, 'newsletters': 1})
+
+        first, second = (NewsletterSend.objects.get(pk=send.pk) for send in self.sends)
+        self.assertEqual((first.status, first.open_count, first.click_count), ('clicked', 2, 1))
+        self.assertEqual((second.status, second.open_count, second.click_count), ('opened', 1, 0))
+        self.newsletter.refresh_from_db()
+        self.assertEqual((self.newsletter.total_opened, self.newsletter.total_clicked), (2, 1))
+        self.assertEqual(self.newsletter.open_rate, 100.0)
+        self.assertEqual(Subscriber.objects.get(pk=self.subscribers[0].pk).total_emails_clicked, 1)
+        self.assertEqual(NewsletterEvent.objects.count(), 4)
+
+        apply_events(collapse_events(parse_events([make_event('open', 'track-0')])))
+        self.newsletter.refresh_from_db()
+        self.assertEqual(self.newsletter.total_opened, 2)
+        self.assertEqual(NewsletterSend.objects.get(pk=first.pk).open_count, 3)
+
+    def test_failed_flush_rolls_back_before_requeue(self):
+        raw_events = [make_event('open', 'track-0'), make_event('click', 'track-1')]
+        with mock.patch('newsletters.tracking.drain_events', return_value=raw_events), \
+                mock.patch('newsletters.tracking.requeue_events') as requeue, \
+                mock.patch('newsletters.tracking.apply_unsubscribes', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                flush_tracking_buffer(batch_size=10, max_batches=1)
+        requeue.assert_called_once_with(raw_events)
+        self.assertEqual(
+            list(NewsletterSend.objects.order_by('id').values_list('open_count', 'click_count')), [(0, 0), (0, 0)]
+        )
+        self.newsletter.refresh_from_db()
+        self.assertEqual((self.newsletter.total_opened, self.newsletter.total_clicked), (0, 0))
+        self.assertFalse(NewsletterEvent.objects.exists())
+
+    def test_mark_opened_and_clicked(self):
+        send = self.sends[0]
+        self.assertTrue(mark_send_opened(send))
+        self.assertFalse(mark_send_opened(NewsletterSend.objects.get(pk=send.pk)))
+        self.assertTrue(mark_send_clicked(NewsletterSend.objects.get(pk=send.pk)))
+
+        send.refresh_from_db()
+        self.assertEqual((send.status, send.open_count, send.click_count), ('clicked', 2, 1))
+        self.newsletter.refresh_from_db()
+        self.assertEqual((self.newsletter.total_opened, self.newsletter.total_clicked), (1, 1))
+        self.assertEqual(self.newsletter.open_rate, 50.0)
+
+    def published_deltas(self, function, *args):
+        deltas = []
+        with mock.patch('newsletters.counters.CounterBatch.publish_now', autospec=True,
+                        side_effect=lambda batch: deltas.append(batch.deltas)):
+            with self.captureOnCommitCallbacks(execute=True):
+                function(*args)
+        return deltas[0][self.newsletter.id]
+
+    def test_stale_instances_count_once(self):
+        # Both loaded before any hit, as by two concurrent requests
+        stale, twin = (NewsletterSend.objects.get(pk=self.sends[0].pk) for _ in range(2))
+
+        opened = [self.published_deltas(mark_send_opened, send)['total_opened'] for send in (stale, stale, twin)]
+        clicked = [self.published_deltas(mark_send_clicked, send)['total_clicked'] for send in (twin, stale)]
+        self.assertEqual(opened, [1, 0, 0])
+        self.assertEqual(clicked, [1, 0])
+
+        self.newsletter.refresh_from_db()
+        self.assertEqual((self.newsletter.total_opened, self.newsletter.total_clicked), (1, 1))
+        self.assertEqual(NewsletterSend.objects.get(pk=stale.pk).open_count, 3)
+
+    def test_direct_hits_reach_the_log_through_the_buffer(self):
+        client = mock.Mock()
+        with mock.patch('newsletters.tracking.get_redis', return_value=client):
+            with self.captureOnCommitCallbacks(execute=True):
+                mark_send_opened(self.sends[0])
+        raw_event = client.rpush.call_args.args[1]
+        self.assertFalse(NewsletterEvent.objects.exists())
+        self.assertFalse(EngagementHeatmap.objects.exists())
+
+        events = parse_events([raw_event])
+        self.assertEqual(collapse_events(events), {})
+        apply_events(collapse_events(events), collect_applied_hits(events))
+        event = NewsletterEvent.objects.get()
+        self.assertEqual((event.event_type, event.send_id), ('open', self.sends[0].id))
+        self.assertEqual(NewsletterSend.objects.get(pk=self.sends[0].pk).open_count, 1)
+        self.assertAlmostEqual(newsletter_reach([self.newsletter.id])['unique_openers'], 1, delta=0)
+        heatmap = EngagementHeatmap.objects.get(newsletter=self.newsletter, kind='open')
+        self.assertEqual(sum(map(sum, heatmap.counts)), 1)
+
+    def test_overall_heatmap_needs_authentication(self):
+        response = APIClient().get('/api/newsletters/newsletters/heatmap/')
+        self.assertIn(response.status_code, (401, 403))
+
+        client = APIClient()
+        client.force_authenticate(self.author)
+        self.assertEqual(client.get('/api/newsletters/newsletters/heatmap/').status_code, 200)
+
+    def test_direct_hits_applied_when_redis_is_down(self):
+        with mock.patch('newsletters.tracking.get_redis', side_effect=redis.ConnectionError('down')):
+            with self.captureOnCommitCallbacks(execute=True):
+                mark_send_clicked(self.sends[1])
+        self.assertEqual(NewsletterEvent.objects.get().event_type, 'click')
+
+    def test_update_metrics_leaves_the_digest_alone(self):
+        analytics, _ = NewsletterAnalytics.objects.get_or_create(newsletter=self.newsletter)
+        stale = NewsletterAnalytics.objects.get(pk=analytics.pk)
+        mark_send_opened(self.sends[0])
+        NewsletterAnalytics.objects.filter(pk=analytics.pk).update(
+            time_to_open_digest=b'digest', median_time_to_open=2.0, p90_time_to_open=2.0,
+        )
+
+        stale.update_metrics()
+        analytics.refresh_from_db()
+        self.assertEqual((analytics.total_sent, analytics.total_opened), (2, 1))
+        self.assertEqual(bytes(analytics.time_to_open_digest), b'digest')
+        self.assertEqual((analytics.median_time_to_open, analytics.p90_time_to_open), (2.0, 2.0))
+
+
+@override_settings(NEWSLETTER_WEBHOOK_SECRET='test-secret')
+class WebhookParsingTests(TestCase):
+    """Provider payloads are authenticated and normalized before they touch any send"""
+
+    def test_verify_signature(self):
+        body = b'[{"event": "delivered"}]'
+        digest = hmac.new(b'test-secret', body, hashlib.sha256).hexdigest()
+        self.assertTrue(verify_signature(body, f'sha256={digest}'))
+        self.assertFalse(verify_signature(body + b' ', f'sha256={digest}'))
+        self.assertFalse(verify_signature(body, None))
+
+    def test_normalize_event(self):
+        event = normalize_event({'event': 'bounce', 'smtp-id': '<abc@mail.example.com>', 'bounce_type': 'Hard',
+                                 'timestamp': 1760000000})
+        self.assertEqual(event['kind'], 'bounced')
+        self.assertEqual(event['message_id'], 'abc')
+        self.assertEqual(event['bounce_type'], 'hard')
+        self.assertEqual(event['occurred_at'].timestamp(), 1760000000)
+        self.assertIsNone(normalize_event({'event': 'processed', 'message_id': 'abc'}))
+        self.assertIsNone(normalize_event({'event': 'delivered'}))
+
+    def test_parse_timestamp(self):
+        for value in (1760000000, 1760000000.0, 1760000000000, '1760000000', '1760000000000', '2025-10-09T08:53:20Z'):
+            self.assertEqual(parse_timestamp(value).timestamp(), 1760000000, value)
+        self.assertEqual(parse_timestamp('2025-10-09 08:53:20').timestamp(), 1760000000)
+        for value in ('2025-13-01T00:00:00Z', 'yesterday', 10 ** 20, True):
+            with self.assertRaises(ValueError, msg=value):
+                parse_timestamp(value)
+
+class RollupTests(TestCase):
+    """Daily rollups are rebuilt from the event log and subscriber timestamps"""
+
+    def test_newsletter_days(self):
+        author = CustomUser.objects.create(email='rollup@example.com', name='Rollup')
+        newsletter = Newsletter.objects.create(title='Issue', subject='Subject', content='Content', author=author)
+        subscriber = Subscriber.objects.create(email='rolled@example.com')
+        send = NewsletterSend.objects.create(newsletter=newsletter, subscriber=subscriber)
+        day = date(2026, 3, 2)
+        start = day_start(day)
+        NewsletterEvent.objects.bulk_create([
+            NewsletterEvent(event_type=event_type, occurred_at=start + timedelta(hours=hours), newsletter=newsletter,
+                            subscriber=subscriber, send=send)
+            for event_type, hours in [('sent', 1), ('open', 2), ('open', 3), ('click', 4), ('open', 26)]
+        ])
+        NewsletterDailyStats.objects.create(newsletter=newsletter, date=day, opens=99)
+
+        self.assertEqual(rollup_newsletter_days(day, day + timedelta(days=1)), 2)
+        first = NewsletterDailyStats.objects.get(date=day)
+        self.assertEqual(
+            (first.sends, first.opens, first.unique_opens, first.clicks, first.unique_clicks), (1, 2, 1, 1, 1)
+        )
+        self.assertEqual(NewsletterDailyStats.objects.get(date=day + timedelta(days=1)).opens, 1)
+
+    def test_subscriber_days(self):
+        day = date(2026, 3, 2)
+        start = day_start(day)
+        first = Subscriber.objects.create(email='a@example.com')
+        second = Subscriber.objects.create(email='b@example.com', is_active=False,
+                                           unsubscribed_at=start + timedelta(days=1, hours=1))
+        # subscribed_at is auto_now_add
+        Subscriber.objects.filter(pk=first.pk).update(subscribed_at=start + timedelta(hours=1))
+        Subscriber.objects.filter(pk=second.pk).update(subscribed_at=start + timedelta(hours=2))
+
+        self.assertEqual(rollup_subscriber_days(day, day + timedelta(days=2)), 3)
+        rows = {row.date: (row.new_subscribers, row.unsubscribes) for row in SubscriberDailyStats.objects.all()}
+        self.assertEqual(rows, {day: (2, 0), day + timedelta(days=1): (0, 1), day + timedelta(days=2): (0, 0)})
+
+    def test_newsletter_days_from_sends(self):
+        author = CustomUser.objects.create(email='history@example.com', name='History')
+        logged, unlogged = (
+            Newsletter.objects.create(title=title, subject='Subject', content='Content', author=author)
+            for title in ('Logged', 'Before the event log')
+        )
+        day = date(2026, 3, 2)
+        start = day_start(day)
+        subscribers = Subscriber.objects.bulk_create([Subscriber(email=f'old{i}@example.com') for i in range(3)])
+        for i, subscriber in enumerate(subscribers):
+            NewsletterSend.objects.create(
+                newsletter=unlogged, subscriber=subscriber, status='clicked' if i else 'bounced',
+                sent_at=start, delivered_at=start if i else None, opened_at=start + timedelta(hours=i) if i else None,
+                clicked_at=start + timedelta(days=1) if i == 2 else None, open_count=i, click_count=int(i == 2),
+            )
+        send = NewsletterSend.objects.create(newsletter=logged, subscriber=subscribers[0], sent_at=start)
+        NewsletterEvent.objects.create(event_type='open', occurred_at=start, newsletter=logged,
+                                       subscriber=subscribers[0], send=send)
+
+        self.assertEqual(rollup_newsletter_days(day, day + timedelta(days=1)), 1)
+        self.assertEqual(rollup_newsletter_days(day, day + timedelta(days=1), include_sends=True), 3)
+        first = NewsletterDailyStats.objects.get(newsletter=unlogged, date=day)
+        self.assertEqual(
+            (first.sends, first.deliveries, first.opens, first.unique_opens, first.bounces), (3, 2, 3, 2, 1)
+        )
+        second = NewsletterDailyStats.objects.get(newsletter=unlogged, date=day + timedelta(days=1))
+        self.assertEqual((second.clicks, second.unique_clicks, second.sends), (1, 1, 0))
+        # Newsletter-days covered by the log keep the event counts
+        self.assertEqual(NewsletterDailyStats.objects.get(newsletter=logged).sends, 0)
+
+    def test_first_update_backfills_history(self):
+        subscriber = Subscriber.objects.create(email='early@example.com')
+        today = timezone.localdate()
+        Subscriber.objects.filter(pk=subscriber.pk).update(subscribed_at=day_start(today - timedelta(days=20)))
+
+        result = update_daily_rollups(days=2, today=today)
+        self.assertEqual(result['subscriber_rows'], 21)
+        self.assertEqual(SubscriberDailyStats.objects.get(date=today - timedelta(days=20)).new_subscribers, 1)
+        self.assertEqual(update_daily_rollups(days=2, today=today)['subscriber_rows'], 2)
+
+
+class SketchTests(TestCase):
+    """HyperLogLog and t-digest estimates stay within their error bounds and survive storage"""
+
+    def test_hyperloglog_estimate_and_merge(self):
+        first = HyperLogLog().add(range(0, 60000))
+        second = HyperLogLog.from_bytes(HyperLogLog().add(range(40000, 100000)).to_bytes())
+        self.assertAlmostEqual(first.count(), 60000, delta=60000 * 0.03)
+        self.assertAlmostEqual(first.merge(second).count(), 100000, delta=100000 * 0.03)
+        self.assertEqual(HyperLogLog().count(), 0)
+
+    def test_tdigest_quantiles(self):
+        digest = TDigest().add(range(1, 5001))
+        restored = TDigest.from_bytes(digest.to_bytes()).merge(TDigest().add(range(5001, 10001)))
+        self.assertEqual(restored.count, 10000)
+        self.assertAlmostEqual(restored.quantile(0.5), 5000, delta=50)
+        self.assertAlmostEqual(restored.quantile(0.99), 9900, delta=20)
+        self.assertAlmostEqual(restored.mean(), 5000.5, places=3)
+        self.assertIsNone(TDigest().quantile(0.5))
+
+    def test_add_engagement_reach(self):
+        author = CustomUser.objects.create(email='sketch@example.com', name='Sketch')
+        newsletters = [
+            Newsletter.objects.create(title=f'Issue {i}', subject='Subject', content='Content', author=author)
+            for i in range(2)
+        ]
+        when = timezone.now()
+        add_engagement([('open', newsletters[0].id, subscriber_id, when) for subscriber_id in range(1, 301)])
+        add_engagement([('open', newsletters[1].id, subscriber_id, when) for subscriber_id in range(201, 401)])
+        add_engagement([('click', newsletters[1].id, 7, when), ('sent', newsletters[1].id, 8, when)])
+
+        today = timezone.localdate(when)
+        reach = unique_reach(today, today)
+        self.assertAlmostEqual(reach['unique_openers'], 400, delta=12)
+        self.assertEqual(reach['unique_clickers'], 1)
+        reach = newsletter_reach([newsletters[0].id])
+        self.assertAlmostEqual(reach['unique_openers'], 300, delta=9)
+        self.assertEqual(reach['unique_clickers'], 0)
+
+
+class UnsubscribeTests(TestCase):
+    """Unsubscribes are queued in Redis, and applied directly when Redis is down"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create(email='unsub@example.com', name='Unsub')
+        newsletter = Newsletter.objects.create(title='Issue', subject='Subject', content='Content', author=author)
+        cls.subscriber = Subscriber.objects.create(email='leaving@example.com')
+        cls.send = NewsletterSend.objects.create(
+            newsletter=newsletter, subscriber=cls.subscriber, status='delivered', message_id='leave-1'
+        )
+
+    def assert_unsubscribed(self):
+        self.subscriber.refresh_from_db()
+        self.assertFalse(self.subscriber.is_active)
+        self.assertIsNotNone(self.subscriber.unsubscribed_at)
+        self.assertEqual(NewsletterSend.objects.get(pk=self.send.pk).status, 'unsubscribed')
+
+    def test_queued_when_redis_is_up(self):
+        client = mock.Mock()
+        with mock.patch('newsletters.tracking.get_redis', return_value=client):
+            queue_unsubscribe(self.subscriber.pk, 'leave-1')
+        client.rpush.assert_called_once()
+        self.subscriber.refresh_from_db()
+        self.assertTrue(self.subscriber.is_active)
+
+    def test_applied_directly_when_redis_is_down(self):
+        with mock.patch('newsletters.tracking.get_redis', side_effect=redis.ConnectionError('down')):
+            queue_unsubscribe(self.subscriber.pk, 'leave-1')
+        self.assert_unsubscribed()
+
+    def test_one_click_post_when_redis_is_down(self):
+        client = mock.Mock()
+        client.rpush = mock.AsyncMock(side_effect=redis.ConnectionError('down'))
+        url = f"/api/newsletters/unsubscribe/{make_unsubscribe_token(self.subscriber.pk, 'leave-1')}/"
+        with mock.patch('newsletters.tracking.get_async_redis', return_value=client):
+            response = self.client.post(url, {'List-Unsubscribe': 'One-Click'})
+        self.assertEqual(response.status_code, 200)
+        self.assert_unsubscribed()
+
+
+@override_settings(NEWSLETTER_WEBHOOK_SECRET='test-secret')
+class ProviderWebhookReplayTests(TestCase):
+    """Replaying the recorded provider payload updates sends, subscribers and totals"""
+    fixture_path = Path(__file__).parent / 'fixtures' / 'webhooks' / 'provider_events.json'
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create(email='replay@example.com', name='Replay')
+        cls.newsletter = Newsletter.objects.create(
+            title='Issue', subject='Subject', content='Content', author=author, total_sent=6
+        )
+        cls.subscribers = Subscriber.objects.bulk_create(
+            [Subscriber(email=f'replay{i}@example.com') for i in range(1, 7)]
+        )
+        NewsletterSend.objects.bulk_create([
+            NewsletterSend(newsletter=cls.newsletter, subscriber=subscriber, status='sent',
+                           message_id=f'replay-{i:04d}')
+            for i, subscriber in enumerate(cls.subscribers, start=1)
+        ])
+
+    def send(self, number):
+        return NewsletterSend.objects.select_related('subscriber').get(message_id=f'replay-{number:04d}')
+
+    def test_replay_fixture(self):
+        result = apply_provider_events(json.loads(self.fixture_path.read_text()))
+        self.assertEqual(result, {'events': 9, 'sends': 6, 'unsubscribed': 3})
+
+        for number in (1, 2):
+            send = self.send(number)
+            self.assertEqual(send.status, 'delivered')
+            self.assertEqual(int(send.delivered_at.timestamp()), 1760000000 + (number - 1) * 4)
+
+        hard, soft = self.send(4), self.send(5)
+        self.assertEqual((hard.status, hard.provider_response), ('bounced', '550 5.1.1 User unknown'))
+        self.assertFalse(hard.subscriber.is_active)
+        self.assertEqual(soft.status, 'bounced')
+        self.assertTrue(soft.subscriber.is_active)
+
+        for number in (3, 6):  # unsubscribe and spam complaint after delivery
+            send = self.send(number)
+            self.assertEqual(send.status, 'unsubscribed')
+            self.assertIsNotNone(send.delivered_at)
+            self.assertFalse(send.subscriber.is_active)
+
+        self.newsletter.refresh_from_db()
+        self.assertEqual(self.newsletter.total_delivered, 4)
+        self.assertEqual(
+            NewsletterEvent.objects.filter(event_type__in=['bounce', 'unsubscribe']).count(), 4
+        )
+
+    def test_bad_event_is_skipped(self):
+        result = apply_provider_events([
+            {'event': 'delivered', 'message_id': 'replay-0001', 'timestamp': '2025-13-01T00:00:00Z'},
+            {'event': 'delivered', 'message_id': 'replay-0002', 'timestamp': 1760000000000},
+        ])
+        self.assertEqual(result, {'events': 1, 'sends': 1, 'unsubscribed': 0})
+        self.assertEqual(self.send(1).status, 'sent')
+        self.assertEqual(self.send(2).delivered_at.timestamp(), 1760000000)
+
+    def test_webhook_checks_signature(self):
+        body = self.fixture_path.read_bytes()
+        digest = hmac.new(b'test-secret', body, hashlib.sha256).hexdigest()
+        url = '/api/newsletters/webhooks/provider/'
+        with mock.patch('newsletters.tasks.process_provider_events.delay') as delay:
+            rejected = self.client.post(url, body, content_type='application/json',
+                                        HTTP_X_WEBHOOK_SIGNATURE='sha256=' + '0' * 64)
+            accepted = self.client.post(url, body, content_type='application/json',
+                                        HTTP_X_WEBHOOK_SIGNATURE=f'sha256={digest}')
+        self.assertEqual(rejected.status_code, 403)
+        self.assertEqual(accepted.status_code, 202)
+        delay.assert_called_once_with(json.loads(body))
+
+    def test_message_id_domain(self):
+        self.assertEqual(message_id_domain('Newsletter <news@example.com>'), 'example.com')
+        self.assertEqual(message_id_domain('news@example.org'), 'example.org')
+        self.assertEqual(message_id_domain('not an address'), 'localhost')
+
+
+class StatsCacheTests(TestCase):
+    """Bulk writes invalidate the stats cache once, and a cold cache never blocks for long"""
+
+    def setUp(self):
+        cache.clear()
+
+    def generation_after(self, write):
+        cache.set(GENERATION_KEY, 1, timeout=None)
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        return cache.get(GENERATION_KEY)
+
+    def test_rows_invalidate_individually(self):
+        self.assertEqual(self.generation_after(
+            lambda: [Subscriber.objects.create(email=f'single{i}@example.com') for i in range(3)]
+        ), 4)
+
+    def test_batch_invalidates_once(self):
+        def write():
+            with batched_invalidation():
+                for i in range(50):
+                    Subscriber.objects.create(email=f'bulk{i}@example.com')
+                with batched_invalidation():
+                    Subscriber.objects.create(email='nested@example.com')
+        self.assertEqual(self.generation_after(write), 2)
+
+    @override_settings(STATS_CACHE_COLD_WAIT=0.1)
+    def test_cold_cache_computes_inline(self):
+        params = {'period': '30'}
+        cache.add(LOCK_KEY.format(stats_cache_key('newsletters', 'all', params)), 1, timeout=60)
+        started = timezone.now()
+        self.assertEqual(get_cached_stats('newsletters', 'all', params, lambda: {'total': 1}), {'total': 1})
+        self.assertLess((timezone.now() - started).total_seconds(), 5)
+
+
+class CohortReportTests(TestCase):
+    """The cohort report is built off-request from streamed chunks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create(email='cohorts@example.com', name='Cohorts', is_staff=True)
+        newsletters = [
+            Newsletter.objects.create(title=f'Issue {i}', subject='Subject', content='Content', author=cls.staff)
+            for i in range(3)
+        ]
+        now = timezone.now()
+        for i in range(5):
+            subscriber = Subscriber.objects.create(email=f'cohort{i}@example.com')
+            for n, newsletter in enumerate(newsletters[:i % 3 + 1]):
+                NewsletterSend.objects.create(
+                    newsletter=newsletter, subscriber=subscriber, sent_at=now + timedelta(days=n),
+                    status='opened' if (i + n) % 2 else 'delivered',
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_missing_report_is_queued(self):
+        with mock.patch('newsletters.tasks.build_cohort_retention.delay') as delay:
+            first = self.client.get('/api/newsletters/subscribers/cohorts/')
+            second = self.client.get('/api/newsletters/subscribers/cohorts/')
+        self.assertEqual((first.status_code, second.status_code), (202, 202))
+        delay.assert_called_once_with()
+
+        build_cohort_report()
+        response = self.client.get('/api/newsletters/subscribers/cohorts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['cohort_sizes'], [5])
+
+    def test_chunk_size_does_not_change_the_report(self):
+        whole = compute_retention(load_send_chunks(chunk_size=1000))
+        self.assertEqual(whole['received'][0][:3], [5, 3, 1])
+        for chunk_size in (1, 2, 3):
+            self.assertEqual(compute_retention(load_send_chunks(chunk_size=chunk_size)), whole)
+
+
+class ExportTests(TestCase):
+    """Send exports validate their filters before streaming"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create(email='exports@example.com', name='Exports', is_staff=True)
+        cls.newsletters = [
+            Newsletter.objects.create(title=f'Issue {i}', subject='Subject', content='Content', author=cls.staff)
+            for i in range(2)
+        ]
+        subscriber = Subscriber.objects.create(email='exported@example.com')
+        for newsletter in cls.newsletters:
+            NewsletterSend.objects.create(newsletter=newsletter, subscriber=subscriber)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_newsletter_filter(self):
+        response = self.client.get(f'/api/newsletters/sends/export/?newsletter={self.newsletters[1].id}')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1].split(',')[1], str(self.newsletters[1].id))
+
+    def test_invalid_newsletter_is_rejected(self):
+        for value in ('abc', '-1', '1.5'):
+            for endpoint in ('export', 'export_events'):
+                response = self.client.get(f'/api/newsletters/sends/{endpoint}/?newsletter={value}')
+                self.assertEqual(response.status_code, 400, (endpoint, value))
+
+    async def test_asgi_export_is_streamed_asynchronously(self):
+        token = await sync_to_async(AccessToken.for_user)(self.staff)
+        response = await self.async_client.get(
+            '/api/newsletters/sends/export/?export_format=jsonl', headers={'Authorization': f'Bearer {token}'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(len(b''.join(chunks).splitlines()), 2)
+
+
+class KeysetPaginationTests(TestCase):
+    """Keyset pages cover every row exactly once in both directions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create(email='pages@example.com', name='Pages', is_staff=True)
+        now = timezone.now()
+        # Ties on both ordering columns, and NULL sent_at values in between
+        sent_offsets = [None, 1, 1, None, 2, 3, 3, 3, None, 1, 4]
+        for i, offset in enumerate(sent_offsets):
+            newsletter = Newsletter.objects.create(
+                title=f'Issue {i}', subject='Subject', content='Content', author=cls.staff,
+            )
+            Newsletter.objects.filter(pk=newsletter.pk).update(
+                created_at=now - timedelta(days=i % 3),
+                sent_at=None if offset is None else now + timedelta(days=offset),
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk(self, ordering):
+        """Follow next links to the end, then previous links back to the start"""
+        url = f'/api/newsletters/newsletters/?page_size=3&ordering={ordering}'
+        forward = []
+        while url:
+            page = self.get(url)
+            forward.extend(row['id'] for row in page['results'])
+            last, url = page, page['next']
+        backward = [row['id'] for row in last['results']]
+        url = last['previous']
+        while url:
+            page = self.get(url)
+            backward[:0] = [row['id'] for row in page['results']]
+            url = page['previous']
+        return forward, backward
+
+    def expected(self, field, descending):
+        rows = list(Newsletter.objects.values_list(field, 'id'))
+        values = sorted({value for value, _ in rows if value is not None}, reverse=descending)
+        rank = {value: position for position, value in enumerate(values)}
+        # NULLs sort after every value; the primary key follows the leading direction
+        return [
+            pk for _, pk in sorted(
+                rows, key=lambda row: (row[0] is None, rank.get(row[0], 0), -row[1] if descending else row[1])
+            )
+        ]
+
+    def test_walks_cover_every_row_once(self):
+        for ordering, field, descending in [
+            ('sent_at', 'sent_at', False), ('-sent_at', 'sent_at', True),
+            ('created_at', 'created_at', False), ('-created_at', 'created_at', True),
+        ]:
+            forward, backward = self.walk(ordering)
+            expected = self.expected(field, descending)
+            self.assertEqual(forward, expected, ordering)
+            self.assertEqual(backward, expected, ordering)
+
+    def test_default_ordering(self):
+        page = self.get('/api/newsletters/newsletters/?page_size=100')
+        self.assertEqual([row['id'] for row in page['results']], self.expected('created_at', True))
+        self.assertIsNone(page['next'])
+        self.assertIsNone(page['previous'])
+
+    def test_count_is_opt_in(self):
+        self.assertNotIn('count', self.get('/api/newsletters/newsletters/?page_size=3'))
+        page = self.get('/api/newsletters/newsletters/?page_size=3&count=true')
+        self.assertEqual(page['count'], Newsletter.objects.count())
+        self.assertEqual(len(page['results']), 3)
+
+    def test_invalid_cursor_is_not_found(self):
+        page = self.get('/api/newsletters/newsletters/?page_size=3&ordering=sent_at')
+        cursor = re.search(r'cursor=([^&]+)', page['next']).group(1)
+        # A cursor from one ordering does not fit another with a different shape
+        for url in [
+            '/api/newsletters/newsletters/?cursor=not-a-cursor',
+            f'/api/newsletters/newsletters/?cursor={cursor}&ordering=sent_at,title',
+        ]:
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+
+
+class BulkSendTests(TestCase):
+    """A bulk send does not undo engagement or unsubscribes applied while it runs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create(email='sender@example.com', name='Sender')
+        cls.newsletter = Newsletter.objects.create(
+            title='Issue', subject='Subject', content='Content', author=cls.author, status='sending',
+        )
+        Subscriber.objects.bulk_create([Subscriber(email=f'bulk{i}@example.com') for i in range(4)])
+
+    def test_opens_during_the_send_survive(self):
+        def send_and_open(newsletter, subscriber, newsletter_send):
+            result = send_newsletter_email(newsletter, subscriber, newsletter_send)
+            # What the flusher does for an open that arrives mid-send
+            Newsletter.objects.filter(pk=newsletter.pk).update(total_opened=F('total_opened') + 1)
+            return result
+
+        with mock.patch('newsletters.services.send_newsletter_email', side_effect=send_and_open):
+            result = send_newsletter_task(self.newsletter.id)
+        self.assertEqual(result['sent_count'], 4)
+
+        self.newsletter.refresh_from_db()
+        self.assertEqual(self.newsletter.status, 'sent')
+        self.assertEqual((self.newsletter.total_sent, self.newsletter.total_recipients), (4, 4))
+        self.assertEqual(self.newsletter.total_opened, 4)
+        self.assertEqual((self.newsletter.open_rate, self.newsletter.click_rate), (100.0, 0.0))
+
+    def test_unsubscribes_during_the_send_are_respected(self):
+        subscribers = list(Subscriber.objects.order_by('id'))
+        leaver = subscribers[-1]
+        now = timezone.now()
+
+        def send_and_unsubscribe(newsletter, subscriber, newsletter_send):
+            result = send_newsletter_email(newsletter, subscriber, newsletter_send)
+            if subscriber.pk == subscribers[0].pk:
+                # A one-click unsubscribe and an open applied while the send runs
+                Subscriber.objects.filter(pk=leaver.pk).update(is_active=False, unsubscribed_at=now)
+                Subscriber.objects.filter(pk=subscriber.pk).update(total_emails_opened=1)
+            return result
+
+        with mock.patch('newsletters.services.send_newsletter_email', side_effect=send_and_unsubscribe):
+            send_newsletter_task(self.newsletter.id)
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertNotIn(leaver.email, [message.to[0] for message in mail.outbox])
+        leaver.refresh_from_db()
+        self.assertEqual((leaver.is_active, leaver.unsubscribed_at, leaver.total_emails_received), (False, now, 0))
+        first = Subscriber.objects.get(pk=subscribers[0].pk)
+        self.assertEqual((first.total_emails_received, first.total_emails_opened), (1, 1))
+        self.assertIsNotNone(first.last_email_sent)
+
+
+class EngagementScoreTests(TestCase):
+    """Engagement scores follow the documented weighting and decay"""
+
+    def scores(self, rows, now=1760000000, **kwargs):
+        received, opened, clicked, last_opened = (np.array(column, dtype=float) for column in zip(*rows))
+        return compute_scores(received, opened, clicked, last_opened, now, **kwargs).tolist()
+
+    def test_known_histories(self):
+        now = 1760000000
+        day = 86400
+        self.assertEqual(self.scores([
+            (0, 0, 0, np.nan),          # nothing yet: the priors alone
+            (8, 6, 2, now),             # opened today
+            (8, 6, 2, now - 30 * day),  # one half-life ago
+            (8, 6, 2, now - 60 * day),  # two half-lives ago
+            (3, 5, 0, np.nan),          # opens beyond received are capped
+        ]), [21.25, 78.25, 53.25, 40.75, 29.5])
+        self.assertEqual(self.scores([(8, 6, 2, now - 60 * day)], half_life_days=60), [53.25])
+
+    def test_smoothing_favours_long_histories(self):
+        newcomer, regular = self.scores([(1, 1, 1, np.nan), (20, 20, 20, np.nan)])
+        self.assertLess(newcomer, regular)
+
+    def test_score_subscribers_writes_only_changed_scores(self):
+        now = timezone.now()
+        Subscriber.objects.bulk_create([
+            Subscriber(email='fresh@example.com', total_emails_received=8, total_emails_opened=6,
+                       total_emails_clicked=2, last_email_opened=now),
+            Subscriber(email='quiet@example.com', engagement_score=21.25),
+            Subscriber(email='lapsed@example.com', total_emails_received=3, total_emails_opened=5),
+        ])
+        with mock.patch('newsletters.engagement.timezone.now', return_value=now), \
+                CaptureQueriesContext(connection) as queries:
+            result = score_subscribers(chunk_size=2)
+        self.assertEqual(result, {'scored': 3, 'updated': 2})
+        self.assertEqual(
+            dict(Subscriber.objects.values_list('email', 'engagement_score')),
+            {'fresh@example.com': 78.25, 'quiet@example.com': 21.25, 'lapsed@example.com': 29.5},
+        )
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertTrue(updates)
+        for sql in updates:
+            # bulk_update assigns each written column from one CASE
+            self.assertEqual(re.findall(r'"(\w+)" = CASE', sql), ['engagement_score'], sql)
+
+
+def create_metric_sends(newsletter, subscribers, sent_at):
+    """One send per status path, with hand-countable metrics (see AnalyticsMetricTests)"""
+    hour = timedelta(hours=1)
+    rows = [
+        ('sent', {}),
+        ('delivered', {'delivered_at': sent_at}),
+        ('opened', {'opened_at': sent_at + hour}),
+        ('clicked', {'opened_at': sent_at + 3 * hour, 'clicked_at': sent_at + 3 * hour}),
+        ('bounced', {}),
+        ('unsubscribed', {'opened_at': sent_at + 2 * hour}),  # opened, then unsubscribed
+        ('unsubscribed', {}),
+        ('pending', {}),
+    ]
+    NewsletterSend.objects.bulk_create([
+        NewsletterSend(newsletter=newsletter, subscriber=subscriber, status=status, sent_at=sent_at, **times)
+        for subscriber, (status, times) in zip(subscribers, rows)
+    ])
+
+
+class AnalyticsMetricTests(TestCase):
+    """update_metrics matches counts and rates worked out by hand"""
+
+    def test_update_metrics(self):
+        author = CustomUser.objects.create(email='metrics@example.com', name='Metrics')
+        newsletter = Newsletter.objects.create(title='Issue', subject='Subject', content='Content', author=author)
+        subscribers = Subscriber.objects.bulk_create([Subscriber(email=f'metric{i}@example.com') for i in range(8)])
+        sent_at = timezone.now() - timedelta(days=1)
+        create_metric_sends(newsletter, subscribers, sent_at)
+
+        analytics = NewsletterAnalytics.objects.create(newsletter=newsletter)
+        analytics.update_metrics()
+        analytics.refresh_from_db()
+        self.assertEqual(
+            (analytics.total_sent, analytics.total_delivered, analytics.total_bounced, analytics.total_opened,
+             analytics.total_clicked, analytics.total_unsubscribed),
+            (8, 4, 1, 3, 1, 2),
+        )
+        self.assertEqual(
+            (analytics.delivery_rate, analytics.open_rate, analytics.click_rate, analytics.unsubscribe_rate),
+            (50.0, 37.5, 12.5, 25.0),
+        )
+        self.assertEqual(analytics.first_open_at, sent_at + timedelta(hours=1))
+        self.assertEqual(analytics.last_open_at, sent_at + timedelta(hours=3))
+        self.assertAlmostEqual(analytics.average_time_to_open, 2.0)
+
+
+class RecomputeAnalyticsCommandTests(TransactionTestCase):
+    """recompute_analytics rebuilds every newsletter's analytics from worker threads"""
+
+    def test_recompute_all(self):
+        author = CustomUser.objects.create(email='recompute@example.com', name='Recompute')
+        newsletters = [
+            Newsletter.objects.create(title=f'Issue {i}', subject='Subject', content='Content', author=author)
+            for i in range(3)
+        ]
+        subscribers = Subscriber.objects.bulk_create([Subscriber(email=f'again{i}@example.com') for i in range(8)])
+        create_metric_sends(newsletters[0], subscribers, timezone.now() - timedelta(days=1))
+        NewsletterSend.objects.create(newsletter=newsletters[1], subscriber=subscribers[0], status='clicked')
+        # A stale row is overwritten, missing rows are created
+        NewsletterAnalytics.objects.create(newsletter=newsletters[0], total_sent=99, open_rate=99.0)
+
+        out = StringIO()
+        call_command('recompute_analytics', chunk_size=2, workers=2, stdout=out)
+        self.assertIn('Recomputed analytics for 3 newsletters', out.getvalue())
+
+        rows = {
+            item.newsletter_id: item for item in NewsletterAnalytics.objects.filter(newsletter__in=newsletters)
+        }
+        first, second, empty = (rows[newsletter.id] for newsletter in newsletters)
+        self.assertEqual((first.total_sent, first.total_opened, first.open_rate), (8, 3, 37.5))
+        self.assertAlmostEqual(first.average_time_to_open, 2.0)
+        self.assertEqual((second.total_sent, second.total_clicked, second.click_rate), (1, 1, 100.0))
+        self.assertEqual((empty.total_sent, empty.open_rate), (0, 0.0))
 
-# Create your tests here.
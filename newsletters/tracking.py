@@ -0,0 +1,558 @@
+import asyncio
+import html
+import json
+import logging
+import re
+import time
+import weakref
+from datetime import datetime, timezone as dt_timezone
+from urllib.parse import urlencode
+
+import redis
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.urls import reverse
+from django.utils import timezone
+
+from .counters import CounterBatch, rate_expression, send_state
+from .heatmaps import add_heatmap_hits
+from .sketches import add_engagement, add_open_times
+
+logger = logging.getLogger(__name__)
+
+TRACKING_BUFFER_KEY = 'newsletters:tracking_events'
+CLICK_SIGNING_SALT = 'newsletters.tracking.click'
+UNSUBSCRIBE_SIGNING_SALT = 'newsletters.unsubscribe'
+
+# href attributes of absolute http(s) links in rendered email HTML
+LINK_PATTERN = re.compile(r'''(<a\s[^>]*?\bhref\s*=\s*)(["'])(https?://[^"']+)\2''', re.IGNORECASE)
+
+_redis_client = None
+# asyncio connections belong to the loop that opened them, so each event loop
+# gets its own client (a single loop under ASGI, one per request under WSGI)
+_async_redis_clients = weakref.WeakKeyDictionary()
+
+
+def get_redis():
+    """Return a shared Redis client for the tracking buffer"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.NEWSLETTER_REDIS_URL)
+    return _redis_client
+
+
+async def _loop_redis_client():
+    """
+    Hold one asyncio Redis client for the lifetime of the running loop.
+
+    The client lives in an async generator because asyncio.run() (used by
+    uvicorn and by asgiref when a WSGI worker runs an async view) finalizes
+    every open async generator before closing the loop; that runs the
+    ``finally`` below, so the client's connections are closed with the loop
+    instead of leaking one pool per WSGI request.
+    """
+    # A blocking pool makes bursts wait for a free connection rather than
+    # failing with "Too many connections" and dropping the event
+    pool = redis.asyncio.BlockingConnectionPool.from_url(settings.NEWSLETTER_REDIS_URL)
+    client = redis.asyncio.Redis.from_pool(pool)
+    try:
+        while True:
+            yield client
+    finally:
+        _async_redis_clients.pop(asyncio.get_running_loop(), None)
+        await client.aclose()
+
+
+async def get_async_redis():
+    """Return the asyncio Redis client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    holder = _async_redis_clients.get(loop)
+    if holder is None:
+        holder = _async_redis_clients[loop] = _loop_redis_client()
+    return await anext(holder)
+
+
+def build_tracking_url(name, tracking_id):
+    """Absolute URL of a tracking endpoint for the given tracking id"""
+    return f"{settings.TRACKING_URL}{reverse(name, args=[tracking_id])}"
+
+
+def build_click_url(tracking_id, target_url):
+    """Click tracking URL that redirects to a signed target"""
+    signature = signing.Signer(salt=CLICK_SIGNING_SALT).signature(target_url)
+    query = urlencode({'url': target_url, 'sig': signature})
+    return f"{build_tracking_url('track_click', tracking_id)}?{query}"
+
+
+def track_links(html_content, tracking_id):
+    """Point every outgoing link in an email at the click tracker, leaving tracking links as they are"""
+    def replace(match):
+        prefix, quote, href = match.groups()
+        target_url = html.unescape(href)
+        if target_url.startswith(settings.TRACKING_URL):
+            return match.group(0)
+        return f"{prefix}{quote}{html.escape(build_click_url(tracking_id, target_url))}{quote}"
+    return LINK_PATTERN.sub(replace, html_content)
+
+
+def verify_click_target(target_url, signature):
+    """Check that a redirect target was signed by build_click_url"""
+    if not target_url or not signature:
+        return False
+    expected = signing.Signer(salt=CLICK_SIGNING_SALT).signature(target_url)
+    return signing.constant_time_compare(expected, signature)
+
+
+def make_unsubscribe_token(subscriber_id, message_id=''):
+    """Signed token identifying the subscriber (and send) to unsubscribe"""
+    return signing.dumps([subscriber_id, message_id], salt=UNSUBSCRIBE_SIGNING_SALT, compress=True)
+
+
+def read_unsubscribe_token(token):
+    """Return (subscriber_id, message_id); raises signing.BadSignature"""
+    subscriber_id, message_id = signing.loads(token, salt=UNSUBSCRIBE_SIGNING_SALT)
+    return int(subscriber_id), message_id
+
+
+def make_event(event_type, message_id, **extra):
+    """Serialize a tracking event for the buffer"""
+    return json.dumps({'type': event_type, 'message_id': message_id, 'ts': time.time(), **extra})
+
+
+def record_event(event_type, message_id, **extra):
+    """Append a tracking event to the buffer; never raises"""
+    try:
+        get_redis().rpush(TRACKING_BUFFER_KEY, make_event(event_type, message_id, **extra))
+        return True
+    except redis.RedisError as e:
+        logger.error(f"Failed to buffer {event_type} event for {message_id}: {str(e)}")
+        return False
+
+
+async def arecord_event(event_type, message_id, **extra):
+    """Async variant of record_event used by the tracking views"""
+    try:
+        client = await get_async_redis()
+        await client.rpush(TRACKING_BUFFER_KEY, make_event(event_type, message_id, **extra))
+        return True
+    except redis.RedisError as e:
+        logger.error(f"Failed to buffer {event_type} event for {message_id}: {str(e)}")
+        return False
+
+
+def drain_events(batch_size):
+    """Atomically pop up to batch_size raw events from the buffer"""
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.lrange(TRACKING_BUFFER_KEY, 0, batch_size - 1)
+    pipe.ltrim(TRACKING_BUFFER_KEY, batch_size, -1)
+    raw_events, _ = pipe.execute()
+    return raw_events
+
+
+def requeue_events(raw_events):
+    """Put drained events back so a failed flush does not lose them"""
+    if raw_events:
+        get_redis().rpush(TRACKING_BUFFER_KEY, *raw_events)
+
+
+def parse_events(raw_events):
+    """Decode raw buffer entries, dropping anything malformed"""
+    events = []
+    for raw in raw_events:
+        try:
+            event = json.loads(raw)
+            if not {'type', 'message_id', 'ts'} <= event.keys():
+                raise ValueError('missing fields')
+            event['occurred_at'] = datetime.fromtimestamp(float(event['ts']), tz=dt_timezone.utc)
+        except (ValueError, AttributeError, TypeError):
+            logger.warning(f"Dropping malformed tracking event: {raw!r}")
+            continue
+        events.append(event)
+    return events
+
+
+def collapse_events(events):
+    """
+    Collapse open/click events into one entry per message id with hit counts,
+    first/last timestamps and the individual hits. Hits already applied to
+    the send by mark_send_opened/clicked are left to collect_applied_hits.
+    """
+    collapsed = {}
+    for event in events:
+        event_type = event['type']
+        occurred_at = event['occurred_at']
+        if event_type not in ('open', 'click') or event.get('applied'):
+            continue
+
+        entry = collapsed.setdefault(event['message_id'], {
+            'opens': 0, 'clicks': 0,
+            'first_open': None, 'last_open': None, 'first_click': None,
+            'hits': [],
+        })
+        entry['hits'].append((event_type, occurred_at))
+        if event_type == 'open':
+            entry['opens'] += 1
+            if entry['first_open'] is None or occurred_at < entry['first_open']:
+                entry['first_open'] = occurred_at
+            if entry['last_open'] is None or occurred_at > entry['last_open']:
+                entry['last_open'] = occurred_at
+        else:
+            entry['clicks'] += 1
+            if entry['first_click'] is None or occurred_at < entry['first_click']:
+                entry['first_click'] = occurred_at
+    return collapsed
+
+
+def collect_applied_hits(events):
+    """
+    NewsletterEvents for hits whose counters mark_send_opened/clicked already
+    applied; the flusher only logs them and feeds the sketches
+    """
+    from .models import NewsletterEvent
+
+    hits = []
+    for event in events:
+        if not event.get('applied') or event['type'] not in ('open', 'click'):
+            continue
+        try:
+            ids = {key: int(event[key]) for key in ('send_id', 'newsletter_id', 'subscriber_id')}
+        except (KeyError, ValueError, TypeError):
+            logger.warning(f"Dropping malformed applied tracking event: {event!r}")
+            continue
+        hits.append(NewsletterEvent(event_type=event['type'], occurred_at=event['occurred_at'], **ids))
+    return hits
+
+
+def collect_unsubscribes(events):
+    """Map subscriber id -> (message id, time) for queued unsubscribe requests"""
+    unsubscribes = {}
+    for event in events:
+        if event['type'] != 'unsubscribe' or 'subscriber_id' not in event:
+            continue
+        unsubscribes.setdefault(event['subscriber_id'], (event['message_id'], event['occurred_at']))
+    return unsubscribes
+
+
+def apply_events(collapsed, applied=()):
+    """
+    Apply collapsed open/click events to sends, subscribers and newsletters,
+    and log them together with the already ``applied`` hits.
+
+    Each table is written with a single bulk_update whose counter columns are
+    F() increments, so write load depends on the number of distinct sends in
+    the batch rather than on the number of hits.
+    """
+    from .events import log_events
+    from .models import Newsletter, NewsletterEvent, NewsletterSend, Subscriber
+
+    if not collapsed and not applied:
+        return {'sends': 0, 'subscribers': 0, 'newsletters': 0}
+
+    now = timezone.now()
+    with transaction.atomic():
+        sends = list(
+            NewsletterSend.objects.select_for_update()
+            .filter(message_id__in=list(collapsed))
+            .order_by('id')
+            .only('id', 'newsletter_id', 'subscriber_id', 'status', 'sent_at', 'delivered_at',
+                  'opened_at', 'clicked_at', 'message_id')
+        )
+
+        open_times = []
+        subscriber_updates = {}
+        newsletter_deltas = {}
+        counters = CounterBatch()
+        events = []
+        for send in sends:
+            entry = collapsed[send.message_id]
+            before = send_state(send)
+            events.extend(
+                NewsletterEvent(
+                    event_type=event_type, occurred_at=occurred_at, send_id=send.id,
+                    newsletter_id=send.newsletter_id, subscriber_id=send.subscriber_id,
+                )
+                for event_type, occurred_at in entry['hits']
+            )
+            first_open = entry['first_open']
+            newly_opened = first_open is not None and send.opened_at is None
+            newly_clicked = entry['first_click'] is not None and send.clicked_at is None
+
+            if entry['first_click'] is not None and send.status not in ('bounced', 'unsubscribed'):
+                send.status = 'clicked'
+            elif first_open is not None and send.status in ('pending', 'sent', 'delivered'):
+                send.status = 'opened'
+            if newly_opened:
+                send.opened_at = first_open
+            if newly_clicked:
+                send.clicked_at = entry['first_click']
+            counters.add_transition(send.newsletter_id, before, send_state(send))
+            if newly_opened:
+                counters.add_open_time(send.newsletter_id, first_open)
+                if send.sent_at is not None:
+                    open_times.append((send.newsletter_id, (first_open - send.sent_at).total_seconds() / 3600))
+            send.open_count = F('open_count') + entry['opens']
+            send.click_count = F('click_count') + entry['clicks']
+            send.updated_at = now
+
+            if newly_opened or newly_clicked or entry['last_open'] is not None:
+                subscriber = subscriber_updates.setdefault(send.subscriber_id, {
+                    'opened': 0, 'clicked': 0, 'last_open': None,
+                })
+                subscriber['opened'] += int(newly_opened)
+                subscriber['clicked'] += int(newly_clicked)
+                if entry['last_open'] is not None and (
+                    subscriber['last_open'] is None or entry['last_open'] > subscriber['last_open']
+                ):
+                    subscriber['last_open'] = entry['last_open']
+
+            if newly_opened or newly_clicked:
+                deltas = newsletter_deltas.setdefault(send.newsletter_id, {'opened': 0, 'clicked': 0})
+                deltas['opened'] += int(newly_opened)
+                deltas['clicked'] += int(newly_clicked)
+
+        NewsletterSend.objects.bulk_update(
+            sends,
+            ['status', 'opened_at', 'clicked_at', 'open_count', 'click_count', 'updated_at'],
+        )
+
+        subscribers = []
+        for subscriber_id, update in sorted(subscriber_updates.items()):
+            subscriber = Subscriber(id=subscriber_id)
+            subscriber.total_emails_opened = F('total_emails_opened') + update['opened']
+            subscriber.total_emails_clicked = F('total_emails_clicked') + update['clicked']
+            if update['last_open'] is not None:
+                last_open = Value(update['last_open'])
+                subscriber.last_email_opened = Greatest(Coalesce(F('last_email_opened'), last_open), last_open)
+            else:
+                subscriber.last_email_opened = F('last_email_opened')
+            subscribers.append(subscriber)
+        Subscriber.objects.bulk_update(
+            subscribers, ['total_emails_opened', 'total_emails_clicked', 'last_email_opened']
+        )
+
+        newsletters = []
+        for newsletter_id, deltas in sorted(newsletter_deltas.items()):
+            newsletter = Newsletter(id=newsletter_id)
+            newsletter.total_opened = F('total_opened') + deltas['opened']
+            newsletter.total_clicked = F('total_clicked') + deltas['clicked']
+            newsletter.open_rate = rate_expression('total_opened', deltas['opened'], 'total_sent')
+            newsletter.click_rate = rate_expression('total_clicked', deltas['clicked'], 'total_sent')
+            newsletter.updated_at = now
+            newsletters.append(newsletter)
+        Newsletter.objects.bulk_update(
+            newsletters, ['total_opened', 'total_clicked', 'open_rate', 'click_rate', 'updated_at']
+        )
+
+        events.extend(applied)
+        log_events(events)
+        add_engagement(
+            (event.event_type, event.newsletter_id, event.subscriber_id, event.occurred_at) for event in events
+        )
+        add_open_times(open_times)
+        add_heatmap_hits((event.event_type, event.newsletter_id, event.occurred_at) for event in events)
+        counters.publish()
+
+    unmatched = len(collapsed) - len(sends)
+    if unmatched:
+        logger.warning(f"{unmatched} tracking ids did not match any newsletter send")
+
+    return {'sends': len(sends), 'subscribers': len(subscribers), 'newsletters': len(newsletters)}
+
+
+SEND_STATE_FIELDS = (
+    'id', 'newsletter_id', 'subscriber_id', 'status', 'sent_at', 'delivered_at', 'opened_at', 'clicked_at',
+    'message_id',
+)
+
+
+def lock_send(send):
+    """
+    Re-read a send's state under a row lock. Analytics deltas must come from
+    this row, not from the caller's instance, or concurrent hits on the same
+    send would each count as the first.
+    """
+    from .models import NewsletterSend
+
+    return NewsletterSend.objects.select_for_update().only(*SEND_STATE_FIELDS).get(pk=send.pk)
+
+
+def record_applied_hit(send, event_type, when):
+    """
+    Once the transaction commits, hand a hit whose counters were just applied
+    to the flusher, which logs it and merges it into the engagement sketches
+    and heatmaps in bulk. Locking the shared sketch and heatmap rows here, on
+    every request, would serialize concurrent opens. If Redis is down the hit
+    is applied right away instead.
+    """
+    from .models import NewsletterEvent
+
+    ids = {'send_id': send.id, 'newsletter_id': send.newsletter_id, 'subscriber_id': send.subscriber_id}
+
+    def record():
+        if not record_event(event_type, send.message_id, applied=True, ts=when.timestamp(), **ids):
+            apply_events({}, [NewsletterEvent(event_type=event_type, occurred_at=when, **ids)])
+    transaction.on_commit(record)
+
+
+def mark_send_opened(send, when=None):
+    """
+    Record a single open in one transaction and return True if it was the
+    first open of this send. Newsletter totals only move on the first open,
+    and the open rate is recomputed inside the same UPDATE.
+    """
+    from .models import Newsletter, NewsletterSend
+
+    when = when or timezone.now()
+    with transaction.atomic():
+        current = lock_send(send)
+        before = send_state(current)
+        first_open = current.opened_at is None
+        if current.status in ('pending', 'sent', 'delivered'):
+            current.status = 'opened'
+        current.opened_at = current.opened_at or when
+        NewsletterSend.objects.filter(pk=send.pk).update(
+            status=current.status, opened_at=current.opened_at, open_count=F('open_count') + 1, updated_at=when,
+        )
+        send.status, send.opened_at = current.status, current.opened_at
+
+        counters = CounterBatch()
+        counters.add_transition(current.newsletter_id, before, send_state(current))
+        if first_open:
+            counters.add_open_time(current.newsletter_id, when)
+        counters.publish()
+        record_applied_hit(current, 'open', when)
+        if first_open and current.sent_at is not None:
+            add_open_times([(current.newsletter_id, (when - current.sent_at).total_seconds() / 3600)])
+
+        if first_open:
+            Newsletter.objects.filter(pk=current.newsletter_id).update(
+                total_opened=F('total_opened') + 1,
+                open_rate=rate_expression('total_opened', 1, 'total_sent'),
+                updated_at=when,
+            )
+    return first_open
+
+
+def mark_send_clicked(send, when=None):
+    """Click counterpart of mark_send_opened"""
+    from .models import Newsletter, NewsletterSend
+
+    when = when or timezone.now()
+    with transaction.atomic():
+        current = lock_send(send)
+        before = send_state(current)
+        first_click = current.clicked_at is None
+        if current.status not in ('bounced', 'unsubscribed'):
+            current.status = 'clicked'
+        current.clicked_at = current.clicked_at or when
+        NewsletterSend.objects.filter(pk=send.pk).update(
+            status=current.status, clicked_at=current.clicked_at, click_count=F('click_count') + 1, updated_at=when,
+        )
+        send.status, send.clicked_at = current.status, current.clicked_at
+
+        counters = CounterBatch()
+        counters.add_transition(current.newsletter_id, before, send_state(current))
+        counters.publish()
+        record_applied_hit(current, 'click', when)
+
+        if first_click:
+            Newsletter.objects.filter(pk=current.newsletter_id).update(
+                total_clicked=F('total_clicked') + 1,
+                click_rate=rate_expression('total_clicked', 1, 'total_sent'),
+                updated_at=when,
+            )
+    return first_click
+
+
+def apply_unsubscribes(unsubscribes):
+    """
+    Apply queued unsubscribes with one UPDATE per table, so a burst of
+    one-click unsubscribes after a send does not take a row lock per request
+    """
+    from .events import log_events
+    from .models import NewsletterEvent, NewsletterSend, Subscriber
+
+    if not unsubscribes:
+        return 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        unsubscribed = Subscriber.objects.filter(
+            id__in=sorted(unsubscribes), is_active=True
+        ).update(is_active=False, unsubscribed_at=now)
+
+        message_ids = [message_id for message_id, _ in unsubscribes.values() if message_id]
+        sends = [
+            send for send in NewsletterSend.objects.select_for_update()
+            .filter(message_id__in=message_ids)
+            .exclude(status='unsubscribed')
+            .order_by('id')
+            .only('id', 'newsletter_id', 'subscriber_id', 'status', 'delivered_at', 'opened_at', 'clicked_at')
+            if send.subscriber_id in unsubscribes
+        ]
+        NewsletterSend.objects.filter(id__in=[send.id for send in sends]).update(
+            status='unsubscribed', updated_at=now
+        )
+
+        counters = CounterBatch()
+        for send in sends:
+            before = send_state(send)
+            send.status = 'unsubscribed'
+            counters.add_transition(send.newsletter_id, before, send_state(send))
+        counters.publish()
+
+        log_events([
+            NewsletterEvent(
+                event_type='unsubscribe', occurred_at=unsubscribes[send.subscriber_id][1],
+                send_id=send.id, newsletter_id=send.newsletter_id, subscriber_id=send.subscriber_id,
+            )
+            for send in sends
+        ])
+    return unsubscribed
+
+
+def queue_unsubscribe(subscriber_id, message_id=''):
+    """
+    Queue an unsubscribe for the flusher, or apply it right away when the
+    buffer is unreachable so the request is never silently dropped
+    """
+    if not record_event('unsubscribe', message_id, subscriber_id=subscriber_id):
+        apply_unsubscribes({subscriber_id: (message_id, timezone.now())})
+
+
+async def aqueue_unsubscribe(subscriber_id, message_id=''):
+    """Async variant of queue_unsubscribe used by the unsubscribe view"""
+    if not await arecord_event('unsubscribe', message_id, subscriber_id=subscriber_id):
+        await sync_to_async(apply_unsubscribes)({subscriber_id: (message_id, timezone.now())})
+
+
+def flush_tracking_buffer(batch_size=None, max_batches=None):
+    """Drain the tracking buffer in batches and apply each batch in bulk"""
+    batch_size = batch_size or settings.TRACKING_FLUSH_BATCH_SIZE
+    max_batches = max_batches or settings.TRACKING_FLUSH_MAX_BATCHES
+
+    totals = {'events': 0, 'sends': 0, 'subscribers': 0, 'newsletters': 0, 'unsubscribed': 0}
+    for _ in range(max_batches):
+        raw_events = drain_events(batch_size)
+        if not raw_events:
+            break
+        try:
+            events = parse_events(raw_events)
+            # One transaction, so a failure rolls back the whole batch before it is requeued
+            with transaction.atomic():
+                result = apply_events(collapse_events(events), collect_applied_hits(events))
+                result['unsubscribed'] = apply_unsubscribes(collect_unsubscribes(events))
+        except Exception:
+            requeue_events(raw_events)
+            raise
+        totals['events'] += len(raw_events)
+        for key, value in result.items():
+            totals[key] += value
+        if len(raw_events) < batch_size:
+            break
+    return totals
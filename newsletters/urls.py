@@ -1,7 +1,8 @@
 from rest_framework import routers
 from .views import (
     NewsletterViewSet, SubscriberViewSet, NewsletterTemplateViewSet,
-    NewsletterSendViewSet, NewsletterAnalyticsViewSet
+    NewsletterSendViewSet, NewsletterAnalyticsViewSet, track_open, track_click,
+    unsubscribe, provider_webhook
 )
 from django.urls import path, include
 
@@ -13,5 +14,9 @@ router.register(r'sends', NewsletterSendViewSet)
 router.register(r'analytics', NewsletterAnalyticsViewSet)
 
 urlpatterns = [
+    path('track/open/<str:tracking_id>/', track_open, name='track_open'),
+    path('track/click/<str:tracking_id>/', track_click, name='track_click'),
+    path('unsubscribe/<str:token>/', unsubscribe, name='unsubscribe'),
+    path('webhooks/provider/', provider_webhook, name='provider_webhook'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
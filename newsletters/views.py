@@ -5,18 +5,57 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Count, Avg, Sum
+from django.db.models.functions import TruncDate
 from django.utils import timezone
+from django.http import HttpResponse, HttpResponseRedirect, Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
 from datetime import timedelta
+import base64
 import json
 
-from .models import Newsletter, Subscriber, NewsletterTemplate, NewsletterSend, NewsletterAnalytics
+from .models import (
+    Newsletter, Subscriber, NewsletterTemplate, NewsletterSend, NewsletterAnalytics,
+    NewsletterDailyStats, NewsletterEvent, SubscriberDailyStats
+)
 from .serializers import (
     NewsletterSerializer, NewsletterDetailSerializer, NewsletterTemplateSerializer,
     SubscriberSerializer, SubscriberDetailSerializer, NewsletterSendSerializer,
     NewsletterAnalyticsSerializer, NewsletterStatsSerializer, SubscriberImportSerializer
 )
+from config.conditional import ConditionalGetMixin
+from config.projections import ProjectedListMixin
+from .cache import batched_invalidation, get_cached_stats
+from .heatmaps import engagement_heatmap
+from .pagination import SendCursorPagination
+from .exports import (
+    EXPORT_FORMATS, aiter_export, export_events, export_sends, parse_export_bound, parse_newsletter_id,
+    stream_export,
+)
+from .sketches import newsletter_reach, time_to_open_percentiles, unique_reach
+from .webhooks import verify_signature
+from .tracking import (
+    aqueue_unsubscribe, arecord_event, mark_send_clicked, mark_send_opened, read_unsubscribe_token,
+    verify_click_target,
+)
+
+
+def with_serializer_relations(queryset):
+    """Load everything NewsletterSerializer renders in a fixed number of queries"""
+    return queryset.select_related('author', 'template', 'analytics').annotate(sends_count=Count('sends'))
 
-class NewsletterViewSet(viewsets.ModelViewSet):
+
+def paginated_sends(view, sends):
+    """One cursor page of sends with their subscribers joined in"""
+    page = view.paginate_queryset(sends.select_related('subscriber'))
+    serializer = NewsletterSendSerializer(page, many=True, context=view.get_serializer_context())
+    return view.get_paginated_response(serializer.data)
+
+
+class NewsletterViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Newsletter.objects.all()
     serializer_class = NewsletterSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -25,6 +64,8 @@ class NewsletterViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'subject', 'content']
     ordering_fields = ['created_at', 'sent_at', 'title']
     ordering = ['-created_at']
+    # Tracking and recomputes change the embedded analytics without touching the newsletter row
+    last_modified_fields = ('updated_at', 'analytics__updated_at')
 
     def get_queryset(self):
         """Filter newsletters by author if not admin"""
@@ -36,6 +77,18 @@ class NewsletterViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(author=self.request.user)
         return queryset
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'retrieve':
+            queryset = with_serializer_relations(queryset)
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        # Joined and annotated only for the page, so the list's ETag aggregate stays a plain scan
+        if self.action == 'list':
+            queryset = with_serializer_relations(queryset)
+        return super().paginate_queryset(queryset)
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return NewsletterDetailSerializer
@@ -142,12 +195,36 @@ class NewsletterViewSet(viewsets.ModelViewSet):
 
         return Response({'message': 'Newsletter cancelled successfully'})
 
+    @action(detail=True, methods=['get'], filter_backends=[], ordering=['-id'], pagination_class=SendCursorPagination)
+    def sends(self, request, pk=None):
+        """Page through the sends of one newsletter"""
+        newsletter = self.get_object()
+        return paginated_sends(self, NewsletterSend.objects.filter(newsletter=newsletter))
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get advanced newsletter statistics with date filtering"""
-        from django.db.models import Sum, Count, Avg, Q
-        from datetime import datetime, timedelta
-        import pytz
+        user = request.user
+        scope = 'all' if not user.is_authenticated or user.is_staff else f'user:{user.pk}'
+        stats = get_cached_stats('newsletters', scope, request.query_params, lambda: self.compute_stats(request))
+        return Response(stats)
+
+    @action(detail=False, methods=['get'], url_path='heatmap')
+    def overall_heatmap(self, request):
+        """Opens and clicks by weekday x hour across the visible newsletters"""
+        if request.user.is_staff:
+            return Response(engagement_heatmap())
+        return Response(engagement_heatmap(list(self.get_queryset().values_list('id', flat=True))))
+
+    @action(detail=True, methods=['get'])
+    def heatmap(self, request, pk=None):
+        """Opens and clicks by weekday x hour for one newsletter"""
+        newsletter = self.get_object()
+        return Response(engagement_heatmap([newsletter.id]))
+
+    def compute_stats(self, request):
+        """Compute the payload of the stats action"""
+        from datetime import datetime
         
         # Get date range from query parameters
         start_date = request.query_params.get('start_date')
@@ -182,62 +259,115 @@ class NewsletterViewSet(viewsets.ModelViewSet):
             created_at__lte=end_date
         )
         
-        # Basic stats
-        total_newsletters = queryset.count()
-        total_sent = queryset.filter(status='sent').count()
-        total_draft = queryset.filter(status='draft').count()
-        total_scheduled = queryset.filter(status='scheduled').count()
+        # Overview, performance and engagement numbers in one aggregate
+        sent = Q(status='sent')
+        totals = queryset.aggregate(
+            newsletters=Count('id'),
+            sent=Count('id', filter=sent),
+            draft=Count('id', filter=Q(status='draft')),
+            scheduled=Count('id', filter=Q(status='scheduled')),
+            avg_open_rate=Avg('open_rate', filter=sent),
+            avg_click_rate=Avg('click_rate', filter=sent),
+            recipients=Sum('total_recipients', filter=sent),
+            emails_sent=Sum('total_sent', filter=sent),
+            delivered=Sum('total_delivered', filter=sent),
+            opened=Sum('total_opened', filter=sent),
+            clicked=Sum('total_clicked', filter=sent),
+            high_engagement=Count('id', filter=sent & Q(open_rate__gte=25)),
+            medium_engagement=Count('id', filter=sent & Q(open_rate__gte=10, open_rate__lt=25)),
+            low_engagement=Count('id', filter=sent & Q(open_rate__lt=10)),
+        )
+        total_newsletters = totals['newsletters']
+        total_sent = totals['sent']
+        total_draft = totals['draft']
+        total_scheduled = totals['scheduled']
         
         # Performance metrics
         sent_newsletters = queryset.filter(status='sent')
-        avg_open_rate = sent_newsletters.aggregate(Avg('open_rate'))['open_rate__avg'] or 0
-        avg_click_rate = sent_newsletters.aggregate(Avg('click_rate'))['click_rate__avg'] or 0
+        avg_open_rate = totals['avg_open_rate'] or 0
+        avg_click_rate = totals['avg_click_rate'] or 0
         
         # Engagement metrics
-        total_recipients = sent_newsletters.aggregate(Sum('total_recipients'))['total_recipients__sum'] or 0
-        total_emails_sent = sent_newsletters.aggregate(Sum('total_sent'))['total_sent__sum'] or 0
-        total_delivered = sent_newsletters.aggregate(Sum('total_delivered'))['total_delivered__sum'] or 0
-        total_opened = sent_newsletters.aggregate(Sum('total_opened'))['total_opened__sum'] or 0
-        total_clicked = sent_newsletters.aggregate(Sum('total_clicked'))['total_clicked__sum'] or 0
+        total_recipients = totals['recipients'] or 0
+        total_emails_sent = totals['emails_sent'] or 0
+        total_delivered = totals['delivered'] or 0
+        total_opened = totals['opened'] or 0
+        total_clicked = totals['clicked'] or 0
         
         # Calculate rates
         delivery_rate = round((total_delivered / total_emails_sent * 100) if total_emails_sent > 0 else 0, 2)
         open_rate = round((total_opened / total_delivered * 100) if total_delivered > 0 else 0, 2)
         click_rate = round((total_clicked / total_delivered * 100) if total_delivered > 0 else 0, 2)
         
-        # Time series data for charts
-        time_series_data = []
-        current_date = start_date
-        while current_date <= end_date:
-            next_date = current_date + timedelta(days=1)
-            daily_newsletters = queryset.filter(
-                created_at__gte=current_date,
-                created_at__lt=next_date
+        # Time series data for charts: newsletters per day from one grouped
+        # query, engagement from the daily rollups; missing days filled in here
+        first_day = timezone.localtime(start_date).date() if timezone.is_aware(start_date) else start_date.date()
+        last_day = timezone.localtime(end_date).date() if timezone.is_aware(end_date) else end_date.date()
+        daily_newsletters = {
+            row['day']: row
+            for row in queryset.annotate(day=TruncDate('created_at'))
+            .values('day')
+            .annotate(newsletters=Count('id'), sent=Count('id', filter=sent))
+            .order_by('day')
+        }
+        daily_engagement = {
+            row['date']: row
+            for row in NewsletterDailyStats.objects.filter(
+                newsletter__in=self.get_queryset(), date__gte=first_day, date__lte=last_day
             )
-            daily_sent = daily_newsletters.filter(status='sent').count()
-            daily_opens = daily_newsletters.filter(status='sent').aggregate(Sum('total_opened'))['total_opened__sum'] or 0
-            daily_clicks = daily_newsletters.filter(status='sent').aggregate(Sum('total_clicked'))['total_clicked__sum'] or 0
-            
+            .values('date')
+            .annotate(
+                emails_sent=Sum('sends'),
+                delivered=Sum('deliveries'),
+                opens=Sum('unique_opens'),
+                clicks=Sum('unique_clicks'),
+                bounces=Sum('bounces'),
+                unsubscribes=Sum('unsubscribes'),
+            )
+            .order_by('date')
+        }
+        daily_subscribers = {
+            row.date: row
+            for row in SubscriberDailyStats.objects.filter(date__gte=first_day, date__lte=last_day)
+        }
+        time_series_data = []
+        current_day = first_day
+        while current_day <= last_day:
+            created = daily_newsletters.get(current_day, {})
+            engagement = daily_engagement.get(current_day, {})
+            subscribers = daily_subscribers.get(current_day)
             time_series_data.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'newsletters': daily_newsletters.count(),
-                'sent': daily_sent,
-                'opens': daily_opens,
-                'clicks': daily_clicks
+                'date': current_day.strftime('%Y-%m-%d'),
+                'newsletters': created.get('newsletters', 0),
+                'sent': created.get('sent', 0),
+                'emails_sent': engagement.get('emails_sent', 0),
+                'delivered': engagement.get('delivered', 0),
+                'opens': engagement.get('opens', 0),
+                'clicks': engagement.get('clicks', 0),
+                'bounces': engagement.get('bounces', 0),
+                'unsubscribes': engagement.get('unsubscribes', 0),
+                'new_subscribers': subscribers.new_subscribers if subscribers else 0,
             })
-            current_date = next_date
+            current_day += timedelta(days=1)
         
         # Top performing newsletters
-        top_performing = sent_newsletters.order_by('-open_rate')[:10]
+        top_performing = with_serializer_relations(sent_newsletters).order_by('-open_rate')[:10]
         
         # Recent newsletters
-        recent_newsletters = queryset.order_by('-created_at')[:10]
+        recent_newsletters = with_serializer_relations(queryset).order_by('-created_at')[:10]
         
         # Subscriber growth
-        subscriber_growth = Subscriber.objects.filter(
-            subscribed_at__gte=start_date,
-            subscribed_at__lte=end_date
-        ).count()
+        subscriber_growth = sum(row.new_subscribers for row in daily_subscribers.values())
+        
+        # Approximate unique reach from HyperLogLog sketches: daily sketches for
+        # the whole site, per-newsletter sketches when scoped to one author
+        if request.user.is_authenticated and not request.user.is_staff:
+            reach = newsletter_reach(queryset.values_list('id', flat=True))
+        else:
+            reach = unique_reach(first_day, last_day)
+        
+        # Time-to-open percentiles (hours) merged from per-newsletter t-digests
+        time_to_open = time_to_open_percentiles(sent_newsletters.values_list('id', flat=True))
         
         # Bounce analysis
         total_bounces = total_emails_sent - total_delivered
@@ -245,9 +375,9 @@ class NewsletterViewSet(viewsets.ModelViewSet):
         
         # Engagement trends
         engagement_trend = {
-            'high_engagement': sent_newsletters.filter(open_rate__gte=25).count(),
-            'medium_engagement': sent_newsletters.filter(open_rate__gte=10, open_rate__lt=25).count(),
-            'low_engagement': sent_newsletters.filter(open_rate__lt=10).count()
+            'high_engagement': totals['high_engagement'],
+            'medium_engagement': totals['medium_engagement'],
+            'low_engagement': totals['low_engagement']
         }
         
         # Performance comparison
@@ -296,6 +426,8 @@ class NewsletterViewSet(viewsets.ModelViewSet):
                 'open_rate_change': open_rate_change
             },
             'engagement_trends': engagement_trend,
+            'reach': reach,
+            'time_to_open': time_to_open,
             'time_series': time_series_data,
             'recent_newsletters': recent_newsletters,
             'top_performing_newsletters': top_performing,
@@ -305,7 +437,7 @@ class NewsletterViewSet(viewsets.ModelViewSet):
         stats['recent_newsletters'] = NewsletterSerializer(recent_newsletters, many=True).data
         stats['top_performing_newsletters'] = NewsletterSerializer(top_performing, many=True).data
 
-        return Response(stats)
+        return stats
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.AllowAny])
     def test_email(self, request):
@@ -352,14 +484,22 @@ class NewsletterViewSet(viewsets.ModelViewSet):
             'status': 'processing'
         })
 
-class SubscriberViewSet(viewsets.ModelViewSet):
+class SubscriberViewSet(ProjectedListMixin, viewsets.ModelViewSet):
     queryset = Subscriber.objects.all()
     serializer_class = SubscriberSerializer
+    list_computed_fields = {
+        'full_name': (('first_name', 'last_name', 'email'), Subscriber.format_full_name),
+    }
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['is_active', 'frequency', 'source']
+    filterset_fields = {
+        'is_active': ['exact'],
+        'frequency': ['exact'],
+        'source': ['exact'],
+        'engagement_score': ['gte', 'lte'],
+    }
     search_fields = ['email', 'first_name', 'last_name']
-    ordering_fields = ['subscribed_at', 'email']
+    ordering_fields = ['subscribed_at', 'email', 'engagement_score']
     ordering = ['-subscribed_at']
 
     def get_serializer_class(self):
@@ -393,6 +533,12 @@ class SubscriberViewSet(viewsets.ModelViewSet):
 
         return Response({'message': 'Subscriber resubscribed successfully'})
 
+    @action(detail=True, methods=['get'], filter_backends=[], ordering=['-id'], pagination_class=SendCursorPagination)
+    def sends(self, request, pk=None):
+        """Page through the newsletters sent to one subscriber"""
+        subscriber = self.get_object()
+        return paginated_sends(self, NewsletterSend.objects.filter(subscriber=subscriber))
+
     @action(detail=False, methods=['post'])
     def import_subscribers(self, request):
         """Bulk import subscribers"""
@@ -403,17 +549,18 @@ class SubscriberViewSet(viewsets.ModelViewSet):
             source = serializer.validated_data['source']
 
             created_subscribers = []
-            for email in emails:
-                subscriber, created = Subscriber.objects.get_or_create(
-                    email=email,
-                    defaults={
-                        'frequency': frequency,
-                        'source': source,
-                        'is_active': True
-                    }
-                )
-                if created:
-                    created_subscribers.append(subscriber)
+            with batched_invalidation():
+                for email in emails:
+                    subscriber, created = Subscriber.objects.get_or_create(
+                        email=email,
+                        defaults={
+                            'frequency': frequency,
+                            'source': source,
+                            'is_active': True
+                        }
+                    )
+                    if created:
+                        created_subscribers.append(subscriber)
 
             return Response({
                 'message': f'Successfully imported {len(created_subscribers)} subscribers',
@@ -425,51 +572,71 @@ class SubscriberViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get subscriber statistics"""
-        from datetime import timedelta
-        
-        total_subscribers = Subscriber.objects.filter(is_active=True).count()
-        total_unsubscribed = Subscriber.objects.filter(is_active=False).count()
-        
-        # Growth over time
-        now = timezone.now()
-        last_30_days = now - timedelta(days=30)
-        last_7_days = now - timedelta(days=7)
-        
-        new_subscribers_30_days = Subscriber.objects.filter(
-            subscribed_at__gte=last_30_days
-        ).count()
+        return Response(get_cached_stats('subscribers', 'all', {}, self.compute_stats))
+
+    @action(detail=False, methods=['get'])
+    def cohorts(self, request):
+        """Get signup-cohort retention (share of each cohort opening its Nth newsletter)"""
+        from .cohorts import get_cohort_report
+        report = get_cohort_report()
+        if report is None:
+            return Response(
+                {'status': 'building', 'message': 'The cohort report is being built, try again shortly'},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        return Response({'report_id': report.id, 'updated_at': report.updated_at, **report.data})
+
+    def compute_stats(self):
+        """Compute the payload of the stats action"""
+        # Counts, frequency breakdown and averages in one pass over subscribers
+        active = Q(is_active=True)
+        frequencies = [value for value, _ in Subscriber._meta.get_field('frequency').choices]
+        totals = Subscriber.objects.aggregate(
+            active=Count('id', filter=active),
+            inactive=Count('id', filter=~active),
+            avg_emails_received=Avg('total_emails_received', filter=active),
+            **{f'frequency_{value}': Count('id', filter=active & Q(frequency=value)) for value in frequencies},
+        )
+        total_subscribers = totals['active']
+        total_unsubscribed = totals['inactive']
         
-        new_subscribers_7_days = Subscriber.objects.filter(
-            subscribed_at__gte=last_7_days
-        ).count()
+        # Growth over time, from the daily rollups (windows include today)
+        today = timezone.localdate()
+        last_30_days = today - timedelta(days=29)
+        last_7_days = today - timedelta(days=6)
+        previous_30_days = last_30_days - timedelta(days=30)
         
-        unsubscribed_30_days = Subscriber.objects.filter(
-            unsubscribed_at__gte=last_30_days
-        ).count()
+        growth = SubscriberDailyStats.objects.filter(date__gte=previous_30_days).aggregate(
+            new_30_days=Sum('new_subscribers', filter=Q(date__gte=last_30_days)),
+            new_7_days=Sum('new_subscribers', filter=Q(date__gte=last_7_days)),
+            unsubscribed_30_days=Sum('unsubscribes', filter=Q(date__gte=last_30_days)),
+            previous_30_days=Sum('new_subscribers', filter=Q(date__lt=last_30_days)),
+        )
+        new_subscribers_30_days = growth['new_30_days'] or 0
+        new_subscribers_7_days = growth['new_7_days'] or 0
+        unsubscribed_30_days = growth['unsubscribed_30_days'] or 0
+
+        # Approximate unique openers/clickers over the last 30 days
+        reach = unique_reach(last_30_days, today)
 
         # Calculate growth rate
-        previous_30_days = last_30_days - timedelta(days=30)
-        previous_subscribers = Subscriber.objects.filter(
-            subscribed_at__lt=last_30_days,
-            subscribed_at__gte=previous_30_days
-        ).count()
+        previous_subscribers = growth['previous_30_days'] or 0
         
         growth_rate = ((new_subscribers_30_days - previous_subscribers) / previous_subscribers * 100) if previous_subscribers > 0 else 0
 
         # Frequency distribution
-        frequency_stats = Subscriber.objects.filter(
-            is_active=True
-        ).values('frequency').annotate(count=Count('id'))
+        frequency_stats = [
+            {'frequency': value, 'count': totals[f'frequency_{value}']}
+            for value in frequencies if totals[f'frequency_{value}']
+        ]
 
-        # Source distribution
+        # Source distribution (open-ended values, so one grouped query)
         source_stats = Subscriber.objects.filter(
             is_active=True
-        ).values('source').annotate(count=Count('id'))
+        ).values('source').annotate(count=Count('id')).order_by()
 
         # Engagement metrics
-        avg_emails_received = Subscriber.objects.filter(
-            is_active=True
-        ).aggregate(Avg('total_emails_received'))['total_emails_received__avg'] or 0
+        avg_emails_received = totals['avg_emails_received'] or 0
 
         stats = {
             'total_subscribers': total_subscribers,
@@ -478,15 +645,17 @@ class SubscriberViewSet(viewsets.ModelViewSet):
             'new_subscribers_this_month': new_subscribers_30_days,
             'new_subscribers_this_week': new_subscribers_7_days,
             'unsubscribed_this_month': unsubscribed_30_days,
+            'unique_openers_this_month': reach['unique_openers'],
+            'unique_clickers_this_month': reach['unique_clickers'],
             'subscriber_growth_rate': round(growth_rate, 2),
             'average_emails_received': round(avg_emails_received, 1),
             'frequency_distribution': list(frequency_stats),
             'source_distribution': list(source_stats),
         }
 
-        return Response(stats)
+        return stats
 
-class NewsletterTemplateViewSet(viewsets.ModelViewSet):
+class NewsletterTemplateViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = NewsletterTemplate.objects.all()
     serializer_class = NewsletterTemplateSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -508,9 +677,14 @@ class NewsletterTemplateViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(new_template)
         return Response(serializer.data)
 
-class NewsletterSendViewSet(viewsets.ReadOnlyModelViewSet):
+class NewsletterSendViewSet(ProjectedListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = NewsletterSend.objects.all()
     serializer_class = NewsletterSendSerializer
+    list_computed_fields = {
+        'subscriber_name': (
+            ('subscriber__first_name', 'subscriber__last_name', 'subscriber__email'), Subscriber.format_full_name
+        ),
+    }
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'newsletter', 'subscriber']
@@ -519,7 +693,7 @@ class NewsletterSendViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         """Filter sends by newsletter author if not admin"""
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('subscriber')
         if not self.request.user.is_staff:
             queryset = queryset.filter(newsletter__author=self.request.user)
         return queryset
@@ -528,16 +702,8 @@ class NewsletterSendViewSet(viewsets.ReadOnlyModelViewSet):
     def mark_opened(self, request, pk=None):
         """Mark email as opened (for tracking)"""
         send = self.get_object()
-        send.status = 'opened'
-        send.opened_at = timezone.now()
-        send.open_count += 1
-        send.save()
-
-        # Update newsletter analytics
-        newsletter = send.newsletter
-        newsletter.total_opened += 1
-        newsletter.open_rate = (newsletter.total_opened / newsletter.total_sent) * 100
-        newsletter.save()
+        # Counters are incremented in SQL so concurrent hits are never lost
+        mark_send_opened(send)
 
         return Response({'message': 'Email marked as opened'})
 
@@ -545,19 +711,54 @@ class NewsletterSendViewSet(viewsets.ReadOnlyModelViewSet):
     def mark_clicked(self, request, pk=None):
         """Mark email as clicked (for tracking)"""
         send = self.get_object()
-        send.status = 'clicked'
-        send.clicked_at = timezone.now()
-        send.click_count += 1
-        send.save()
-
-        # Update newsletter analytics
-        newsletter = send.newsletter
-        newsletter.total_clicked += 1
-        newsletter.click_rate = (newsletter.total_clicked / newsletter.total_sent) * 100
-        newsletter.save()
+        mark_send_clicked(send)
 
         return Response({'message': 'Email marked as clicked'})
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream sends as CSV or JSONL (optionally gzipped)"""
+        return self.export_response(request, 'sends', export_sends, self.get_queryset())
+
+    @action(detail=False, methods=['get'])
+    def export_events(self, request):
+        """Stream engagement events as CSV or JSONL (optionally gzipped)"""
+        events = NewsletterEvent.objects.all()
+        if not request.user.is_staff:
+            events = events.filter(newsletter__author=request.user)
+        return self.export_response(request, 'events', export_events, events)
+
+    def export_response(self, request, name, build_rows, queryset):
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"export_format must be one of {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            start = parse_export_bound(request.query_params.get('start_date'))
+            end = parse_export_bound(request.query_params.get('end_date'))
+        except ValueError:
+            return Response({'error': 'Invalid start_date or end_date'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            newsletter_id = parse_newsletter_id(request.query_params.get('newsletter'))
+        except ValueError:
+            return Response({'error': 'newsletter must be a newsletter id'}, status=status.HTTP_400_BAD_REQUEST)
+        compress = request.query_params.get('gzip') in ('1', 'true')
+
+        rows, fields = build_rows(queryset, newsletter_id, start, end)
+        chunks = stream_export(rows, fields, export_format, compress)
+        if isinstance(request._request, ASGIRequest):
+            # Under ASGI only an async iterator is streamed; a sync one would be buffered whole
+            chunks = aiter_export(chunks)
+        response = StreamingHttpResponse(
+            chunks, content_type='application/gzip' if compress else EXPORT_FORMATS[export_format],
+        )
+        filename = f"newsletter-{name}.{export_format}{'.gz' if compress else ''}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 class NewsletterAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = NewsletterAnalytics.objects.all()
     serializer_class = NewsletterAnalyticsSerializer
@@ -578,3 +779,69 @@ class NewsletterAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
         
         serializer = self.get_serializer(analytics)
         return Response(serializer.data)
+
+# 1x1 transparent GIF served by the open-tracking pixel
+TRACKING_PIXEL = base64.b64decode('R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7')
+
+# The tracking, redirect and unsubscribe views below are native async views:
+# they only push an event onto the Redis buffer, so under ASGI a single
+# process can hold thousands of these short, I/O-bound requests at once.
+
+async def track_open(request, tracking_id):
+    """Record an email open and return the tracking pixel"""
+    await arecord_event('open', tracking_id)
+    response = HttpResponse(TRACKING_PIXEL, content_type='image/gif')
+    response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+    return response
+
+async def track_click(request, tracking_id):
+    """Record a link click and redirect to the signed target URL"""
+    target_url = request.GET.get('url')
+    if not verify_click_target(target_url, request.GET.get('sig')):
+        return HttpResponseRedirect(settings.SITE_URL)
+
+    await arecord_event('click', tracking_id)
+    return HttpResponseRedirect(target_url)
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+async def unsubscribe(request, token):
+    """
+    Public unsubscribe endpoint. GET shows a confirmation form; POST (including
+    RFC 8058 one-click requests from mail clients) queues the unsubscribe,
+    which the tracking flusher applies in bulk, or applies it directly if
+    Redis is down
+    """
+    try:
+        subscriber_id, message_id = read_unsubscribe_token(token)
+    except (signing.BadSignature, ValueError, TypeError):
+        raise Http404('Invalid unsubscribe link')
+
+    if request.method == 'POST':
+        await aqueue_unsubscribe(subscriber_id, message_id)
+    return render(request, 'newsletters/unsubscribe.html', {
+        'confirmed': request.method == 'POST',
+        'site_url': settings.SITE_URL,
+    })
+
+@csrf_exempt
+@require_POST
+def provider_webhook(request):
+    """
+    Accept a batch of provider delivery/bounce/complaint events and hand it
+    to Celery, answering 202 without touching the database
+    """
+    if not verify_signature(request.body, request.META.get('HTTP_X_WEBHOOK_SIGNATURE')):
+        return JsonResponse({'error': 'Invalid signature'}, status=403)
+
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    events = payload.get('events') if isinstance(payload, dict) else payload
+    if not isinstance(events, list):
+        return JsonResponse({'error': 'Expected a list of events'}, status=400)
+
+    from .tasks import process_provider_events
+    process_provider_events.delay(events)
+    return JsonResponse({'accepted': len(events)}, status=202)
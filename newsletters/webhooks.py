@@ -0,0 +1,204 @@
+import hashlib
+import hmac
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .counters import CounterBatch, send_state
+
+logger = logging.getLogger(__name__)
+
+# Provider event names -> our event kinds
+EVENT_KINDS = {
+    'delivered': 'delivered',
+    'delivery': 'delivered',
+    'bounce': 'bounced',
+    'bounced': 'bounced',
+    'dropped': 'bounced',
+    'failed': 'bounced',
+    'complaint': 'complaint',
+    'complained': 'complaint',
+    'spamreport': 'complaint',
+    'unsubscribe': 'unsubscribed',
+    'unsubscribed': 'unsubscribed',
+}
+
+# Keys providers use for the message identifier, in order of preference
+MESSAGE_ID_KEYS = ('tracking_id', 'message_id', 'Message-ID', 'smtp-id', 'MessageId')
+
+HARD_BOUNCE_TYPES = {'hard', 'permanent'}
+
+
+def verify_signature(body, signature):
+    """Check an ``X-Webhook-Signature: sha256=<hex>`` HMAC of the raw body"""
+    if not signature:
+        return False
+    expected = hmac.new(settings.NEWSLETTER_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f'sha256={expected}', signature)
+
+
+def normalize_message_id(value):
+    """Reduce '<tracking-id@domain>' style Message-IDs to our tracking id"""
+    value = str(value).strip().strip('<>')
+    return value.split('@', 1)[0]
+
+
+# Epochs at or above this are in milliseconds (as seconds it would be the year 5138)
+MILLISECOND_EPOCH = 10 ** 11
+
+
+def parse_timestamp(value):
+    """
+    Parse a provider timestamp: epoch seconds or milliseconds (also as
+    numeric strings) or ISO 8601. A missing value means now; anything else
+    that cannot be parsed raises ValueError.
+    """
+    if value in (None, ''):
+        return timezone.now()
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            pass
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if abs(value) >= MILLISECOND_EPOCH:
+            value /= 1000
+        try:
+            return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        except (OverflowError, OSError) as exc:
+            raise ValueError(f"Timestamp out of range: {value!r}") from exc
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise ValueError(f"Unrecognized timestamp: {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def normalize_event(raw):
+    """Turn a provider event into a flat dict, or None if it is not relevant"""
+    if not isinstance(raw, dict):
+        return None
+    kind = EVENT_KINDS.get(str(raw.get('event') or raw.get('type') or raw.get('eventType') or '').lower())
+    message_id = next((raw[key] for key in MESSAGE_ID_KEYS if raw.get(key)), None)
+    if kind is None or message_id is None:
+        return None
+    return {
+        'kind': kind,
+        'message_id': normalize_message_id(message_id),
+        'occurred_at': parse_timestamp(raw.get('timestamp')),
+        'bounce_type': str(raw.get('bounce_type') or raw.get('bounceType') or '').lower(),
+        'reason': str(raw.get('reason') or '')[:500],
+    }
+
+
+def normalize_events(raw_events):
+    """Normalize a batch, logging and skipping events that cannot be parsed"""
+    events = []
+    for raw in raw_events:
+        try:
+            event = normalize_event(raw)
+        except ValueError as exc:
+            logger.warning(f"Skipping malformed provider event: {exc}")
+            continue
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def apply_provider_events(raw_events):
+    """
+    Correlate a batch of provider events with sends through the indexed
+    message_id and apply them with one bulk statement per table
+    """
+    from .events import log_events
+    from .models import Newsletter, NewsletterEvent, NewsletterSend, Subscriber
+
+    events = normalize_events(raw_events)
+    if not events:
+        return {'events': 0, 'sends': 0, 'unsubscribed': 0}
+
+    now = timezone.now()
+    with transaction.atomic():
+        sends = {
+            send.message_id: send
+            for send in NewsletterSend.objects.select_for_update()
+            .filter(message_id__in={event['message_id'] for event in events})
+            .order_by('id')
+            .only('id', 'newsletter_id', 'subscriber_id', 'status', 'delivered_at',
+                  'opened_at', 'clicked_at', 'message_id', 'provider_response')
+        }
+
+        changed = {}
+        delivered_per_newsletter = {}
+        counters = CounterBatch()
+        deactivate = set()
+        log = []
+        for event in sorted(events, key=lambda event: event['occurred_at']):
+            send = sends.get(event['message_id'])
+            if send is None:
+                continue
+            kind = event['kind']
+            before = send_state(send)
+
+            if kind == 'delivered':
+                if send.delivered_at is None:
+                    send.delivered_at = event['occurred_at']
+                    delivered_per_newsletter[send.newsletter_id] = (
+                        delivered_per_newsletter.get(send.newsletter_id, 0) + 1
+                    )
+                if send.status in ('pending', 'sent'):
+                    send.status = 'delivered'
+                log_type = 'delivered'
+            elif kind == 'bounced':
+                send.status = 'bounced'
+                send.provider_response = event['reason'] or send.provider_response
+                if event['bounce_type'] in HARD_BOUNCE_TYPES:
+                    deactivate.add(send.subscriber_id)
+                log_type = 'bounce'
+            else:
+                send.status = 'unsubscribed'
+                deactivate.add(send.subscriber_id)
+                log_type = 'unsubscribe'
+
+            counters.add_transition(send.newsletter_id, before, send_state(send))
+            send.updated_at = now
+            changed[send.id] = send
+            metadata = {'provider_event': kind}
+            if event['reason']:
+                metadata['reason'] = event['reason']
+            log.append(NewsletterEvent(
+                event_type=log_type, occurred_at=event['occurred_at'], send_id=send.id,
+                newsletter_id=send.newsletter_id, subscriber_id=send.subscriber_id,
+                metadata=metadata,
+            ))
+
+        NewsletterSend.objects.bulk_update(
+            list(changed.values()), ['status', 'delivered_at', 'provider_response', 'updated_at'], batch_size=1000
+        )
+
+        newsletters = []
+        for newsletter_id, delivered in sorted(delivered_per_newsletter.items()):
+            newsletter = Newsletter(id=newsletter_id)
+            newsletter.total_delivered = F('total_delivered') + delivered
+            newsletter.updated_at = now
+            newsletters.append(newsletter)
+        Newsletter.objects.bulk_update(newsletters, ['total_delivered', 'updated_at'])
+
+        unsubscribed = Subscriber.objects.filter(
+            id__in=sorted(deactivate), is_active=True
+        ).update(is_active=False, unsubscribed_at=now)
+
+        log_events(log)
+        counters.publish()
+
+    unmatched = len({event['message_id'] for event in events} - sends.keys())
+    if unmatched:
+        logger.warning(f"{unmatched} provider message ids did not match any newsletter send")
+
+    return {'events': len(events), 'sends': len(changed), 'unsubscribed': unsubscribed}
@@ -8,3 +8,4 @@ from .serializers import PlaybookSerializer
 class PlaybookViewSet(viewsets.ModelViewSet):
     queryset = Playbook.objects.all()
     serializer_class = PlaybookSerializer
+    ordering = ['-created_at']
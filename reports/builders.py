@@ -0,0 +1,63 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+# Same definitions as NewsletterAnalytics.metric_aggregates
+OPENED = Q(status__in=['opened', 'clicked']) | Q(opened_at__isnull=False)
+CLICKED = Q(status='clicked') | Q(clicked_at__isnull=False)
+
+
+def percentage(part, whole):
+    return round(part / whole * 100, 2) if whole else 0.0
+
+
+def build_newsletter_report(start_date, end_date, period='weekly'):
+    """
+    Fill a NewsletterReport for [start_date, end_date] from the sends made in
+    that range with one aggregate query, replacing an earlier snapshot of
+    the same period
+    """
+    from newsletters.models import NewsletterSend
+    from .models import NewsletterReport
+
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    totals = NewsletterSend.objects.filter(sent_at__gte=start, sent_at__lt=end).aggregate(
+        sent=Count('id'),
+        subscribers=Count('subscriber_id', distinct=True),
+        newsletters=Count('newsletter_id', distinct=True),
+        opened=Count('id', filter=OPENED),
+        clicked=Count('id', filter=CLICKED),
+    )
+
+    report, _ = NewsletterReport.objects.update_or_create(
+        title=f"{period.capitalize()} newsletter report {start_date.isoformat()} - {end_date.isoformat()}",
+        start_date=start_date,
+        end_date=end_date,
+        defaults={
+            'description': (
+                f"{totals['sent']} emails from {totals['newsletters']} newsletters to "
+                f"{totals['subscribers']} subscribers. Conversion rate is clicks per open."
+            ),
+            'total_subscribers': totals['subscribers'],
+            'open_rate': percentage(totals['opened'], totals['sent']),
+            'click_rate': percentage(totals['clicked'], totals['sent']),
+            'conversion_rate': percentage(totals['clicked'], totals['opened']),
+        },
+    )
+    return report
+
+
+def previous_week(today=None):
+    """Monday and Sunday of the last complete week"""
+    today = today or timezone.localdate()
+    start = today - timedelta(days=today.weekday() + 7)
+    return start, start + timedelta(days=6)
+
+
+def previous_month(today=None):
+    """First and last day of the last complete month"""
+    today = today or timezone.localdate()
+    end = today.replace(day=1) - timedelta(days=1)
+    return date(end.year, end.month, 1), end
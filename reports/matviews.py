@@ -0,0 +1,28 @@
+import logging
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Report views created by migration 0003_report_views, which holds their SQL
+VIEWS = ['reports_author_performance', 'reports_source_engagement', 'reports_domain_bounce_rate']
+
+
+def is_materialized(vendor=None):
+    """Materialized views need PostgreSQL; other databases get plain views"""
+    return (vendor or connection.vendor) == 'postgresql'
+
+
+def refresh_views(concurrently=True):
+    """
+    Refresh every report view. CONCURRENTLY keeps the old rows readable
+    while the new ones are computed (it needs the unique key index).
+    """
+    if not is_materialized():
+        return []
+    refreshed = []
+    with connection.cursor() as cursor:
+        for name in VIEWS:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{name}")
+            refreshed.append(name)
+    return refreshed
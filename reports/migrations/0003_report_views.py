@@ -0,0 +1,170 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The view definitions are frozen here rather than imported from
+# reports.matviews, so later changes to that module cannot change what this
+# migration creates. Metrics follow NewsletterAnalytics.metric_aggregates.
+
+# Domain part of an email address, per database vendor
+EMAIL_DOMAIN = {
+    "postgresql": "lower(split_part(sub.email, '@', 2))",
+    "default": "lower(substr(sub.email, instr(sub.email, '@') + 1))",
+}
+
+# name -> (SELECT statement, unique key column required by REFRESH ... CONCURRENTLY)
+REPORT_VIEWS = {
+    "reports_author_performance": (
+        """
+        SELECT n.author_id AS author_id,
+               COUNT(DISTINCT n.id) AS newsletters,
+               COUNT(s.id) AS total_sent,
+               SUM(CASE WHEN (s.status IN ('delivered', 'opened', 'clicked') OR s.delivered_at IS NOT NULL OR s.opened_at IS NOT NULL) THEN 1 ELSE 0 END) AS total_delivered,
+               SUM(CASE WHEN (s.status IN ('opened', 'clicked') OR s.opened_at IS NOT NULL) THEN 1 ELSE 0 END) AS total_opened,
+               SUM(CASE WHEN (s.status = 'clicked' OR s.clicked_at IS NOT NULL) THEN 1 ELSE 0 END) AS total_clicked,
+               SUM(CASE WHEN (s.status = 'bounced') THEN 1 ELSE 0 END) AS total_bounced,
+               SUM(CASE WHEN (s.status = 'unsubscribed') THEN 1 ELSE 0 END) AS total_unsubscribed,
+               CAST(CASE WHEN COUNT(s.id) > 0 THEN 100.0 * SUM(CASE WHEN (s.status IN ('opened', 'clicked') OR s.opened_at IS NOT NULL) THEN 1 ELSE 0 END) / COUNT(s.id) ELSE 0.0 END AS double precision) AS open_rate,
+               CAST(CASE WHEN COUNT(s.id) > 0 THEN 100.0 * SUM(CASE WHEN (s.status = 'clicked' OR s.clicked_at IS NOT NULL) THEN 1 ELSE 0 END) / COUNT(s.id) ELSE 0.0 END AS double precision) AS click_rate,
+               CAST(CASE WHEN COUNT(s.id) > 0 THEN 100.0 * SUM(CASE WHEN (s.status = 'bounced') THEN 1 ELSE 0 END) / COUNT(s.id) ELSE 0.0 END AS double precision) AS bounce_rate
+        FROM newsletters_newsletter n
+        LEFT JOIN newsletters_newslettersend s ON s.newsletter_id = n.id
+        WHERE n.author_id IS NOT NULL
+        GROUP BY n.author_id
+        """,
+        "author_id",
+    ),
+    "reports_source_engagement": (
+        """
+        SELECT sub.source AS source,
+               COUNT(DISTINCT sub.id) AS subscribers,
+               COUNT(DISTINCT CASE WHEN sub.is_active THEN sub.id END) AS active_subscribers,
+               COUNT(s.id) AS total_sent,
+               SUM(CASE WHEN (s.status IN ('opened', 'clicked') OR s.opened_at IS NOT NULL) THEN 1 ELSE 0 END) AS total_opened,
+               SUM(CASE WHEN (s.status = 'clicked' OR s.clicked_at IS NOT NULL) THEN 1 ELSE 0 END) AS total_clicked,
+               CAST(CASE WHEN COUNT(s.id) > 0 THEN 100.0 * SUM(CASE WHEN (s.status IN ('opened', 'clicked') OR s.opened_at IS NOT NULL) THEN 1 ELSE 0 END) / COUNT(s.id) ELSE 0.0 END AS double precision) AS open_rate,
+               CAST(CASE WHEN COUNT(s.id) > 0 THEN 100.0 * SUM(CASE WHEN (s.status = 'clicked' OR s.clicked_at IS NOT NULL) THEN 1 ELSE 0 END) / COUNT(s.id) ELSE 0.0 END AS double precision) AS click_rate
+        FROM newsletters_subscriber sub
+        LEFT JOIN newsletters_newslettersend s ON s.subscriber_id = sub.id
+        GROUP BY sub.source
+        """,
+        "source",
+    ),
+    "reports_domain_bounce_rate": (
+        """
+        SELECT {domain} AS domain,
+               COUNT(DISTINCT sub.id) AS subscribers,
+               COUNT(s.id) AS total_sent,
+               SUM(CASE WHEN (s.status = 'bounced') THEN 1 ELSE 0 END) AS total_bounced,
+               CAST(CASE WHEN COUNT(s.id) > 0 THEN 100.0 * SUM(CASE WHEN (s.status = 'bounced') THEN 1 ELSE 0 END) / COUNT(s.id) ELSE 0.0 END AS double precision) AS bounce_rate
+        FROM newsletters_subscriber sub
+        LEFT JOIN newsletters_newslettersend s ON s.subscriber_id = sub.id
+        GROUP BY {domain}
+        """,
+        "domain",
+    ),
+}
+
+
+def create_report_views(apps, schema_editor):
+    """Materialized views on PostgreSQL, plain views elsewhere"""
+    vendor = schema_editor.connection.vendor
+    domain = EMAIL_DOMAIN.get(vendor, EMAIL_DOMAIN["default"])
+    for name, (select, key) in REPORT_VIEWS.items():
+        select = select.format(domain=domain)
+        if vendor == "postgresql":
+            schema_editor.execute(f"CREATE MATERIALIZED VIEW {name} AS {select}")
+            schema_editor.execute(f"CREATE UNIQUE INDEX {name}_key ON {name} ({key})")
+        else:
+            schema_editor.execute(f"CREATE VIEW {name} AS {select}")
+
+
+def drop_report_views(apps, schema_editor):
+    kind = "MATERIALIZED VIEW" if schema_editor.connection.vendor == "postgresql" else "VIEW"
+    for name in REPORT_VIEWS:
+        schema_editor.execute(f"DROP {kind} IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0002_alter_revenuereport_options_revenuereport_author_and_more"),
+        ("users", "0002_customuser_avatar"),
+        ("newsletters", "0007_subscriber_engagement_score"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthorPerformance",
+            fields=[
+                (
+                    "author",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("newsletters", models.IntegerField()),
+                ("total_sent", models.IntegerField()),
+                ("total_delivered", models.IntegerField()),
+                ("total_opened", models.IntegerField()),
+                ("total_clicked", models.IntegerField()),
+                ("total_bounced", models.IntegerField()),
+                ("total_unsubscribed", models.IntegerField()),
+                ("open_rate", models.FloatField()),
+                ("click_rate", models.FloatField()),
+                ("bounce_rate", models.FloatField()),
+            ],
+            options={
+                "db_table": "reports_author_performance",
+                "ordering": ["-open_rate"],
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="DomainBounceRate",
+            fields=[
+                (
+                    "domain",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("subscribers", models.IntegerField()),
+                ("total_sent", models.IntegerField()),
+                ("total_bounced", models.IntegerField()),
+                ("bounce_rate", models.FloatField()),
+            ],
+            options={
+                "db_table": "reports_domain_bounce_rate",
+                "ordering": ["-total_sent"],
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="SourceEngagement",
+            fields=[
+                (
+                    "source",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("subscribers", models.IntegerField()),
+                ("active_subscribers", models.IntegerField()),
+                ("total_sent", models.IntegerField()),
+                ("total_opened", models.IntegerField()),
+                ("total_clicked", models.IntegerField()),
+                ("open_rate", models.FloatField()),
+                ("click_rate", models.FloatField()),
+            ],
+            options={
+                "db_table": "reports_source_engagement",
+                "ordering": ["-subscribers"],
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(create_report_views, drop_report_views),
+    ]
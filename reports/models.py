@@ -88,3 +88,65 @@ class AnalyticsReport(models.Model):
 
     def __str__(self):
         return self.title
+
+# Read-only models over the report views created by migration 0003_report_views
+# (materialized views on PostgreSQL, refreshed by a beat task)
+
+class AuthorPerformance(models.Model):
+    """Send and engagement totals per newsletter author"""
+    author = models.OneToOneField(
+        CustomUser, primary_key=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    newsletters = models.IntegerField()
+    total_sent = models.IntegerField()
+    total_delivered = models.IntegerField()
+    total_opened = models.IntegerField()
+    total_clicked = models.IntegerField()
+    total_bounced = models.IntegerField()
+    total_unsubscribed = models.IntegerField()
+    open_rate = models.FloatField()
+    click_rate = models.FloatField()
+    bounce_rate = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'reports_author_performance'
+        ordering = ['-open_rate']
+
+    def __str__(self):
+        return f"Author {self.author_id}"
+
+class SourceEngagement(models.Model):
+    """Engagement of subscribers grouped by signup source"""
+    source = models.CharField(max_length=100, primary_key=True)
+    subscribers = models.IntegerField()
+    active_subscribers = models.IntegerField()
+    total_sent = models.IntegerField()
+    total_opened = models.IntegerField()
+    total_clicked = models.IntegerField()
+    open_rate = models.FloatField()
+    click_rate = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'reports_source_engagement'
+        ordering = ['-subscribers']
+
+    def __str__(self):
+        return self.source or '(none)'
+
+class DomainBounceRate(models.Model):
+    """Bounce rate per subscriber email domain"""
+    domain = models.CharField(max_length=255, primary_key=True)
+    subscribers = models.IntegerField()
+    total_sent = models.IntegerField()
+    total_bounced = models.IntegerField()
+    bounce_rate = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'reports_domain_bounce_rate'
+        ordering = ['-total_sent']
+
+    def __str__(self):
+        return self.domain
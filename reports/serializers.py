@@ -1,7 +1,29 @@
 from rest_framework import serializers
-from .models import RevenueReport
+from .models import RevenueReport, NewsletterReport, AuthorPerformance, SourceEngagement, DomainBounceRate
 
 class RevenueReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = RevenueReport
-        fields = '__all__' 
\ No newline at end of file
+        fields = '__all__'
+
+class NewsletterReportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NewsletterReport
+        fields = '__all__'
+
+class AuthorPerformanceSerializer(serializers.ModelSerializer):
+    author_email = serializers.ReadOnlyField(source='author.email')
+
+    class Meta:
+        model = AuthorPerformance
+        fields = '__all__'
+
+class SourceEngagementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SourceEngagement
+        fields = '__all__'
+
+class DomainBounceRateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DomainBounceRate
+        fields = '__all__'
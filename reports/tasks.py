@@ -0,0 +1,52 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def refresh_report_views():
+    """
+    Refresh the materialized report views without blocking readers
+    """
+    try:
+        from .matviews import refresh_views
+        refreshed = refresh_views(concurrently=True)
+
+        logger.info(f"Refreshed {len(refreshed)} report views")
+        return {'status': 'success', 'refreshed': refreshed}
+
+    except Exception as e:
+        logger.error(f"Error in refresh_report_views: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def build_weekly_newsletter_report():
+    """
+    Snapshot newsletter performance for the last complete week
+    """
+    try:
+        from .builders import build_newsletter_report, previous_week
+        report = build_newsletter_report(*previous_week(), period='weekly')
+
+        logger.info(f"Built newsletter report {report.title}")
+        return {'status': 'success', 'report_id': report.id}
+
+    except Exception as e:
+        logger.error(f"Error in build_weekly_newsletter_report: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+@shared_task
+def build_monthly_newsletter_report():
+    """
+    Snapshot newsletter performance for the last complete month
+    """
+    try:
+        from .builders import build_newsletter_report, previous_month
+        report = build_newsletter_report(*previous_month(), period='monthly')
+
+        logger.info(f"Built newsletter report {report.title}")
+        return {'status': 'success', 'report_id': report.id}
+
+    except Exception as e:
+        logger.error(f"Error in build_monthly_newsletter_report: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
@@ -1,3 +1,102 @@
+from datetime import date, datetime
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from newsletters.models import Newsletter, NewsletterAnalytics, NewsletterSend, Subscriber
+from users.models import CustomUser
+
+from .builders import build_newsletter_report, previous_month, previous_week
+from .models import NewsletterReport
+
+
+class AuthorPerformanceTests(TestCase):
+    """Authors only see their own performance row"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            CustomUser.objects.create(email=f'author{i}@example.com', name=f'Author {i}') for i in range(2)
+        ]
+        cls.staff = CustomUser.objects.create(email='staff@example.com', name='Staff', is_staff=True)
+        subscriber = Subscriber.objects.create(email='reader@example.com')
+        for author in cls.authors:
+            newsletter = Newsletter.objects.create(title='Issue', subject='Subject', content='Content', author=author)
+            NewsletterSend.objects.create(newsletter=newsletter, subscriber=subscriber, status='opened')
+
+    def rows_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/reports/author-performance/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_author_sees_own_row(self):
+        rows = self.rows_for(self.authors[0])
+        self.assertEqual([row['author'] for row in rows], [self.authors[0].id])
+        self.assertEqual(rows[0]['total_opened'], 1)
+
+    def test_staff_sees_every_author(self):
+        rows = self.rows_for(self.staff)
+        self.assertEqual(sorted(row['author'] for row in rows), [author.id for author in self.authors])
+
+
+class NewsletterReportBuilderTests(TestCase):
+    """Period reports count the sends made in the period like NewsletterAnalytics does"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create(email='builder@example.com', name='Builder')
+        cls.newsletters = [
+            Newsletter.objects.create(title=f'Issue {i}', subject='Subject', content='Content', author=author)
+            for i in range(3)
+        ]
+        subscribers = Subscriber.objects.bulk_create([Subscriber(email=f'week{i}@example.com') for i in range(4)])
+        in_week = timezone.make_aware(datetime(2026, 10, 6, 12))
+        after_week = timezone.make_aware(datetime(2026, 10, 12, 9))
+        first, second, later = cls.newsletters
+        for newsletter, subscriber, status, sent_at, opened in [
+            (first, subscribers[0], 'opened', in_week, True),
+            (first, subscribers[1], 'clicked', in_week, True),
+            (first, subscribers[2], 'delivered', in_week, False),
+            (first, subscribers[3], 'unsubscribed', in_week, True),  # opened before unsubscribing
+            (second, subscribers[0], 'clicked', in_week, True),
+            (later, subscribers[1], 'clicked', after_week, True),
+        ]:
+            NewsletterSend.objects.create(
+                newsletter=newsletter, subscriber=subscriber, status=status, sent_at=sent_at,
+                opened_at=sent_at if opened else None,
+            )
+
+    def test_weekly_report(self):
+        report = build_newsletter_report(date(2026, 10, 5), date(2026, 10, 11))
+        self.assertEqual(report.title, 'Weekly newsletter report 2026-10-05 - 2026-10-11')
+        self.assertEqual(report.total_subscribers, 4)
+        self.assertEqual((report.open_rate, report.click_rate, report.conversion_rate), (80.0, 40.0, 50.0))
+        self.assertTrue(report.description.startswith('5 emails from 2 newsletters to 4 subscribers.'))
+
+        # The same figures as the per-newsletter analytics of the newsletters sent that week
+        analytics = []
+        for newsletter in self.newsletters[:2]:
+            item = NewsletterAnalytics.objects.create(newsletter=newsletter)
+            item.update_metrics()
+            analytics.append(item)
+        sent = sum(item.total_sent for item in analytics)
+        self.assertEqual(report.open_rate, 100 * sum(item.total_opened for item in analytics) / sent)
+        self.assertEqual(report.click_rate, 100 * sum(item.total_clicked for item in analytics) / sent)
+
+    def test_rebuild_replaces_the_snapshot(self):
+        build_newsletter_report(date(2026, 10, 5), date(2026, 10, 11))
+        NewsletterSend.objects.filter(status='delivered').update(status='opened')
+        report = build_newsletter_report(date(2026, 10, 5), date(2026, 10, 11))
+        self.assertEqual(NewsletterReport.objects.count(), 1)
+        self.assertEqual(report.open_rate, 100.0)
+
+    def test_empty_period(self):
+        report = build_newsletter_report(date(2026, 9, 1), date(2026, 9, 30), period='monthly')
+        self.assertEqual((report.total_subscribers, report.open_rate, report.conversion_rate), (0, 0.0, 0.0))
 
-# Create your tests here.
+    def test_previous_periods(self):
+        self.assertEqual(previous_week(date(2026, 10, 14)), (date(2026, 10, 5), date(2026, 10, 11)))
+        self.assertEqual(previous_month(date(2026, 3, 1)), (date(2026, 2, 1), date(2026, 2, 28)))
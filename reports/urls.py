@@ -1,9 +1,16 @@
 from rest_framework import routers
-from .views import RevenueReportViewSet
+from .views import (
+    RevenueReportViewSet, NewsletterReportViewSet, AuthorPerformanceViewSet, SourceEngagementViewSet,
+    DomainBounceRateViewSet
+)
 from django.urls import path, include
 
 router = routers.DefaultRouter()
 router.register(r'reports', RevenueReportViewSet)
+router.register(r'newsletter-reports', NewsletterReportViewSet)
+router.register(r'author-performance', AuthorPerformanceViewSet)
+router.register(r'source-engagement', SourceEngagementViewSet)
+router.register(r'domain-bounce-rates', DomainBounceRateViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
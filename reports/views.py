@@ -1,10 +1,54 @@
 from django.shortcuts import render
-from rest_framework import viewsets
-from .models import RevenueReport
-from .serializers import RevenueReportSerializer
+from rest_framework import viewsets, permissions, filters
+from .models import RevenueReport, NewsletterReport, AuthorPerformance, SourceEngagement, DomainBounceRate
+from .serializers import (
+    RevenueReportSerializer, NewsletterReportSerializer, AuthorPerformanceSerializer, SourceEngagementSerializer,
+    DomainBounceRateSerializer
+)
 
 # Create your views here.
 
 class RevenueReportViewSet(viewsets.ModelViewSet):
     queryset = RevenueReport.objects.all()
     serializer_class = RevenueReportSerializer
+
+class NewsletterReportViewSet(viewsets.ReadOnlyModelViewSet):
+    """Precomputed weekly and monthly newsletter reports (see reports.builders)"""
+    queryset = NewsletterReport.objects.filter(is_active=True)
+    serializer_class = NewsletterReportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['start_date', 'end_date', 'open_rate', 'click_rate']
+    ordering = ['-end_date']
+
+class AuthorPerformanceViewSet(viewsets.ReadOnlyModelViewSet):
+    """Per-author performance, served from a materialized view"""
+    queryset = AuthorPerformance.objects.select_related('author')
+    serializer_class = AuthorPerformanceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['total_sent', 'open_rate', 'click_rate', 'bounce_rate']
+
+    def get_queryset(self):
+        """Authors only see their own row; staff see everyone"""
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(author=self.request.user)
+        return queryset
+
+class SourceEngagementViewSet(viewsets.ReadOnlyModelViewSet):
+    """Engagement by subscriber source, served from a materialized view"""
+    queryset = SourceEngagement.objects.all()
+    serializer_class = SourceEngagementSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['subscribers', 'open_rate', 'click_rate']
+
+class DomainBounceRateViewSet(viewsets.ReadOnlyModelViewSet):
+    """Bounce rate by email domain, served from a materialized view"""
+    queryset = DomainBounceRate.objects.all()
+    serializer_class = DomainBounceRateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['total_sent', 'total_bounced', 'bounce_rate']
+    lookup_value_regex = '[^/]+'
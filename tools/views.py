@@ -8,3 +8,4 @@ from .serializers import ToolSerializer
 class ToolViewSet(viewsets.ModelViewSet):
     queryset = Tool.objects.all()
     serializer_class = ToolSerializer
+    ordering = ['-created_at']
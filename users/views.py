@@ -20,6 +20,7 @@ from django.core.mail import send_mail
 class UserViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
+    ordering = ['-date_joined']
     
     def get_permissions(self):
         if self.action == 'list':